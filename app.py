@@ -1,40 +1,115 @@
+from src.utils.startup import startup_report
+import asyncio
+import hmac
 import os
 import uuid
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from typing import Dict
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from loguru import logger
-import yaml
-from src.utils.config import load_config
+from src.utils.config import load_config_and_settings, worker_count
 from src.utils.session import SessionManager
 from src.retell_agent import RetellAgent
+from src.utils.concurrency import (
+    WS_CLOSE_POLICY_VIOLATION,
+    WS_CLOSE_SERVICE_RESTART,
+    WS_CLOSE_UNSUPPORTED_DATA
+)
+from src.utils.exceptions import AudioProcessingError, ConfigurationError
+from src.utils.log import configure_logging
+from src.utils.serialization import configure_json
+from src.utils.drain import DrainController
+from src.utils.session_store import SessionStore
+from src.utils.archive import Archiver
+from src.utils.outbound import OutboundQueue, OutboundStats
+from src.utils.recording import Recorder, install_recorder
+from src.utils.tuning import Tuner
+
+startup_report.record("imports")
 
 app = FastAPI()
 
+# Load configuration
+with startup_report.phase("config"):
+    config, settings = load_config_and_settings()
+    configure_json(settings.app.json_encoder)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=list(settings.security.allowed_origins),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Load configuration
-config = load_config()
-
 # Initialize session manager
 session_manager = SessionManager()
-session_manager.set_timeout(config["security"]["token_expiry"])
+session_manager.set_timeout(settings.security.token_expiry)
 
 # Initialize Retell agent
 retell_agent = RetellAgent(config, session_manager)
 
+# Capture sessions for offline replay (see benchmarks/replay.py)
+if settings.recording.enabled:
+    install_recorder(retell_agent, Recorder(settings.recording.directory, settings.recording.queue_size))
+
+# Call audio and transcripts for QA, written by a background thread
+if settings.archive.enabled:
+    retell_agent.archiver = Archiver(settings.archive)
+
+# Runtime overrides of tunable settings, shared by all workers through the overrides file
+tuner = Tuner(config, retell_agent, settings.tuning)
+tuner.check_file()
+
+# Open conversations' outbound queues by session ID, so expired sessions can be closed
+connections: Dict[str, OutboundQueue] = {}
+outbound_stats = OutboundStats()
+
+def close_expired_connection(session_id: str):
+    """Close the websocket of a session that ended outside its handler (e.g. expiry)."""
+    websocket = connections.pop(session_id, None)
+    if websocket is not None:
+        asyncio.create_task(websocket.close(code=1000, reason="Session expired"))
+
+session_manager.add_end_listener(close_expired_connection)
+
+# Optional store used to hand sessions to another worker during drain
+session_store = None
+if settings.session_store.enabled:
+    session_store = SessionStore(config["session_store"])
+
+drain_controller = DrainController(
+    session_manager,
+    connections,
+    retell_agent.export_session,
+    session_store=session_store,
+    timeout=settings.app.drain_timeout
+)
+
+def is_admin_request(request: Request) -> bool:
+    """Allow admin calls with a matching X-Admin-Token, or from loopback if no token is set."""
+    token = os.getenv("ADMIN_TOKEN")
+    if token:
+        return hmac.compare_digest(request.headers.get("x-admin-token", ""), token)
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on startup."""
     try:
+        # Each worker process sets up its own background-written sinks
+        configure_logging(settings.monitoring)
         await retell_agent.initialize()
+        if retell_agent.archiver is not None:
+            retell_agent.archiver.start()
+        if session_store is not None:
+            await session_store.initialize()
+        session_manager.start()
+        tuner.start()
         logger.info("Application started successfully")
+        startup_report.mark_ready()
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         raise
@@ -57,67 +132,212 @@ async def health_check():
                 "message": f"Missing API keys: {', '.join(missing_keys)}"
             }
 
-        return {"status": "healthy"}
+        return {"status": "healthy", "sessions": session_manager.stats()}
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return {"status": "unhealthy", "message": str(e)}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe; fails while draining so load balancers stop routing here."""
+    if drain_controller.is_draining:
+        return JSONResponse(status_code=503, content={"status": "draining"})
+    if not retell_agent.is_initialized:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
+
+@app.post("/drain")
+async def drain(request: Request, wait: bool = False):
+    """Stop accepting conversations and close existing ones as their turns finish."""
+    if not is_admin_request(request):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    task = drain_controller.start()
+    if wait:
+        await task
+    return {"status": "draining", "sessions": len(connections)}
+
+@app.get("/tuning")
+async def get_tuning():
+    """Current tuning version, overrides and recent changes."""
+    return tuner.stats()
+
+@app.post("/tuning")
+async def update_tuning(request: Request):
+    """Change tunable settings for new turns, e.g. {"llm": {"providers": {"openai": {"max_tokens": 80}}}}."""
+    if not is_admin_request(request):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    try:
+        entry = tuner.update(await request.json(), source="admin endpoint")
+    except (ConfigurationError, ValueError) as e:
+        return JSONResponse(status_code=400, content={"status": "rejected", "message": str(e)})
+    return {"status": "applied", **entry}
+
+@app.get("/metrics")
+async def metrics():
+    """Concurrency, admission and session metrics."""
+    result = {
+        "admission": retell_agent.admission.stats(),
+        "sessions": session_manager.stats(),
+        "startup": startup_report.snapshot(),
+        "tuning_version": tuner.version,
+        "turns": retell_agent.turn_stats(),
+        "outbound": outbound_stats.snapshot(),
+        "retell": retell_agent.retell_bridge.stats(),
+        "profiles": retell_agent.profiles.stats()
+    }
+    if retell_agent.frame_batcher is not None:
+        result["dsp_batching"] = retell_agent.frame_batcher.stats()
+    if retell_agent.archiver is not None:
+        result["archive"] = retell_agent.archiver.stats()
+    if retell_agent.recorder is not None:
+        result["recording"] = retell_agent.recorder.stats()
+    return result
+
+async def reject(websocket: WebSocket, code: int, reason: str):
+    """Refuse a connection with a websocket close code.
+
+    Closing before the handshake makes the server answer with a bare HTTP 403,
+    so the connection is accepted first for the client to see `code` and back off.
+    """
+    await websocket.accept()
+    await websocket.close(code=code, reason=reason)
+
 @app.websocket("/conversation")
 async def websocket_endpoint(websocket: WebSocket):
     """Handle WebSocket connections for voice conversations."""
+    session_id = str(uuid.uuid4())
+    client_id = websocket.client.host if websocket.client else "unknown"
+
+    client_limits = retell_agent.client_limits
+
+    if drain_controller.is_draining:
+        await reject(websocket, WS_CLOSE_SERVICE_RESTART, "Server draining")
+        return
+
+    # Reject before any session state is set up when the client is not allowed,
+    # over its limit, or providers are saturated
+    decision = retell_agent.admit(client_id, websocket.headers.get("origin"))
+    if not decision.admitted:
+        await reject(websocket, decision.code, decision.reason)
+        return
+    client_limits.start_session(client_id, session_id)
+
+    # The agent profile (brand) this connection talks to, within its session quota
+    decision = retell_agent.profiles.acquire(session_id, websocket.query_params.get("profile"))
+    if not decision.admitted:
+        client_limits.end_session(session_id)
+        await reject(websocket, decision.code, decision.reason)
+        return
+
+    # Negotiate the wire codec and sample rate from the query string
+    # (defaults to audio.codec and audio.sample_rate)
+    codec = websocket.query_params.get("codec")
     try:
-        # Accept connection
+        sample_rate = int(websocket.query_params.get("sample_rate", 0)) or None
+        await retell_agent.open_audio_session(session_id, codec, sample_rate)
+    except (AudioProcessingError, ValueError) as e:
+        retell_agent.profiles.release(session_id)
+        client_limits.end_session(session_id)
+        await reject(websocket, WS_CLOSE_UNSUPPORTED_DATA, str(e))
+        return
+
+    outbound = None
+    try:
+        # Resume a session handed off by a draining worker
+        resume_id = websocket.query_params.get("session_id")
+        if resume_id and session_store is not None:
+            state = await session_store.load(resume_id)
+            if state is not None:
+                retell_agent.release_audio_session(session_id)
+                retell_agent.profiles.rename(session_id, resume_id)
+                client_limits.rename_session(session_id, resume_id)
+                await retell_agent.open_audio_session(resume_id, codec, sample_rate)
+                session_id = resume_id
+                retell_agent.import_session(session_id, state)
+                logger.info("Resuming handed-off session: {}", session_id)
+
+        # Accept connection; everything sent to the client goes through its outbound queue
         await websocket.accept()
-        session_id = str(uuid.uuid4())
-        logger.info(f"New conversation session started: {session_id}")
+        outbound = OutboundQueue(websocket, settings.outbound, outbound_stats)
+        outbound.start()
+        connections[session_id] = outbound
+        session_manager.create_session(session_id)
+        # Stream the session to Retell too, when retell.upstream is enabled
+        await retell_agent.start_conversation(session_id, outbound)
+        logger.info("New conversation session started: {}", session_id)
 
         while True:
             # Receive message
             message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            session_manager.touch(session_id)
 
-            if message.get("type") == "bytes":
+            if message.get("bytes") is not None:
                 # Handle audio data
-                audio_data = message.get("bytes")
-                transcription = await retell_agent.handle_audio(websocket, audio_data)
-
-                if transcription and transcription.get("is_final"):
-                    # Generate and send response
-                    response = await retell_agent.handle_message({
-                        "type": "transcription",
-                        "data": transcription
-                    }, session_id)
+                audio_data = message["bytes"]
+                seconds = retell_agent.audio_processor.duration(audio_data, session_id)
+                if not client_limits.allow_audio(client_id, session_id, seconds):
+                    logger.warning("Audio rate limit exceeded for session {}", session_id)
+                    await websocket.close(code=WS_CLOSE_POLICY_VIOLATION, reason="Rate limit exceeded")
+                    break
 
+                # Mark the turn in flight so a drain waits for it to finish
+                with session_manager.stage(session_id, "turn"):
+                    # A final transcription produces a response
+                    response = await retell_agent.handle_frame(outbound, audio_data, session_id)
                     if response:
-                        await websocket.send_json(response)
+                        await retell_agent.send_response(outbound, response)
 
-            elif message.get("type") == "text":
+            elif message.get("text") is not None:
                 # Handle text messages
-                data = message.get("text")
-                response = await retell_agent.handle_message({
-                    "type": "text",
-                    "data": data
-                }, session_id)
+                if not client_limits.allow_message(client_id, session_id):
+                    logger.warning("Message rate limit exceeded for session {}", session_id)
+                    await websocket.close(code=WS_CLOSE_POLICY_VIOLATION, reason="Rate limit exceeded")
+                    break
 
-                if response:
-                    await websocket.send_json(response)
+                data = message["text"]
+                with session_manager.stage(session_id, "turn"):
+                    response = await retell_agent.handle_text(data, session_id, outbound)
+
+                    if response:
+                        await retell_agent.send_response(outbound, response)
 
     except WebSocketDisconnect:
-        logger.info(f"WebSocket connection closed: {session_id}")
-        session_manager.end_session(session_id)
+        logger.info("WebSocket connection closed: {}", session_id)
     except Exception as e:
-        logger.error(f"Error in websocket endpoint: {str(e)}")
+        logger.error("Error in websocket endpoint: {}", e)
         try:
             await websocket.close()
         except:
             pass
+    finally:
+        connections.pop(session_id, None)
+        if outbound is not None:
+            await outbound.stop()
         session_manager.end_session(session_id)
+        client_limits.end_session(session_id)
+        retell_agent.profiles.release(session_id)
+        retell_agent.release_audio_session(session_id)
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Cleanup on shutdown."""
+    """Drain live conversations, then clean up."""
     try:
+        await drain_controller.start()
+        await tuner.stop()
+        await session_manager.stop()
+        if session_store is not None:
+            await session_store.cleanup()
         await retell_agent.cleanup()
+        if retell_agent.recorder is not None:
+            await asyncio.get_running_loop().run_in_executor(None, retell_agent.recorder.stop)
+        if retell_agent.archiver is not None:
+            # Writes out what is still queued without blocking the loop
+            await asyncio.get_running_loop().run_in_executor(None, retell_agent.archiver.stop)
         logger.info("Application shutdown complete")
+        # Flush records still queued for the background writer
+        await logger.complete()
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
         raise
@@ -125,18 +345,15 @@ async def shutdown_event():
 if __name__ == "__main__":
     import uvicorn
     
-    # Configure logging
-    logger.add(
-        "logs/voice_agent.log",
-        rotation="1 day",
-        retention="30 days",
-        level="INFO"
-    )
-    
+    # One process per worker; a websocket stays on the worker that accepted it,
+    # and handed-off sessions resume on any worker through the session store
+    workers = worker_count(config["app"])
+    development = settings.app.environment == "development"
     uvicorn.run(
-        app,
+        "app:app",
         host="0.0.0.0",
         port=8000,
         log_level="info",
-        reload=True
+        workers=workers,
+        reload=development and workers == 1
     )
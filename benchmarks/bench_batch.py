@@ -0,0 +1,44 @@
+"""Frames per second per core for batched cross-session audio processing.
+
+Each round sends one 20 ms frame from every session through
+AudioProcessor.process_batch in batches of the given size; batch size 1 is
+the per-frame path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_batch
+"""
+import time
+import numpy as np
+from src.audio import AudioProcessor
+
+AUDIO_CONFIG = {"sample_rate": 16000, "channels": 1, "chunk_size": 1024, "buffer_size": 4096}
+SESSIONS = 256
+ROUNDS = 20
+BATCH_SIZES = (1, 4, 16, 64, 256)
+
+def bench(batch_size: int, client_rate: int = 16000) -> float:
+    """Return frames processed per second."""
+    processor = AudioProcessor(AUDIO_CONFIG)
+    for i in range(SESSIONS):
+        processor.open_session(str(i), sample_rate=client_rate)
+    frame = np.random.uniform(-0.1, 0.1, client_rate // 50).astype(np.float32).tobytes()
+    frames = [(frame, str(i)) for i in range(SESSIONS)]
+    processor.process_batch(frames)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for offset in range(0, SESSIONS, batch_size):
+            processor.process_batch(frames[offset:offset + batch_size])
+    return SESSIONS * ROUNDS / (time.perf_counter() - start)
+
+def main():
+    print(f"{'client rate':>11} {'batch':>6} {'frames/s':>10} {'us/frame':>10} {'sessions/core':>14}")
+    for client_rate in (16000, 8000):
+        for batch_size in BATCH_SIZES:
+            rate = bench(batch_size, client_rate)
+            # Each session sends 50 frames per second
+            print(f"{client_rate:>11} {batch_size:>6} {rate:>10.0f} {1e6 / rate:>10.1f} {rate / 50:>14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Per-frame cost of the streaming noise suppressor and AGC, against their budgets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dsp
+
+Exits with status 1 if a stage costs more than its budget in src/dsp.py.
+"""
+import sys
+import time
+import numpy as np
+from src.dsp import AGC_BUDGET_US, NOISE_SUPPRESSOR_BUDGET_US, AutomaticGainControl, NoiseSuppressor
+
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+ITERATIONS = 5000
+
+def bench(processor, iterations: int = ITERATIONS) -> float:
+    """Return the mean cost in microseconds of processing one frame."""
+    frame = np.random.uniform(-0.1, 0.1, SAMPLE_RATE * FRAME_MS // 1000).astype(np.float32)
+    for _ in range(100):
+        processor.process(frame)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        processor.process(frame)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main() -> int:
+    processors = {
+        "noise suppressor": (NoiseSuppressor(SAMPLE_RATE), NOISE_SUPPRESSOR_BUDGET_US),
+        "agc": (AutomaticGainControl(SAMPLE_RATE), AGC_BUDGET_US),
+    }
+    over = []
+    print(f"{'stage':>18} {'us/frame':>10} {'budget':>8} {'x realtime':>11}")
+    for name, (processor, budget) in processors.items():
+        cost = bench(processor)
+        print(f"{name:>18} {cost:>10.1f} {budget:>8.0f} {FRAME_MS * 1000 / cost:>11.0f}")
+        if cost > budget:
+            over.append(name)
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
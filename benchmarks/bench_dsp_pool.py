@@ -0,0 +1,62 @@
+"""Throughput of session audio processing in the event loop vs. a DSPPool.
+
+Simulates many sessions each sending a 20 ms frame and reports frames per
+second and mean round trip per frame for the in-loop path, and for pools
+that pass frames through the pipe or through shared-memory slots. The
+worker count at which throughput stops improving is the value to use for
+app.max_workers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dsp_pool
+"""
+import asyncio
+import os
+import time
+import numpy as np
+from src.audio import AudioProcessor
+from src.dsp_pool import DSPPool
+
+AUDIO_CONFIG = {"sample_rate": 16000, "channels": 1, "chunk_size": 1024, "buffer_size": 4096}
+ROUNDS = 50
+
+def frame() -> bytes:
+    return np.random.uniform(-0.1, 0.1, 320).astype(np.float32).tobytes()
+
+def bench_in_loop(sessions: int) -> float:
+    processor = AudioProcessor(AUDIO_CONFIG)
+    data = frame()
+    for i in range(sessions):
+        processor.open_session(str(i))
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for i in range(sessions):
+            processor.process(data, str(i))
+    return sessions * ROUNDS / (time.perf_counter() - start)
+
+async def bench_pool(sessions: int, workers: int, shared_memory: bool) -> float:
+    pool = DSPPool(dict(AUDIO_CONFIG, dsp_shared_memory=shared_memory), workers)
+    await pool.initialize()
+    data = frame()
+    await asyncio.gather(*(pool.open_session(str(i)) for i in range(sessions)))
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(pool.process(data, str(i)) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    await pool.cleanup()
+    return sessions * ROUNDS / elapsed
+
+def main():
+    print(f"{'sessions':>8} {'mode':>14} {'frames/s':>10} {'us/frame':>10}")
+    for sessions in (1, 16, 64):
+        rows = [("in-loop", bench_in_loop(sessions))]
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            rows.append((f"{workers} proc pipe", asyncio.run(bench_pool(sessions, workers, False))))
+            rows.append((f"{workers} proc shm", asyncio.run(bench_pool(sessions, workers, True))))
+            workers *= 2
+        for mode, rate in rows:
+            print(f"{sessions:>8} {mode:>14} {rate:>10.0f} {1e6 / rate:>10.1f}")
+
+if __name__ == "__main__":
+    main()
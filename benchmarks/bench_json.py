@@ -0,0 +1,45 @@
+"""Cost of encoding and decoding websocket messages with each installed JSON encoder.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json
+"""
+import time
+from src.messages import Backchannel, Batch, Clear, Response, TranscriptionResult, decode, encode
+from src.utils.exceptions import ConfigurationError
+from src.utils.serialization import ENCODERS, configure_json
+
+ITERATIONS = 50000
+
+MESSAGES = {
+    "interim": TranscriptionResult(text="I'd like to book a flight to", is_final=False, confidence=0.82,
+                                   language="en-US"),
+    "response": Response(text="Sure, which day would you like to fly to Boston?", rung="full"),
+    "batch": Batch((Backchannel(text="Mm-hmm."), Clear(), Response(text="One moment, please.", rung="filler"))),
+}
+
+INCOMING = '{"type": "text", "data": {"text": "I\'d like to book a flight to Boston on Friday."}}'
+
+def bench(call, iterations: int = ITERATIONS) -> float:
+    """Return the mean cost of `call` in microseconds."""
+    for _ in range(1000):
+        call()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    print(f"{'encoder':>8} " + " ".join(f"{name:>10}" for name in MESSAGES) + f" {'decode':>10}  (us/msg)")
+    for name in ENCODERS:
+        try:
+            configure_json(name)
+        except ConfigurationError:
+            print(f"{name:>8}  not installed")
+            continue
+        costs = [bench(lambda message=message: encode(message)) for message in MESSAGES.values()]
+        costs.append(bench(lambda: decode(INCOMING)))
+        print(f"{name:>8} " + " ".join(f"{cost:>10.2f}" for cost in costs))
+
+if __name__ == "__main__":
+    main()
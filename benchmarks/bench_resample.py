@@ -0,0 +1,44 @@
+"""Per-frame cost of StreamingResampler for the client rates we serve.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_resample
+"""
+import time
+import numpy as np
+from src.resample import StreamingResampler
+
+FRAME_MS = 20
+ITERATIONS = 5000
+
+RATE_PAIRS = [
+    (8000, 16000),   # telephony ingress
+    (48000, 16000),  # browser ingress
+    (16000, 8000),   # telephony egress
+    (16000, 48000),  # browser egress
+    (44100, 16000),
+]
+
+def bench(in_rate: int, out_rate: int, iterations: int = ITERATIONS) -> float:
+    """Return the mean cost in microseconds of resampling one frame."""
+    resampler = StreamingResampler(in_rate, out_rate)
+    frame = np.random.uniform(-0.5, 0.5, in_rate * FRAME_MS // 1000).astype(np.float32)
+    for _ in range(100):
+        resampler.process(frame)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        resampler.process(frame)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    print(f"{'in -> out':>16} {'us/frame':>10} {'frames/s':>12} {'x realtime':>11}")
+    for in_rate, out_rate in RATE_PAIRS:
+        cost = bench(in_rate, out_rate)
+        print(
+            f"{in_rate:>6} -> {out_rate:<6} {cost:>10.1f} {1e6 / cost:>12.0f} "
+            f"{FRAME_MS * 1000 / cost:>11.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
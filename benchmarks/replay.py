@@ -0,0 +1,90 @@
+"""Replay recorded conversations offline and report pipeline latency.
+
+Recordings are captured with `recording.enabled: true`. Provider responses
+are served from the recording after their recorded latency times
+--latency-scale, so runs are repeatable and need no API keys. Run the same
+recordings against two checkouts and compare the JSON output.
+
+Run from the repository root:
+
+    python -m benchmarks.replay recordings --latency-scale 0
+    python -m benchmarks.replay --synthetic 50 --time-scale 1
+
+--synthetic writes that many generated sessions to a temporary directory
+and replays them.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import numpy as np
+from src.retell_agent import RetellAgent
+from src.speech import TranscriptionResult
+from src.utils.config import load_config
+from src.utils.recording import (
+    AUDIO,
+    LLM,
+    OPEN,
+    STT,
+    TTS,
+    SessionRecording,
+    install_replay,
+    load_recordings,
+    replay_sessions
+)
+from src.utils.session import SessionManager
+
+FRAMES_PER_TURN = 50
+TURNS = 4
+
+def synthetic_recording(index: int, sample_rate: int = 16000) -> SessionRecording:
+    """Four turns of one second of 20 ms float32 frames, the last frame of each completing a turn."""
+    rng = np.random.default_rng(index)
+    events = [(OPEN, 0.0, 0.0, {"codec": "float32", "sample_rate": sample_rate})]
+    reply = (rng.uniform(-0.1, 0.1, sample_rate // 2) * 32767).astype(np.int16).tobytes()
+    offset = 0.0
+    for turn in range(TURNS):
+        for frame in range(FRAMES_PER_TURN):
+            audio = rng.uniform(-0.1, 0.1, sample_rate // 50).astype(np.float32).tobytes()
+            events.append((AUDIO, offset, 0.0, audio))
+            final = frame == FRAMES_PER_TURN - 1
+            events.append((STT, offset, 120.0, TranscriptionResult(f"turn {turn}" if final else "", final, 0.9, "en-US")))
+            offset += 0.02
+        events.append((LLM, offset, 400.0, f"Reply {turn}"))
+        events.append((TTS, offset, 250.0, reply))
+    return SessionRecording(f"synthetic-{index:04d}", events)
+
+async def run(args) -> dict:
+    config = load_config(args.config)
+    if args.synthetic:
+        # Generated replies are raw PCM, so they go through each session's encoder
+        config["voice"]["providers"]["elevenlabs"]["output_format"] = "pcm_16000"
+        # Every synthetic frame has a recorded transcription, so none may be skipped as silence
+        config.setdefault("endpointing", {})["enabled"] = False
+        directory = tempfile.mkdtemp(prefix="replay-")
+        for index in range(args.synthetic):
+            synthetic_recording(index).save(directory)
+    else:
+        directory = args.recordings
+    recordings = load_recordings(directory)
+
+    agent = RetellAgent(config, SessionManager())
+    install_replay(agent, recordings, args.latency_scale)
+    await agent.initialize()
+    try:
+        return await replay_sessions(agent, recordings, args.time_scale)
+    finally:
+        await agent.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", nargs="?", default="recordings")
+    parser.add_argument("--config", default=None, help="config file (default: config.yaml)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for recorded provider latency")
+    parser.add_argument("--time-scale", type=float, default=0.0,
+                        help="multiplier for recorded arrival times; 0 sends frames back to back")
+    parser.add_argument("--synthetic", type=int, default=0, help="replay this many generated sessions instead")
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,106 @@
 import numpy as np
-from typing import Dict, Optional
-import sounddevice as sd
+from typing import Dict, List, Optional, Tuple, Union
 from loguru import logger
+from src.codec import Codec, create_codec
+from src.dsp import AutomaticGainControl, NoiseSuppressor, process_batched
+from src.resample import StreamingResampler
+from src.utils.exceptions import AudioProcessingError
+from src.utils.settings import AudioSettings, from_dict
+
+# Client sample rates accepted on the /conversation websocket
+MIN_CLIENT_RATE = 8000
+MAX_CLIENT_RATE = 48000
+
+class SessionAudioState:
+    """Per-session audio state: negotiated codec and rate, resamplers, DSP state and a ring buffer of recent samples."""
+
+    def __init__(self, buffer_size: int, channels: int, codec: Codec, input_resampler: StreamingResampler,
+                 suppressor: Optional[NoiseSuppressor] = None, agc: Optional[AutomaticGainControl] = None):
+        self.codec = codec
+        self.client_rate = codec.sample_rate
+        # Client rate -> processing rate
+        self.input_resampler = input_resampler
+        # Streaming noise suppression and gain control, carried across frames
+        self.suppressor = suppressor
+        self.agc = agc
+        # Synthesizer rate -> client rate, created on first response
+        self.output_resampler: Optional[StreamingResampler] = None
+        self.buffer = np.zeros((buffer_size, channels), dtype=np.float32)
+        self.buffer_index = 0
+
+    def write(self, audio_array: np.ndarray):
+        """Append processed samples, overwriting the oldest ones."""
+        frames = audio_array.reshape(-1, self.buffer.shape[1])
+        size = len(self.buffer)
+        if len(frames) >= size:
+            self.buffer[:] = frames[-size:]
+            self.buffer_index = 0
+            return
+        end = self.buffer_index + len(frames)
+        if end <= size:
+            self.buffer[self.buffer_index:end] = frames
+        else:
+            split = size - self.buffer_index
+            self.buffer[self.buffer_index:] = frames[:split]
+            self.buffer[:end - size] = frames[split:]
+        self.buffer_index = end % size
 
 class AudioProcessor:
-    def __init__(self, config: Dict):
-        self.sample_rate = config["sample_rate"]
-        self.channels = config["channels"]
-        self.chunk_size = config["chunk_size"]
-        self.buffer_size = config["buffer_size"]
+    def __init__(self, config: Union[Dict, AudioSettings]):
+        # Parsed and validated once; the per-frame path only reads attributes
+        self.settings = from_dict(AudioSettings, config, "audio")
+        self.sample_rate = self.settings.sample_rate
+        self.channels = self.settings.channels
+        self.chunk_size = self.settings.chunk_size
+        self.buffer_size = self.settings.buffer_size
+        # Wire format used when a client doesn't negotiate one
+        self.default_codec = self.settings.codec
+        self.codec = create_codec(self.default_codec, self.sample_rate, self.channels)
+        # Stateful DSP for session audio; sessionless calls use the per-frame gate and AGC
+        self.noise_suppression = self.settings.noise_suppression
+        self.auto_gain_control = self.settings.auto_gain_control
+        self.agc_target_rms = self.settings.agc_target_rms
         
-        # Initialize audio buffer
-        self.buffer = np.zeros((self.buffer_size, self.channels))
-        self.buffer_index = 0
+        # Per-session codec and audio buffers
+        self.sessions: Dict[str, SessionAudioState] = {}
         self.is_initialized = False
         
     async def initialize(self):
         """Initialize audio processor."""
         try:
-            # Initialize sounddevice with configured settings
-            sd.default.samplerate = self.sample_rate
-            sd.default.channels = self.channels
+            # Audio arrives over the network, so no local audio device is opened
             self.is_initialized = True
             logger.info("Audio processor initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize audio processor: {str(e)}")
             raise
             
-    def process(self, audio_data: bytes) -> np.ndarray:
+    def process(self, audio_data: bytes, session_id: Optional[str] = None) -> np.ndarray:
         """Process incoming audio data."""
         try:
-            # Convert bytes to numpy array
-            audio_array = np.frombuffer(audio_data, dtype=np.float32)
+            # A session's first frame opens its state, so every frame of it gets the streaming DSP
+            state = self._session_state(session_id) if session_id is not None else None
+            # Decode wire format to float32 samples
+            codec = state.codec if state else self.codec
+            audio_array = codec.decode(audio_data)
             
             # Reshape if stereo
             if self.channels == 2:
                 audio_array = audio_array.reshape(-1, 2)
-            
-            # Apply noise reduction
-            processed_audio = self._reduce_noise(audio_array)
-            
-            # Apply automatic gain control
-            processed_audio = self._apply_agc(processed_audio)
+
+            if state:
+                # Convert the client's rate to the processing rate
+                audio_array = state.input_resampler.process(audio_array)
+                processed_audio = self._process_stream(state, audio_array)
+            else:
+                # Apply noise reduction
+                processed_audio = self._reduce_noise(audio_array)
+
+                # Apply automatic gain control
+                processed_audio = self._apply_agc(processed_audio)
+
+            if state:
+                state.write(processed_audio)
             
             return processed_audio
             
@@ -49,6 +108,67 @@ class AudioProcessor:
             logger.error(f"Error processing audio: {str(e)}")
             raise
             
+    def process_batch(self, frames: List[Tuple[bytes, str]]) -> List[np.ndarray]:
+        """Process (audio_data, session_id) frames from many sessions at once.
+
+        Each DSP stage runs once per group of sessions with compatible state and
+        frame size instead of once per frame. For sessions opened with
+        `open_session`, results match calling `process` on each frame in order.
+        A frame that cannot be decoded gets an AudioProcessingError in place of
+        its result.
+        """
+        try:
+            # A session's frames must run in order, so each round holds at most one frame per session
+            rounds: List[List[int]] = []
+            depth: Dict[str, int] = {}
+            for i, (_, session_id) in enumerate(frames):
+                position = depth.get(session_id, 0)
+                depth[session_id] = position + 1
+                if position == len(rounds):
+                    rounds.append([])
+                rounds[position].append(i)
+
+            results: List = [None] * len(frames)
+            for round_indices in rounds:
+                indices, states, audio = [], [], []
+                for i in round_indices:
+                    audio_data, session_id = frames[i]
+                    state = self._session_state(session_id)
+                    try:
+                        decoded = state.codec.decode(audio_data).reshape(-1, self.channels)
+                    except Exception as e:
+                        # A malformed frame fails on its own instead of failing the batch
+                        results[i] = AudioProcessingError(f"Error decoding audio: {str(e)}")
+                        continue
+                    indices.append(i)
+                    states.append(state)
+                    audio.append(decoded)
+
+                audio = process_batched([state.input_resampler for state in states], audio)
+                for stage in ("suppressor", "agc"):
+                    members = [j for j, state in enumerate(states) if getattr(state, stage) is not None]
+                    processed = process_batched([getattr(states[j], stage) for j in members],
+                                                [audio[j] for j in members])
+                    for j, output in zip(members, processed):
+                        audio[j] = output
+
+                for i, state, output in zip(indices, states, audio):
+                    state.write(output)
+                    results[i] = output if self.channels == 2 else output.reshape(-1)
+            return results
+
+        except Exception as e:
+            logger.error(f"Error processing audio batch: {str(e)}")
+            raise
+
+    def _process_stream(self, state: SessionAudioState, audio_array: np.ndarray) -> np.ndarray:
+        """Run the session's streaming noise suppressor and AGC."""
+        if state.suppressor is not None:
+            audio_array = state.suppressor.process(audio_array)
+        if state.agc is not None:
+            audio_array = state.agc.process(audio_array)
+        return audio_array
+
     def _reduce_noise(self, audio_array: np.ndarray) -> np.ndarray:
         """Apply basic noise reduction."""
         # Simple noise gate
@@ -68,6 +188,57 @@ class AudioProcessor:
             audio_array *= gain
         return audio_array
         
+    def duration(self, audio_data: bytes, session_id: Optional[str] = None) -> float:
+        """Return the duration in seconds of an incoming audio frame."""
+        codec = self.sessions[session_id].codec if session_id in self.sessions else self.codec
+        return codec.duration(audio_data)
+
+    def encode_output(self, audio_data: bytes, output_format: str,
+                      session_id: Optional[str] = None) -> List[bytes]:
+        """Transcode synthesized speech to the session's codec.
+
+        Only raw PCM output (`pcm_<rate>`) can be transcoded; other formats
+        such as MP3 are passed through unchanged.
+        """
+        if not output_format.startswith("pcm_"):
+            return [audio_data]
+        samples = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768
+        state = self.sessions.get(session_id) if session_id is not None else None
+        if state is None:
+            return self.codec.encode(samples)
+
+        output_rate = int(output_format.split("_")[1])
+        resampler = state.output_resampler
+        if resampler is None or resampler.in_rate != output_rate:
+            resampler = StreamingResampler(output_rate, state.client_rate)
+            state.output_resampler = resampler
+        return state.codec.encode(resampler.process(samples))
+
+    def session_codec(self, session_id: Optional[str] = None) -> Tuple[str, int]:
+        """Codec name and client sample rate of a session, or the defaults."""
+        state = self.sessions.get(session_id) if session_id is not None else None
+        if state is None:
+            return self.codec.name, self.codec.sample_rate
+        return state.codec.name, state.client_rate
+
+    def encode_clip(self, audio_data: bytes, output_format: str, codec: str, sample_rate: int,
+                    frame_ms: int = 20) -> List[bytes]:
+        """Encode a whole synthesized clip with fresh codec state.
+
+        PCM output is split into `frame_ms` frames so playback can stop
+        between any two of them.
+        """
+        if not output_format.startswith("pcm_"):
+            return [audio_data]
+        samples = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768
+        samples = StreamingResampler(int(output_format.split("_")[1]), sample_rate).process(samples)
+        encoder = create_codec(codec, sample_rate, self.channels)
+        step = sample_rate * frame_ms // 1000 * self.channels
+        frames = []
+        for start in range(0, len(samples), step):
+            frames.extend(encoder.encode(samples[start:start + step]))
+        return frames + encoder.flush()
+
     def get_stream_parameters(self) -> Dict:
         """Return audio stream parameters."""
         return {
@@ -76,7 +247,37 @@ class AudioProcessor:
             "chunk_size": self.chunk_size
         }
         
+    def open_session(self, session_id: str, codec: Optional[str] = None,
+                     sample_rate: Optional[int] = None) -> SessionAudioState:
+        """Create per-session state using the codec and sample rate negotiated by the client."""
+        client_rate = sample_rate or self.sample_rate
+        if not MIN_CLIENT_RATE <= client_rate <= MAX_CLIENT_RATE:
+            raise AudioProcessingError(f"Unsupported sample rate: {client_rate}")
+        state = SessionAudioState(
+            self.buffer_size,
+            self.channels,
+            create_codec(codec or self.default_codec, client_rate, self.channels),
+            StreamingResampler(client_rate, self.sample_rate),
+            NoiseSuppressor(self.sample_rate, self.channels) if self.noise_suppression else None,
+            AutomaticGainControl(self.sample_rate, self.agc_target_rms) if self.auto_gain_control else None
+        )
+        self.sessions[session_id] = state
+        return state
+
+    def _session_state(self, session_id: str) -> SessionAudioState:
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = self.open_session(session_id)
+        return state
+
+    def release_session(self, session_id: str):
+        """Release the audio buffers held for a session."""
+        self.sessions.pop(session_id, None)
+
     def reset(self):
         """Reset audio processor state."""
-        self.buffer = np.zeros((self.buffer_size, self.channels))
-        self.buffer_index = 0
+        self.sessions.clear()
+
+    async def cleanup(self):
+        """Release all session state."""
+        self.reset()
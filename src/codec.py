@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Dict, List, Type
+from src.utils.exceptions import AudioProcessingError
+
+def _g711_tables():
+    """Build G.711 lookup tables over every int16 value (encode) and byte (decode)."""
+    pcm = np.arange(-32768, 32768, dtype=np.int32)
+
+    # mu-law (ITU-T G.711, 14-bit magnitude)
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    value = np.minimum(np.abs(pcm >> 2), 8159) + (0x84 >> 2)
+    seg = np.searchsorted([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], value)
+    ulaw = np.where(seg >= 8, 0x7F, (seg << 4) | ((value >> (seg + 1)) & 0x0F)) ^ mask
+
+    # A-law (ITU-T G.711, 13-bit magnitude)
+    value = pcm >> 3
+    mask = np.where(value >= 0, 0xD5, 0x55)
+    value = np.where(value >= 0, value, -value - 1)
+    seg = np.searchsorted([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], value)
+    shift = np.where(seg < 2, 1, seg)
+    alaw = np.where(seg >= 8, 0x7F, (seg << 4) | ((value >> shift) & 0x0F)) ^ mask
+
+    # Tables are indexed by the int16 sample reinterpreted as uint16
+    order = pcm.astype(np.uint16).argsort()
+    ulaw_encode = ulaw.astype(np.uint8)[order]
+    alaw_encode = alaw.astype(np.uint8)[order]
+
+    codes = np.arange(256, dtype=np.int32)
+    inverted = ~codes & 0xFF
+    magnitude = (((inverted & 0x0F) << 3) + 0x84) << ((inverted & 0x70) >> 4)
+    ulaw_decode = np.where(inverted & 0x80, 0x84 - magnitude, magnitude - 0x84)
+
+    toggled = codes ^ 0x55
+    seg = (toggled & 0x70) >> 4
+    magnitude = ((toggled & 0x0F) << 4) + np.where(seg == 0, 8, 0x108)
+    magnitude = np.where(seg > 1, magnitude << np.maximum(seg - 1, 0), magnitude)
+    alaw_decode = np.where(toggled & 0x80, magnitude, -magnitude)
+
+    scale = np.float32(1 / 32768)
+    return (
+        ulaw_encode,
+        alaw_encode,
+        ulaw_decode.astype(np.float32) * scale,
+        alaw_decode.astype(np.float32) * scale,
+    )
+
+ULAW_ENCODE, ALAW_ENCODE, ULAW_DECODE, ALAW_DECODE = _g711_tables()
+
+def float_to_int16(audio: np.ndarray) -> np.ndarray:
+    """Convert float samples in [-1, 1] to int16 with clipping."""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+class Codec:
+    """Converts between wire bytes and float32 samples for one session."""
+
+    name = ""
+    bytes_per_sample = 0
+
+    def __init__(self, sample_rate: int, channels: int = 1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def decode(self, data: bytes) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        """Encode float32 samples into one or more wire frames."""
+        raise NotImplementedError
+
+    def flush(self) -> List[bytes]:
+        """Encode samples held back for a partial frame, padded with silence."""
+        return []
+
+    def duration(self, data: bytes) -> float:
+        """Duration in seconds of an encoded frame."""
+        return len(data) / (self.bytes_per_sample * self.channels * self.sample_rate)
+
+class Float32Codec(Codec):
+    name = "float32"
+    bytes_per_sample = 4
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype=np.float32)
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        return [np.asarray(audio, dtype=np.float32).tobytes()]
+
+class PCM16Codec(Codec):
+    name = "pcm16"
+    bytes_per_sample = 2
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        return [float_to_int16(audio).tobytes()]
+
+class MuLawCodec(Codec):
+    name = "mulaw"
+    bytes_per_sample = 1
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return ULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        return [ULAW_ENCODE[float_to_int16(audio).view(np.uint16)].tobytes()]
+
+class ALawCodec(Codec):
+    name = "alaw"
+    bytes_per_sample = 1
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return ALAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        return [ALAW_ENCODE[float_to_int16(audio).view(np.uint16)].tobytes()]
+
+# Frame durations in ms for each Opus TOC configuration (RFC 6716, section 3.1)
+OPUS_FRAME_MS = [10, 20, 40, 60] * 3 + [10, 20] * 2 + [2.5, 5, 10, 20] * 4
+
+class OpusCodec(Codec):
+    """Opus via libopus (`opuslib`). Each websocket frame carries one Opus packet."""
+
+    name = "opus"
+    frame_ms = 20
+    max_frame_ms = 120
+
+    def __init__(self, sample_rate: int, channels: int = 1):
+        super().__init__(sample_rate, channels)
+        try:
+            import opuslib
+        except Exception:
+            raise AudioProcessingError("Opus support requires the 'opuslib' package and libopus")
+        if sample_rate not in (8000, 12000, 16000, 24000, 48000):
+            raise AudioProcessingError(f"Opus does not support {sample_rate} Hz")
+        self.decoder = opuslib.Decoder(sample_rate, channels)
+        self.encoder = opuslib.Encoder(sample_rate, channels, opuslib.APPLICATION_VOIP)
+        self.frame_size = sample_rate * self.frame_ms // 1000
+        # Samples carried over until a full encoder frame is available
+        self.pending = np.zeros(0, dtype=np.int16)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        max_samples = self.sample_rate * self.max_frame_ms // 1000
+        pcm = self.decoder.decode(data, max_samples)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        samples = np.concatenate([self.pending, float_to_int16(audio).reshape(-1)])
+        step = self.frame_size * self.channels
+        full = len(samples) - len(samples) % step
+        packets = [
+            self.encoder.encode(samples[start:start + step].tobytes(), self.frame_size)
+            for start in range(0, full, step)
+        ]
+        self.pending = samples[full:]
+        return packets
+
+    def flush(self) -> List[bytes]:
+        if not len(self.pending):
+            return []
+        padding = np.zeros(self.frame_size * self.channels - len(self.pending), dtype=np.float32)
+        return self.encode(padding)
+
+    def duration(self, data: bytes) -> float:
+        if not data:
+            return 0.0
+        toc = data[0]
+        count = toc & 0x03
+        if count == 0:
+            frames = 1
+        elif count in (1, 2):
+            frames = 2
+        else:
+            frames = data[1] & 0x3F if len(data) > 1 else 0
+        return frames * OPUS_FRAME_MS[toc >> 3] / 1000
+
+CODECS: Dict[str, Type[Codec]] = {
+    "float32": Float32Codec,
+    "pcm16": PCM16Codec,
+    "linear16": PCM16Codec,
+    "mulaw": MuLawCodec,
+    "ulaw": MuLawCodec,
+    "pcmu": MuLawCodec,
+    "alaw": ALawCodec,
+    "pcma": ALawCodec,
+    "opus": OpusCodec,
+}
+
+def create_codec(name: str, sample_rate: int, channels: int = 1) -> Codec:
+    """Create a codec instance by name (case-insensitive)."""
+    codec_class = CODECS.get(name.lower())
+    if codec_class is None:
+        raise AudioProcessingError(f"Unsupported codec: {name}")
+    return codec_class(sample_rate, channels)
@@ -0,0 +1,248 @@
+from collections import defaultdict
+from typing import List
+import numpy as np
+
+# CPU budget in microseconds for one 10 ms frame of 16 kHz mono audio, per session.
+# Together they keep noise suppression and AGC under 3% of a core for each live call;
+# `python -m benchmarks.bench_dsp` measures both stages and fails if either is over
+NOISE_SUPPRESSOR_BUDGET_US = 200.0
+AGC_BUDGET_US = 100.0
+
+def _stack(processors: List, name: str) -> np.ndarray:
+    if len(processors) == 1:
+        return getattr(processors[0], name)[None]
+    return np.stack([getattr(processor, name) for processor in processors])
+
+def _scatter(processors: List, name: str, values):
+    for processor, value in zip(processors, values):
+        setattr(processor, name, value)
+
+def process_batched(processors: List, frames: List[np.ndarray]) -> List[np.ndarray]:
+    """Run one frame through each stateful processor, batching compatible ones.
+
+    Processors whose `batch_key()` matches and whose frames have the same shape
+    are stacked and handled by a single `process_batch` call, so NumPy overhead
+    is paid once per group instead of once per session. Frames are
+    (samples, channels) arrays; results keep their shapes.
+    """
+    groups = defaultdict(list)
+    for i, (processor, frame) in enumerate(zip(processors, frames)):
+        groups[(type(processor), processor.batch_key(), frame.shape)].append(i)
+
+    results = list(frames)
+    for indices in groups.values():
+        members = [processors[i] for i in indices]
+        output = type(members[0]).process_batch(members, np.stack([frames[i] for i in indices]))
+        for row, i in enumerate(indices):
+            results[i] = output[row]
+    return results
+
+class NoiseSuppressor:
+    """Streaming spectral-subtraction noise suppressor.
+
+    Audio is analysed in STFT frames of two hops with a sqrt-Hann window and
+    resynthesised by overlap-add, which reconstructs the input exactly when the
+    gain is 1. A per-bin noise estimate averages the smoothed power spectrum
+    while a bin looks like noise and only creeps upwards while it looks like
+    speech, so it tracks stationary noise without absorbing speech. Output has
+    a fixed delay of `latency` samples and every call returns as many samples
+    as it was given. A 10 ms frame must cost under `NOISE_SUPPRESSOR_BUDGET_US`.
+    """
+
+    def __init__(self, sample_rate: int, channels: int = 1, hop_ms: float = 8.0,
+                 oversubtraction: float = 2.0, spectral_floor: float = 0.1,
+                 noise_rise: float = 1.005, smoothing: float = 0.6,
+                 noise_adapt: float = 0.1, speech_ratio: float = 3.0):
+        self.hop = max(int(sample_rate * hop_ms / 1000), 16)
+        self.n_fft = 2 * self.hop
+        self.channels = channels
+        self.oversubtraction = oversubtraction
+        self.floor_power = spectral_floor ** 2
+        self.noise_rise = noise_rise
+        self.smoothing = smoothing
+        self.noise_adapt = noise_adapt
+        self.speech_ratio = speech_ratio
+        self.settings = (self.hop, channels, oversubtraction, spectral_floor, noise_rise,
+                         smoothing, noise_adapt, speech_ratio)
+        # Periodic sqrt-Hann analysis and synthesis windows sum to one at 50% overlap
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.n_fft) / self.n_fft))
+        self.window = self.window.astype(np.float32)[:, None]
+        self.latency = 2 * self.hop
+        # Sample index of every STFT frame, by number of hops processed in a call
+        self.frame_index = {}
+        self.reset()
+
+    def reset(self):
+        """Clear streaming state and the noise estimate."""
+        bins = self.n_fft // 2 + 1
+        self.pending = np.zeros((0, self.channels), dtype=np.float32)
+        self.previous_hop = np.zeros((self.hop, self.channels), dtype=np.float32)
+        self.overlap = np.zeros((self.hop, self.channels), dtype=np.float32)
+        # Primed with one hop so every call can return as many samples as it received
+        self.output = np.zeros((self.hop, self.channels), dtype=np.float32)
+        self.smoothed_power = np.zeros((bins, self.channels), dtype=np.float32)
+        self.noise_power = None
+        self.previous_gain = np.ones((bins, self.channels), dtype=np.float32)
+
+    def batch_key(self) -> tuple:
+        """Suppressors with equal keys can share a `process_batch` call."""
+        # Buffered output plus pending input is always one hop, so pending length fixes both
+        return self.settings + (len(self.pending), self.noise_power is None)
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Suppress noise in one frame of shape (samples,) or (samples, channels)."""
+        samples = audio.reshape(len(audio), self.channels).astype(np.float32, copy=False)
+        return self.process_batch([self], samples[None])[0].reshape(audio.shape)
+
+    @staticmethod
+    def process_batch(suppressors: List["NoiseSuppressor"], frames: np.ndarray) -> np.ndarray:
+        """Process one frame per suppressor, stacked as (sessions, samples, channels)."""
+        first = suppressors[0]
+        hop, n_fft = first.hop, first.n_fft
+        sessions, length = frames.shape[:2]
+        pending = np.concatenate([_stack(suppressors, "pending"), frames.astype(np.float32, copy=False)], axis=1)
+        output = _stack(suppressors, "output")
+        hops = pending.shape[1] // hop
+
+        if hops:
+            # Frame k spans [hop k-1, hop k]; all frames of all sessions are transformed in one call
+            stream = np.concatenate([_stack(suppressors, "previous_hop"), pending[:, :hops * hop]], axis=1)
+            index = first.frame_index.get(hops)
+            if index is None:
+                index = np.arange(hops)[:, None] * hop + np.arange(n_fft)[None, :]
+                first.frame_index[hops] = index
+            spectra = np.fft.rfft(stream[:, index] * first.window, axis=2)
+            power = (spectra.real ** 2 + spectra.imag ** 2).astype(np.float32)
+
+            smoothed = _stack(suppressors, "smoothed_power")
+            noise = None if first.noise_power is None else _stack(suppressors, "noise_power")
+            previous = _stack(suppressors, "previous_gain")
+            gains = np.empty_like(power)
+            for k in range(hops):
+                previous, smoothed, noise = first._gain(power[:, k], smoothed, noise, previous)
+                gains[:, k] = previous
+
+            frames_out = np.fft.irfft(spectra * gains, n=n_fft, axis=2).astype(np.float32)
+            frames_out *= first.window
+
+            # Overlap-add: each hop of output is the tail of frame k-1 plus the head of frame k
+            heads = frames_out[:, :, :hop]
+            tails = np.concatenate([_stack(suppressors, "overlap")[:, None], frames_out[:, :-1, hop:]], axis=1)
+            finished = (heads + tails).reshape(sessions, hops * hop, -1)
+            output = np.concatenate([output, finished], axis=1)
+
+            _scatter(suppressors, "overlap", frames_out[:, -1, hop:])
+            _scatter(suppressors, "previous_hop", stream[:, -hop:])
+            _scatter(suppressors, "smoothed_power", smoothed)
+            _scatter(suppressors, "noise_power", noise)
+            _scatter(suppressors, "previous_gain", previous)
+
+        _scatter(suppressors, "pending", pending[:, hops * hop:])
+        _scatter(suppressors, "output", output[:, length:])
+        return output[:, :length]
+
+    def _gain(self, power: np.ndarray, smoothed: np.ndarray, noise, previous: np.ndarray):
+        """Return (gain, smoothed power, noise estimate) for one STFT frame."""
+        smoothed = smoothed + (1 - self.smoothing) * (power - smoothed)
+        if noise is None:
+            noise = smoothed.copy()
+        else:
+            # Average bins that look like noise; let speech bins rise slowly towards a new floor
+            speech = smoothed > self.speech_ratio * noise
+            noise = np.where(speech, noise * self.noise_rise, noise + self.noise_adapt * (smoothed - noise))
+
+        ratio = self.oversubtraction * noise / np.maximum(power, 1e-12)
+        gain = np.sqrt(np.maximum(1.0 - ratio, self.floor_power))
+        # Temporal smoothing of the gain limits musical noise
+        gain = 0.5 * (gain + previous)
+        return gain, smoothed, noise
+
+class AutomaticGainControl:
+    """Streaming AGC with separate attack and release time constants.
+
+    The level envelope is measured over short blocks. Gain moves towards
+    `target_rms / envelope` and is interpolated sample by sample between blocks,
+    so there is no gain pumping between frames. Blocks below `silence_rms` hold
+    the envelope and gain, which keeps noise from being amplified in pauses.
+    A 10 ms frame must cost under `AGC_BUDGET_US`.
+    """
+
+    def __init__(self, sample_rate: int, target_rms: float = 0.1, max_gain: float = 10.0,
+                 min_gain: float = 0.1, attack_ms: float = 10.0, release_ms: float = 300.0,
+                 silence_rms: float = 0.003, block_ms: float = 10.0):
+        self.block = max(int(sample_rate * block_ms / 1000), 1)
+        self.target_rms = target_rms
+        self.max_gain = max_gain
+        self.min_gain = min_gain
+        self.silence_rms = silence_rms
+        self.attack = 1.0 - np.exp(-block_ms / attack_ms)
+        self.release = 1.0 - np.exp(-block_ms / release_ms)
+        self.settings = (self.block, target_rms, max_gain, min_gain, self.attack, self.release, silence_rms)
+        # Block boundaries and interpolation positions, by frame length
+        self.layouts = {}
+        self.reset()
+
+    def reset(self):
+        """Reset envelope and gain."""
+        self.envelope = 0.0
+        self.gain = 1.0
+
+    def batch_key(self) -> tuple:
+        """Controls with equal keys can share a `process_batch` call."""
+        return self.settings
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Apply gain to one frame of shape (samples,) or (samples, channels)."""
+        if len(audio) == 0:
+            return audio
+        samples = audio.reshape(len(audio), -1)
+        return self.process_batch([self], samples[None])[0].reshape(audio.shape)
+
+    @staticmethod
+    def process_batch(controls: List["AutomaticGainControl"], frames: np.ndarray) -> np.ndarray:
+        """Apply gain to one frame per control, stacked as (sessions, samples, channels)."""
+        first = controls[0]
+        length = frames.shape[1]
+        if length == 0:
+            return frames
+        layout = first.layouts.get(length)
+        if layout is None:
+            layout = first._layout(length)
+            first.layouts[length] = layout
+        starts, lengths, block, fraction = layout
+
+        # Per-block RMS in one vectorized pass; only the envelope recursion is sequential
+        frames = frames.astype(np.float32, copy=False)
+        squares = np.add.reduceat((frames * frames).sum(axis=2), starts, axis=1)
+        levels = np.sqrt(squares / (lengths * frames.shape[2]))
+
+        envelope = np.array([control.envelope for control in controls])
+        gain = np.array([control.gain for control in controls])
+        gains = np.empty((len(controls), len(starts) + 1), dtype=np.float32)
+        gains[:, 0] = gain
+        for i in range(len(starts)):
+            level = levels[:, i]
+            # Pauses leave both envelope and gain where they were
+            active = level > first.silence_rms
+            coefficient = np.where(level > envelope, first.attack, first.release)
+            envelope = np.where(active, envelope + coefficient * (level - envelope), envelope)
+            desired = np.minimum(np.maximum(first.target_rms / np.maximum(envelope, 1e-12), first.min_gain),
+                                 first.max_gain)
+            gain = np.where(active, gain + coefficient * (desired - gain), gain)
+            gains[:, i + 1] = gain
+
+        _scatter(controls, "envelope", envelope.tolist())
+        _scatter(controls, "gain", gain.tolist())
+
+        # Ramp linearly from each block's starting gain to its ending gain
+        curve = gains[:, block] + (gains[:, block + 1] - gains[:, block]) * fraction
+        output = frames * curve[:, :, None]
+        return np.minimum(np.maximum(output, -1.0, out=output), 1.0, out=output)
+
+    def _layout(self, length: int) -> tuple:
+        starts = np.arange(0, length, self.block)
+        lengths = np.diff(np.append(starts, length))
+        position = np.arange(length)
+        block = position // self.block
+        fraction = ((position - starts[block]) / lengths[block]).astype(np.float32)
+        return starts, lengths, block, fraction
@@ -0,0 +1,293 @@
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import threading
+import zlib
+from multiprocessing.reduction import ForkingPickler
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from loguru import logger
+from src.audio import AudioProcessor
+from src.utils.exceptions import AudioProcessingError
+from src.utils.frame_ring import FrameRing
+from src.utils.settings import AudioSettings, from_dict
+
+# Most frame requests a worker takes off its pipe for one batch
+MAX_WORKER_BATCH = 256
+
+# Tells a worker's sender thread to exit
+_STOP_SENDER = object()
+
+def _process_frames(processor: AudioProcessor, ring: FrameRing, requests: List[tuple], connection):
+    """Process queued shared-memory frames as one batch and reply to each."""
+    frames = [(ring.read(slot, length), session_id) for _, session_id, slot, length in requests]
+    try:
+        outputs = processor.process_batch(frames)
+    except Exception as e:
+        outputs = [AudioProcessingError(str(e))] * len(requests)
+    for (request_id, _, slot, _), output in zip(requests, outputs):
+        if isinstance(output, Exception):
+            connection.send((request_id, None, output))
+        else:
+            # Input and output share the slot; only the output length is sent back
+            result = ring.write(slot, output) if output.nbytes <= ring.slot_bytes else output
+            connection.send((request_id, result, None))
+
+def _handle(processor: AudioProcessor, message: tuple, connection):
+    command, request_id, session_id, *args = message
+    try:
+        if command == "process":
+            result = processor.process(args[0], session_id)
+        elif command == "open":
+            processor.open_session(session_id, *args)
+            result = None
+        elif command == "encode":
+            result = processor.encode_output(args[0], args[1], session_id)
+        elif command == "release":
+            processor.release_session(session_id)
+            return
+        elif command == "ping":
+            result = True
+        else:
+            raise ValueError(f"Unknown command: {command}")
+        connection.send((request_id, result, None))
+    except Exception as e:
+        connection.send((request_id, None, AudioProcessingError(str(e))))
+
+def _worker_main(settings: AudioSettings, ring_name: Optional[str], slots: int, slot_bytes: int, connection):
+    """Serve requests from the pool until told to stop."""
+    processor = AudioProcessor(settings)
+    ring = FrameRing(slots, slot_bytes, ring_name) if ring_name else None
+    try:
+        while True:
+            # Everything already queued is handled together, so frames that
+            # arrived while the previous batch ran are batched across sessions
+            messages = [connection.recv()]
+            while len(messages) < MAX_WORKER_BATCH and connection.poll():
+                messages.append(connection.recv())
+
+            frames = []
+            for message in messages:
+                if message is not None and message[0] == "frame":
+                    frames.append(message[1:])
+                    continue
+                # Other requests keep their order relative to frames
+                if frames:
+                    _process_frames(processor, ring, frames, connection)
+                    frames = []
+                if message is None:
+                    return
+                _handle(processor, message, connection)
+            if frames:
+                _process_frames(processor, ring, frames, connection)
+    finally:
+        if ring is not None:
+            ring.close()
+
+class DSPWorker:
+    """Parent-side handle for one worker process.
+
+    Requests are pickled on the event loop, so errors surface to the caller,
+    and written to the pipe by a sender thread. A full pipe then never stalls
+    the loop, which keeps reading replies while the worker catches up.
+    """
+
+    def __init__(self, process, connection, ring: Optional[FrameRing]):
+        self.process = process
+        self.connection = connection
+        self.ring = ring
+        self.outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self.sender = threading.Thread(target=self._send_loop, name=f"dsp-sender-{process.pid}", daemon=True)
+        self.sender.start()
+
+    def send(self, message):
+        """Queue a message for the worker without blocking."""
+        self.outbox.put(ForkingPickler.dumps(message))
+
+    def _send_loop(self):
+        while True:
+            data = self.outbox.get()
+            if data is _STOP_SENDER:
+                return
+            try:
+                self.connection.send_bytes(data)
+            except OSError:
+                # The worker exited; the pool notices when its pipe closes
+                return
+
+    def close(self):
+        """Stop the sender thread, then close the pipe and shared memory. Blocks."""
+        self.outbox.put(_STOP_SENDER)
+        self.sender.join()
+        self.connection.close()
+        if self.ring is not None:
+            self.ring.close()
+
+class DSPPool:
+    """Runs per-session audio processing in worker processes.
+
+    Each worker owns an AudioProcessor. A session is pinned to one worker by a
+    stable hash of its ID, so its codec, resampler and DSP state live in exactly
+    one process and its frames are processed in order. Each worker batches the
+    frames queued for it across sessions. Frames travel through a
+    shared-memory FrameRing per worker and only slot indices cross the pipe;
+    oversized frames, or frames arriving while every slot is in flight, are sent
+    through the pipe instead. A worker that exits is replaced at the same
+    index, and the sessions it owned are opened again on the new one.
+    """
+
+    def __init__(self, config: Union[Dict, AudioSettings], workers: int):
+        self.settings = from_dict(AudioSettings, config, "audio")
+        self.worker_count = workers
+        self.shared_memory = self.settings.dsp_shared_memory
+        self.slots = self.settings.dsp_slots
+        self.slot_bytes = self.settings.dsp_slot_bytes
+        self.workers: List[DSPWorker] = []
+        # Session ID -> (codec, sample_rate), to reopen sessions on a replaced worker
+        self.sessions: Dict[str, Tuple[Optional[str], Optional[int]]] = {}
+        self._context = None
+        # Request ID -> (future, worker, slot) awaiting a reply
+        self.pending: Dict[int, tuple] = {}
+        self.request_ids = itertools.count()
+        self.is_initialized = False
+
+    async def initialize(self):
+        """Start the worker processes and wait until each one is ready."""
+        try:
+            # Spawn so workers don't inherit the event loop or open sockets
+            self._context = multiprocessing.get_context("spawn")
+            for _ in range(self.worker_count):
+                self.workers.append(self._start_worker())
+
+            await asyncio.gather(*(self._request(worker, "ping", None) for worker in self.workers))
+            self.is_initialized = True
+            logger.info(f"DSP pool started with {self.worker_count} workers")
+        except Exception as e:
+            logger.error(f"Failed to start DSP pool: {str(e)}")
+            raise
+
+    def _start_worker(self) -> DSPWorker:
+        ring = FrameRing(self.slots, self.slot_bytes) if self.shared_memory else None
+        connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.settings, ring.name if ring else None, self.slots, self.slot_bytes, child_connection),
+            daemon=True
+        )
+        process.start()
+        child_connection.close()
+        worker = DSPWorker(process, connection, ring)
+        asyncio.get_running_loop().add_reader(connection.fileno(), self._receive, worker)
+        return worker
+
+    def _replace_worker(self, worker: DSPWorker):
+        """Start a new worker in a dead one's place and reopen the sessions it owned."""
+        index = self.workers.index(worker)
+        replacement = self._start_worker()
+        self.workers[index] = replacement
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, worker.close)
+        # Sent before any later frame for these sessions, so they arrive to open sessions
+        reopened = [
+            self._request(replacement, "open", session_id, codec, sample_rate)
+            for session_id, (codec, sample_rate) in self.sessions.items()
+            if self.worker_for(session_id) == index
+        ]
+        logger.warning("Replaced DSP worker {} with {}, reopening {} sessions",
+                       worker.process.pid, replacement.process.pid, len(reopened))
+        if reopened:
+            loop.create_task(self._await_reopened(reopened))
+
+    async def _await_reopened(self, futures: List[asyncio.Future]):
+        for result in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error("Reopening a session on a replaced DSP worker failed: {}", result)
+
+    def worker_for(self, session_id: str) -> int:
+        """Index of the worker that owns a session."""
+        return zlib.crc32(session_id.encode()) % self.worker_count
+
+    def _request(self, worker: DSPWorker, command: str, session_id: Optional[str], *args,
+                 slot: Optional[int] = None) -> asyncio.Future:
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = (future, worker, slot)
+        worker.send((command, request_id, session_id, *args))
+        return future
+
+    def _receive(self, worker: DSPWorker):
+        """Resolve replies from a worker; called by the event loop when its pipe is readable."""
+        try:
+            while worker.connection.poll():
+                request_id, result, error = worker.connection.recv()
+                future, _, slot = self.pending.pop(request_id)
+                if slot is not None:
+                    # The slot is only reused once the worker is done with it, even if the caller gave up
+                    if isinstance(result, int):
+                        result = worker.ring.array(slot, result)
+                    worker.ring.release(slot)
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        except (EOFError, OSError):
+            logger.error(f"DSP worker {worker.process.pid} exited")
+            self._fail_worker(worker)
+            if self.is_initialized and worker in self.workers:
+                self._replace_worker(worker)
+
+    def _fail_worker(self, worker: DSPWorker):
+        asyncio.get_running_loop().remove_reader(worker.connection.fileno())
+        for request_id, (future, owner, _) in list(self.pending.items()):
+            if owner is worker:
+                del self.pending[request_id]
+                if not future.done():
+                    future.set_exception(AudioProcessingError("DSP worker exited"))
+
+    async def open_session(self, session_id: str, codec: Optional[str] = None,
+                           sample_rate: Optional[int] = None):
+        """Create session audio state on the session's worker."""
+        self.sessions[session_id] = (codec, sample_rate)
+        await self._request(self.workers[self.worker_for(session_id)], "open", session_id, codec, sample_rate)
+
+    async def process(self, audio_data: bytes, session_id: str) -> np.ndarray:
+        """Decode, resample and clean up one frame on the session's worker."""
+        worker = self.workers[self.worker_for(session_id)]
+        ring = worker.ring
+        slot = ring.acquire() if ring is not None and len(audio_data) <= ring.slot_bytes else None
+        if slot is None:
+            return await self._request(worker, "process", session_id, audio_data)
+
+        length = ring.write(slot, audio_data)
+        output = await self._request(worker, "frame", session_id, slot, length, slot=slot)
+        if self.settings.channels == 2:
+            output = output.reshape(-1, 2)
+        return output
+
+    async def encode_output(self, audio_data: bytes, output_format: str, session_id: str) -> List[bytes]:
+        """Transcode synthesized speech on the session's worker."""
+        worker = self.workers[self.worker_for(session_id)]
+        return await self._request(worker, "encode", session_id, audio_data, output_format)
+
+    def release_session(self, session_id: str):
+        """Drop a session's state on its worker without waiting for it."""
+        self.sessions.pop(session_id, None)
+        if self.workers:
+            self.workers[self.worker_for(session_id)].send(("release", None, session_id))
+
+    async def cleanup(self):
+        """Stop the worker processes and free their shared memory."""
+        loop = asyncio.get_running_loop()
+        self.is_initialized = False
+        for worker in self.workers:
+            self._fail_worker(worker)
+            worker.send(None)
+            await loop.run_in_executor(None, worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            await loop.run_in_executor(None, worker.close)
+        self.workers = []
+        self.sessions.clear()
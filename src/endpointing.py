@@ -0,0 +1,155 @@
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from src.speech import TranscriptionResult
+from src.utils.clock import LoopClock
+from src.utils.metrics import Counter, Histogram
+from src.utils.settings import EndpointingSettings
+
+# Words that leave a clause hanging when an utterance ends on them
+CONTINUATIONS = frozenset((
+    "and", "but", "or", "so", "because", "if", "when", "then", "that", "which", "who",
+    "the", "a", "an", "my", "your", "to", "of", "with", "for", "in", "on", "at", "from",
+    "is", "are", "was", "um", "uh", "like"
+))
+WORD = re.compile(r"[\w']+")
+
+COMPLETE, INCOMPLETE, UNKNOWN = "complete", "incomplete", "unknown"
+
+def completeness(text: str) -> str:
+    """Guess from its last characters whether an utterance is a finished thought."""
+    text = text.rstrip()
+    if not text:
+        return UNKNOWN
+    if text[-1] in ",;:-":
+        return INCOMPLETE
+    words = WORD.findall(text)
+    if words and words[-1].lower() in CONTINUATIONS:
+        return INCOMPLETE
+    if text[-1] in ".?!":
+        return COMPLETE
+    return UNKNOWN
+
+class _Utterance:
+    """What a session has said since its last turn ended."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.silence_ms = 0.0
+        # Ends the turn if no frame arrives to measure the rest of the silence
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+class Endpointer:
+    """Decides when a caller has finished speaking.
+
+    Frames are classified as speech or silence by level, transcript fragments
+    are collected until the turn ends, and the turn ends once the silence since
+    the last speech is long enough for what was said: short after a finished
+    sentence, long after a trailing conjunction or comma. While fragments are
+    held, a timer ends the turn after that silence too, for clients that stop
+    sending audio when the caller goes quiet (DTX, client-side VAD, push-to-talk).
+    """
+
+    def __init__(self, sample_rate: int, channels: int = 1, clock: Optional[LoopClock] = None):
+        self.samples_per_ms = sample_rate * channels / 1000
+        self.clock = clock or LoopClock()
+        self.sessions: Dict[str, _Utterance] = {}
+        self.turns = Counter("endpointed_turns")
+        self.fragments = Counter("held_fragments")
+        self.timeouts = Counter("endpoint_timeouts")
+        # Silence heard before each turn was ended
+        self.silence = Histogram("endpoint_silence_ms")
+
+    def observe_audio(self, session_id: str, audio: np.ndarray, settings: EndpointingSettings) -> bool:
+        """Track silence for a processed frame, returning whether it contains speech."""
+        utterance = self.sessions.setdefault(session_id, _Utterance())
+        speech = audio.size > 0 and float(np.sqrt(np.mean(np.square(audio)))) >= settings.vad_threshold
+        if speech:
+            utterance.silence_ms = 0.0
+            utterance.cancel_timer()
+        else:
+            utterance.silence_ms += audio.size / self.samples_per_ms
+        return speech
+
+    def required_silence_ms(self, text: str, settings: EndpointingSettings) -> float:
+        """Silence after which an utterance ending in `text` is taken as the end of the turn."""
+        kind = completeness(text)
+        if kind == INCOMPLETE:
+            wait = settings.incomplete_silence_ms
+        elif kind == COMPLETE:
+            wait = settings.complete_silence_ms
+        else:
+            wait = settings.silence_ms
+        return wait / settings.aggressiveness
+
+    def end_of_turn(self, session_id: str, transcription: Optional[TranscriptionResult],
+                    settings: EndpointingSettings,
+                    on_silence: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Add a frame's transcription, returning the whole utterance if the turn has ended.
+
+        While the utterance is held, `on_silence` is called with it if the
+        required silence passes without another speech frame.
+        """
+        utterance = self.sessions.setdefault(session_id, _Utterance())
+        added = transcription is not None and transcription.is_final and transcription.text.strip()
+        if added:
+            utterance.parts.append(added)
+        if not utterance.parts:
+            return None
+
+        text = " ".join(utterance.parts)
+        required_ms = self.required_silence_ms(text, settings)
+        if utterance.silence_ms < required_ms:
+            if transcription is not None and transcription.text.strip():
+                self.fragments.inc()
+            # Re-armed only when the text changes the wait, not on every silent frame
+            if on_silence is not None and (added or utterance.timer is None):
+                utterance.cancel_timer()
+                utterance.timer = self.clock.call_later(
+                    (required_ms - utterance.silence_ms) / 1000,
+                    self._silence_elapsed, session_id, utterance, required_ms, on_silence
+                )
+            return None
+
+        self._end(session_id, utterance, utterance.silence_ms)
+        return text
+
+    def _silence_elapsed(self, session_id: str, utterance: _Utterance, silence_ms: float,
+                         on_silence: Callable[[str], None]):
+        utterance.timer = None
+        if self.sessions.get(session_id) is not utterance or not utterance.parts:
+            return
+        self.timeouts.inc()
+        self._end(session_id, utterance, silence_ms)
+        on_silence(" ".join(utterance.parts))
+
+    def _end(self, session_id: str, utterance: _Utterance, silence_ms: float):
+        utterance.cancel_timer()
+        self.turns.inc()
+        self.silence.observe(silence_ms)
+        self.sessions[session_id] = _Utterance()
+
+    def carry(self, session_id: str, text: str):
+        """Put the text of a cancelled turn back in front of the session's pending utterance."""
+        utterance = self.sessions.setdefault(session_id, _Utterance())
+        utterance.parts.insert(0, text)
+
+    def release(self, session_id: str):
+        """Forget a session's pending utterance."""
+        utterance = self.sessions.pop(session_id, None)
+        if utterance is not None:
+            utterance.cancel_timer()
+
+    def stats(self) -> Dict:
+        return {
+            "turns": self.turns.value,
+            "held_fragments": self.fragments.value,
+            "timeouts": self.timeouts.value,
+            "silence_ms": self.silence.snapshot()
+        }
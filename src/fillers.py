@@ -0,0 +1,71 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from src.audio import AudioProcessor
+from src.utils.context import current_session
+from src.utils.tuning import Tuning
+
+# Duration of each clip frame; playback can be cut between any two
+CLIP_FRAME_MS = 20
+
+class FillerClips:
+    """Short phrases synthesized ahead of time and kept as ready-to-send frames.
+
+    Synthesized audio is cached per (profile cache namespace, voice, output
+    format, text), and its encoded frames per client codec and rate as
+    well, so playing a clip costs no provider call and, after the first
+    session with a codec, no encoding either.
+    """
+
+    def __init__(self, audio_processor: AudioProcessor):
+        self.audio_processor = audio_processor
+        self.audio: Dict[tuple, bytes] = {}
+        self.frames: Dict[tuple, List[bytes]] = {}
+        self.pending = set()
+
+    @staticmethod
+    def key(tuning: Tuning, text: str) -> tuple:
+        voice = tuning.voice.provider
+        return (tuning.cache_namespace, voice.voice_id, voice.output_format, text)
+
+    @staticmethod
+    def phrases(tuning: Tuning) -> Tuple[str, ...]:
+        """The filler phrase and backchannel phrases of a tuning."""
+        return tuple(text for text in (tuning.turn.filler_text,) + tuning.turn.backchannel_phrases if text)
+
+    async def prepare(self, tuning: Tuning, synthesizer):
+        """Synthesize the current voice's clips that aren't cached yet, encoded for the default codec."""
+        await asyncio.gather(*(self._prepare(tuning, text, synthesizer) for text in self.phrases(tuning)))
+
+    async def _prepare(self, tuning: Tuning, text: str, synthesizer):
+        key = self.key(tuning, text)
+        if key in self.audio or key in self.pending:
+            return
+        self.pending.add(key)
+        # Clips belong to no session, so they are neither recorded nor answered from a session's replay
+        current_session.set(None)
+        try:
+            self.audio[key] = await synthesizer.synthesize(text, tuning.voice)
+            self.get(tuning, text)
+        except Exception as e:
+            logger.warning(f"Could not synthesize clip {text!r}: {str(e)}")
+        finally:
+            self.pending.discard(key)
+
+    def schedule(self, tuning: Tuning, synthesizer):
+        """Synthesize missing clips in the background, for later turns."""
+        asyncio.get_running_loop().create_task(self.prepare(tuning, synthesizer))
+
+    def get(self, tuning: Tuning, text: str, session_id: Optional[str] = None) -> Optional[List[bytes]]:
+        """A clip's frames in a session's codec, or None if it hasn't been synthesized."""
+        key = self.key(tuning, text)
+        audio = self.audio.get(key)
+        if audio is None:
+            return None
+        codec, sample_rate = self.audio_processor.session_codec(session_id)
+        frames_key = key + (codec, sample_rate)
+        frames = self.frames.get(frames_key)
+        if frames is None:
+            frames = self.audio_processor.encode_clip(audio, key[2], codec, sample_rate, CLIP_FRAME_MS)
+            self.frames[frames_key] = frames
+        return frames
@@ -1,25 +1,45 @@
 
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
+from typing import Dict, Any, Optional, Union, TYPE_CHECKING
 from loguru import logger
 import os
+from src.utils.settings import ProviderSettings, provider_settings
+from src.utils.startup import startup_report
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+DEFAULT_SYSTEM_PROMPT = ("You are a helpful AI assistant engaged in a voice conversation. "
+                         "Keep your responses concise and natural.")
 
 class LanguageModel:
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.provider = config.get("default_provider", "openai")
-        self.client: Optional[AsyncOpenAI] = None
+    def __init__(self, config: Union[Dict[str, Any], ProviderSettings]):
+        self.configure(provider_settings("llm", config))
+        self.client: Optional["AsyncOpenAI"] = None
         self.is_initialized = False
         self.conversation_history = {}
+
+    def configure(self, settings: ProviderSettings):
+        """Use new provider settings for responses that start from now on."""
+        self.settings = settings
+        self.provider = settings.default_provider
+        self.model = settings.provider.model
+        self.temperature = settings.provider.temperature
+        self.max_tokens = settings.provider.max_tokens
+        # Sampling parameters sent with every completion request
+        self.request_options = self._build_request_options(settings)
+
+    @staticmethod
+    def _build_request_options(settings: ProviderSettings) -> Dict[str, Any]:
+        provider = settings.provider
+        return {"model": provider.model, "temperature": provider.temperature, "max_tokens": provider.max_tokens}
         
     async def initialize(self):
         """Initialize language model client."""
         try:
             if self.provider == "openai":
-                self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                self.model = self.config["providers"]["openai"]["model"]
-                self.temperature = self.config["providers"]["openai"]["temperature"]
-                self.max_tokens = self.config["providers"]["openai"]["max_tokens"]
+                # Imported here so a disabled provider costs nothing at startup
+                openai = startup_report.import_module("openai")
+                self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
             
@@ -29,19 +49,28 @@ class LanguageModel:
             logger.error(f"Failed to initialize language model: {str(e)}")
             raise
         
-    async def generate_response(self, user_input: str, session_id: str) -> str:
-        """Generate response using the language model."""
+    async def generate_response(self, user_input: str, session_id: str,
+                                settings: Optional[ProviderSettings] = None,
+                                timeout: Optional[float] = None, system_prompt: Optional[str] = None) -> str:
+        """Generate response using the language model, with `settings` if a turn captured older ones.
+
+        `timeout` (seconds) bounds the provider request; `system_prompt` replaces the default one.
+        """
         if not self.is_initialized:
             raise RuntimeError("Language model not initialized")
 
         try:
             if self.provider == "openai":
+                request_options = self.request_options
+                if settings is not None and settings is not self.settings:
+                    request_options = self._build_request_options(settings)
+
                 # Get conversation history for this session
                 history = self.conversation_history.get(session_id, [])
                 
                 # Prepare messages
                 messages = [
-                    {"role": "system", "content": "You are a helpful AI assistant engaged in a voice conversation. Keep your responses concise and natural."},
+                    {"role": "system", "content": system_prompt or DEFAULT_SYSTEM_PROMPT},
                 ]
                 
                 # Add conversation history
@@ -50,12 +79,7 @@ class LanguageModel:
                 # Add user's input
                 messages.append({"role": "user", "content": user_input})
                 
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
-                )
+                response = await self.client.chat.completions.create(messages=messages, timeout=timeout, **request_options)
                 
                 # Extract response text
                 response_text = response.choices[0].message.content
@@ -84,6 +108,12 @@ class LanguageModel:
         if session_id in self.conversation_history:
             del self.conversation_history[session_id]
             
+    async def cleanup(self):
+        """Close the provider client."""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
     def health_check(self) -> Dict:
         """Check the health of the language model service."""
         return {
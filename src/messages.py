@@ -0,0 +1,122 @@
+import dataclasses
+import typing
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, List, Tuple, Type, Union
+from src.utils.exceptions import MessageError
+from src.utils.serialization import dumps, loads
+
+# Websocket message schemas for both directions. On the wire a message is
+# {"type": ..., "data": {...}} with the schema's fields as data; messages
+# without fields have no data.
+
+@dataclass
+class TranscriptionResult:
+    type: ClassVar[str] = "transcription"
+    text: str
+    is_final: bool
+    confidence: float = 0.0
+    language: str = ""
+
+@dataclass(frozen=True)
+class TextInput:
+    """Text typed by the user, answered like a final transcription."""
+    type: ClassVar[str] = "text"
+    text: str
+
+@dataclass(frozen=True)
+class Response:
+    """A reply's text; its audio follows as binary frames."""
+    type: ClassVar[str] = "response"
+    text: str
+    rung: str
+
+@dataclass(frozen=True)
+class Backchannel:
+    type: ClassVar[str] = "backchannel"
+    text: str
+
+@dataclass(frozen=True)
+class Clear:
+    """The backchannel was cut; the client drops what it still has buffered."""
+    type: ClassVar[str] = "clear"
+
+@dataclass(frozen=True)
+class Reconnect:
+    """The server is draining; resume by reconnecting with this session ID."""
+    type: ClassVar[str] = "reconnect"
+    session_id: str
+
+@dataclass(frozen=True)
+class Error:
+    type: ClassVar[str] = "error"
+    error: str
+
+@dataclass(frozen=True)
+class Batch:
+    """Adjacent control messages sent as one frame."""
+    type: ClassVar[str] = "batch"
+    messages: Tuple[Any, ...]
+
+# Messages a client may send as text frames
+INCOMING: Dict[str, Type] = {cls.type: cls for cls in (TextInput, TranscriptionResult)}
+
+# (name, expected types, required) of each incoming schema's fields
+_FIELDS: Dict[Type, List[Tuple[str, tuple, bool]]] = {}
+
+def _fields(cls: Type) -> List[Tuple[str, tuple, bool]]:
+    fields = _FIELDS.get(cls)
+    if fields is None:
+        hints = typing.get_type_hints(cls)
+        fields = _FIELDS[cls] = []
+        for f in dataclasses.fields(cls):
+            kind = hints[f.name]
+            # JSON has one number type
+            expected = (int, float) if kind is float else (kind,)
+            required = f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+            fields.append((f.name, expected, required))
+    return fields
+
+# Whether each outgoing schema has fields, and so data
+_HAS_DATA: Dict[Type, bool] = {}
+
+def envelope(message: Any) -> Dict:
+    """The wire form of a message, with its fields left to the encoder."""
+    cls = type(message)
+    if cls is Batch:
+        return {"type": Batch.type, "data": [envelope(item) for item in message.messages]}
+    has_data = _HAS_DATA.get(cls)
+    if has_data is None:
+        has_data = _HAS_DATA[cls] = bool(dataclasses.fields(cls))
+    if not has_data:
+        return {"type": cls.type}
+    return {"type": cls.type, "data": message}
+
+def encode(message: Any) -> str:
+    """Serialize a message for a text frame."""
+    return dumps(envelope(message))
+
+def decode(data: Union[str, bytes]) -> Any:
+    """Parse a client's text frame into its schema, raising MessageError if it doesn't match one."""
+    try:
+        value = loads(data)
+    except ValueError as e:
+        raise MessageError(f"Malformed JSON: {e}")
+    if not isinstance(value, dict):
+        raise MessageError("Message must be a JSON object")
+    cls = INCOMING.get(value.get("type"))
+    if cls is None:
+        raise MessageError(f"Unknown message type: {value.get('type')!r}")
+    fields = value.get("data", {})
+    if not isinstance(fields, dict):
+        raise MessageError(f"{cls.type} data must be an object")
+    values = {}
+    for name, expected, required in _fields(cls):
+        if name not in fields:
+            if required:
+                raise MessageError(f"{cls.type} message is missing {name}")
+            continue
+        field_value = fields[name]
+        if not isinstance(field_value, expected) or (bool not in expected and isinstance(field_value, bool)):
+            raise MessageError(f"{cls.type}.{name} must be {expected[-1].__name__}")
+        values[name] = field_value
+    return cls(**values)
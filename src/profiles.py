@@ -0,0 +1,105 @@
+import dataclasses
+from typing import Dict, Optional
+from loguru import logger
+from src.utils.concurrency import WS_CLOSE_POLICY_VIOLATION, WS_CLOSE_TRY_AGAIN_LATER, AdmissionDecision
+from src.utils.exceptions import ConfigurationError
+from src.utils.metrics import Counter
+from src.utils.settings import ProfileSettings, ProfilesSettings
+from src.utils.tuning import TUNABLE_SECTIONS, Tuning, merge, parse_tuning
+
+# The top-level config, used when no profile of this name is configured
+DEFAULT_PROFILE = "default"
+
+# Sections a profile may override; concurrency limits stay shared by all profiles
+PROFILE_SECTIONS = ("retell", "speech_recognition", "llm", "voice", "turn", "endpointing")
+
+def profile_tuning(base: Tuning, name: str, profile: ProfileSettings) -> Tuning:
+    """A profile's overrides layered over `base`, raising ConfigurationError if they don't validate."""
+    config = {section: dataclasses.asdict(getattr(base, section)) for section in TUNABLE_SECTIONS}
+    overrides = {}
+    for section in PROFILE_SECTIONS:
+        values = getattr(profile, section)
+        if "default_provider" in values:
+            # Provider clients are shared across profiles
+            raise ConfigurationError(f"profiles.agents.{name}.{section}.default_provider can't be overridden")
+        if values:
+            overrides[section] = dict(values)
+    try:
+        tuning = parse_tuning(merge(config, overrides), base.version)
+    except ConfigurationError as e:
+        raise ConfigurationError(f"profiles.agents.{name}: {e}")
+    return dataclasses.replace(
+        tuning,
+        profile=name,
+        system_prompt=profile.system_prompt,
+        cache_namespace=profile.cache_namespace or name
+    )
+
+class Profiles:
+    """Agent profiles, selected per connection, and the profile each session uses.
+
+    A profile's settings are its overrides over the current tuning, rebuilt
+    whenever the tuning changes. Profiles share the agent's provider clients,
+    connection pools and limiters, which take settings per request, so a
+    profile costs only its settings and its cached clips.
+    """
+
+    def __init__(self, settings: ProfilesSettings):
+        self.settings = settings
+        self.tunings: Dict[str, Tuning] = {}
+        self.sessions: Dict[str, str] = {}
+        self.active: Dict[str, int] = {}
+        self.rejected_unknown = Counter("profile_rejected_unknown")
+        self.rejected_quota = Counter("profile_rejected_quota")
+
+    def update(self, base: Tuning):
+        """Rebuild every profile over `base`; nothing changes if one doesn't validate."""
+        tunings = {DEFAULT_PROFILE: dataclasses.replace(base, profile=DEFAULT_PROFILE)}
+        for name, profile in self.settings.agents.items():
+            tunings[name] = profile_tuning(base, name, profile)
+        if self.settings.default not in tunings:
+            raise ConfigurationError(f"profiles.default {self.settings.default!r} is not configured")
+        self.tunings = tunings
+
+    def acquire(self, session_id: str, name: Optional[str] = None) -> AdmissionDecision:
+        """Assign a session to a profile (default: `profiles.default`) if it exists and has room."""
+        name = name or self.settings.default
+        if name not in self.tunings:
+            self.rejected_unknown.inc()
+            logger.warning("Rejected session {}: unknown profile {!r}", session_id, name)
+            return AdmissionDecision(False, WS_CLOSE_POLICY_VIOLATION, "Unknown profile")
+        profile = self.settings.agents.get(name)
+        if profile is not None and profile.max_sessions and self.active.get(name, 0) >= profile.max_sessions:
+            self.rejected_quota.inc()
+            logger.warning("Rejected session {}: profile {} is at its limit of {} sessions",
+                           session_id, name, profile.max_sessions)
+            return AdmissionDecision(False, WS_CLOSE_TRY_AGAIN_LATER, "Profile at capacity")
+        self.release(session_id)
+        self.sessions[session_id] = name
+        self.active[name] = self.active.get(name, 0) + 1
+        return AdmissionDecision(True)
+
+    def rename(self, session_id: str, new_id: str):
+        """Keep a session's profile when it takes over a handed-off session's ID."""
+        name = self.sessions.pop(session_id, None)
+        if name is not None:
+            self.release(new_id)
+            self.sessions[new_id] = name
+
+    def release(self, session_id: str):
+        name = self.sessions.pop(session_id, None)
+        if name is not None:
+            self.active[name] -= 1
+
+    def tuning(self, session_id: Optional[str]) -> Optional[Tuning]:
+        """The tuning of a session's profile, or None if it has none."""
+        name = self.sessions.get(session_id)
+        return self.tunings.get(name) if name is not None else None
+
+    def stats(self) -> Dict:
+        return {
+            "default": self.settings.default,
+            "sessions": {name: self.active.get(name, 0) for name in self.tunings},
+            "rejected_unknown": self.rejected_unknown.value,
+            "rejected_quota": self.rejected_quota.value
+        }
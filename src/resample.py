@@ -0,0 +1,91 @@
+from math import gcd
+from typing import List
+import numpy as np
+
+class StreamingResampler:
+    """Stateful rational polyphase resampler.
+
+    Converts `in_rate` to `out_rate` by the reduced ratio up/down using a
+    Kaiser-windowed sinc prototype split into `up` polyphase branches. The last
+    `taps - 1` input samples and the output phase are carried across calls, so a
+    stream resampled frame by frame is identical to resampling it in one call.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps_per_phase: int = 16,
+                 rolloff: float = 0.9, beta: float = 8.0):
+        divisor = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps = taps_per_phase
+
+        # Low-pass prototype at the upsampled rate, cut off below the lower Nyquist
+        length = self.up * taps_per_phase
+        cutoff = 0.5 * rolloff / max(self.up, self.down)
+        n = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta)
+        prototype *= self.up / prototype.sum()
+
+        # Branch p holds h[p + k * up]; reversed so rows dot directly with input windows
+        self.phases = prototype.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+        self._window = np.arange(taps_per_phase)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def reset(self):
+        """Clear the filter history."""
+        self.history = None
+        # Upsampled-time position of the next output, relative to the next frame start
+        self.offset = 0
+
+    def output_length(self, input_length: int) -> int:
+        """Number of samples the next `process` call returns for `input_length` inputs."""
+        limit = input_length * self.up
+        if self.offset >= limit:
+            return 0
+        return (limit - self.offset - 1) // self.down + 1
+
+    def batch_key(self) -> tuple:
+        """Resamplers with equal keys can share a `process_batch` call."""
+        return (self.up, self.down, self.taps, self.offset, self.history is None)
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """Resample one frame of shape (samples,) or (samples, channels)."""
+        if self.passthrough:
+            return frame
+        samples = frame.reshape(len(frame), -1).astype(np.float32, copy=False)
+        output = self.process_batch([self], samples[None])[0]
+        return output.reshape(-1) if frame.ndim == 1 else output
+
+    @staticmethod
+    def process_batch(resamplers: List["StreamingResampler"], frames: np.ndarray) -> np.ndarray:
+        """Resample one frame per resampler, stacked as (sessions, samples, channels)."""
+        first = resamplers[0]
+        if first.passthrough:
+            return frames
+        sessions, length, channels = frames.shape
+        if first.history is None:
+            history = np.zeros((sessions, first.taps - 1, channels), dtype=np.float32)
+        elif sessions == 1:
+            history = first.history[None]
+        else:
+            history = np.stack([resampler.history for resampler in resamplers])
+
+        count = first.output_length(length)
+        buffer = np.concatenate([history, frames.astype(np.float32, copy=False)], axis=1)
+        positions = first.offset + first.down * np.arange(count)
+        input_index, phase = np.divmod(positions, first.up)
+
+        # windows[s, i, j] = x[s, input_index[i] - (taps - 1) + j], aligned with the reversed branches
+        windows = buffer[:, input_index[:, None] + first._window]
+        output = np.einsum("sijc,ij->sic", windows, first.phases[phase])
+
+        offset = first.offset + first.down * count - length * first.up
+        for resampler, tail in zip(resamplers, buffer[:, buffer.shape[1] - (first.taps - 1):]):
+            resampler.history = tail
+            resampler.offset = offset
+        return output
@@ -1,127 +1,651 @@
-from typing import Dict, Optional
-import websockets
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import dataclasses
+import functools
 import json
 import asyncio
 import os
+import random
+import time
+import uuid
 from loguru import logger
 from src.audio import AudioProcessor
+from src.dsp_pool import DSPPool
+from src.endpointing import Endpointer
+from src.fillers import CLIP_FRAME_MS, FillerClips
+from src.messages import Backchannel, Clear, Error, Response, TextInput, TranscriptionResult, decode
+from src.profiles import Profiles
+from src.retell_bridge import RetellBridge, RetellConnection
 from src.speech import SpeechRecognizer
 from src.llm import LanguageModel
 from src.voice import VoiceSynthesizer
 from src.utils.session import SessionManager
+from src.utils.batching import FrameBatcher
+from src.utils.concurrency import AdmissionController, build_limiters, configure_limiters
+from src.utils.rate_limit import ClientLimits
+from src.utils.context import current_session, current_turn
+from src.utils.exceptions import MessageError
+from src.utils.log import SampledLog
+from src.utils.archive import Archiver
+from src.utils.clock import LoopClock
+from src.utils.recording import AUDIO, TEXT, Recorder
+from src.utils.metrics import Counter, Histogram
+from src.utils.settings import AudioSettings, ProfilesSettings, ProviderSettings, RetellSettings, from_dict
+from src.utils.startup import startup_report
+from src.utils.tuning import Tuning, parse_tuning
+
+# Degradation ladder for a turn that overruns its budget, best first
+RUNG_FULL = "full"
+RUNG_SHORT = "short_reply"
+RUNG_FILLER = "filler"
+RUNG_TEXT_ONLY = "text_only"
+RUNGS = (RUNG_FULL, RUNG_SHORT, RUNG_FILLER, RUNG_TEXT_ONLY)
+
+# One debug record per inbound frame, rate-limited and sampled
+frame_log = SampledLog("frame")
+
+class _PendingTurn:
+    """An audio turn whose reply is being prepared in the background."""
+
+    def __init__(self, text: str, started_at: float, heard_at: float, previous: Optional["_PendingTurn"] = None):
+        self.text = text
+        # Monotonic start, for the turn's latency budget
+        self.started_at = started_at
+        # When the turn's last words arrived by the agent's clock, for merging further speech
+        self.heard_at = heard_at
+        # The session's turn still in flight when this one started; this one runs after it
+        self.previous = previous
+        # LLM history before the turn once it runs, restored if the turn is merged into later speech
+        self.history: Optional[List[Dict]] = None
+        self.task: Optional[asyncio.Task] = None
+        # Set once the reply is being sent; the turn can no longer be merged
+        self.delivering = False
 
 class RetellAgent:
     def __init__(self, config: Dict, session_manager: SessionManager):
         self.config = config["retell"]
+        # Settings that can be swapped at runtime; each turn uses the snapshot current when it started
+        self.tuning = parse_tuning(config)
+        self.settings = self.tuning.retell
+        # Agent profiles selected per connection, layered over the tuning
+        self.profiles = Profiles(from_dict(ProfilesSettings, config.get("profiles", {}), "profiles"))
+        self.profiles.update(self.tuning)
+        # Sent unchanged to Retell at the start of every conversation
+        self.conversation_config = json.dumps({"type": "config", "data": self._conversation_config()})
         self.session_manager = session_manager
-        self.audio_processor = AudioProcessor(config["audio"])
-        self.speech_recognizer = SpeechRecognizer(config["speech_recognition"])
-        self.language_model = LanguageModel(config["llm"])
-        self.voice_synthesizer = VoiceSynthesizer(config["voice"])
+        audio_settings = from_dict(AudioSettings, config["audio"], "audio")
+        self.audio_processor = AudioProcessor(audio_settings)
+        # Optional worker processes for CPU-heavy audio stages (0 runs them in the event loop)
+        dsp_workers = audio_settings.dsp_workers
+        self.dsp_pool = DSPPool(audio_settings, dsp_workers) if dsp_workers > 0 else None
+        # In-loop processing batches frames across sessions (DSP workers batch their own queues)
+        batch_window = audio_settings.batch_max_window_ms
+        self.frame_batcher = None
+        if batch_window > 0 and self.dsp_pool is None:
+            self.frame_batcher = FrameBatcher(
+                self.audio_processor.process_batch,
+                max_window=batch_window / 1000,
+                max_batch=audio_settings.batch_max_size
+            )
+        # Debounce and endpoint timing; a replay substitutes the recorded timeline
+        self.clock = LoopClock()
+        self.endpointer = Endpointer(audio_settings.sample_rate, audio_settings.channels, self.clock)
+        self.speech_recognizer = SpeechRecognizer(self.tuning.speech_recognition)
+        self.language_model = LanguageModel(self.tuning.llm)
+        self.voice_synthesizer = VoiceSynthesizer(self.tuning.voice)
         self.api_key = os.getenv("RETELL_API_KEY")
+        # Sessions streamed to Retell when retell.upstream is enabled
+        self.retell_bridge = RetellBridge(self.api_key)
+        # Turns by degradation rung, and end-to-end turn latency
+        self.turn_rungs = {rung: Counter(f"turn_rung_{rung}") for rung in RUNGS}
+        self.turn_latency = Histogram("turn_latency_ms")
+        self.backchannels = Counter("backchannels")
+        # LLM requests per answered user turn, and turns merged into later speech
+        self.llm_calls = Counter("llm_calls")
+        self.user_turns = Counter("user_turns")
+        self.merged_turns = Counter("merged_turns")
+        # Client text frames that didn't match a message schema
+        self.rejected_messages = Counter("rejected_messages")
+        self.pending_turns: Dict[str, _PendingTurn] = {}
+        # Filler and backchannel clips, synthesized ahead of time
+        self.fillers = FillerClips(self.audio_processor)
+        # Set by install_recorder to capture sessions for replay
+        self.recorder: Optional[Recorder] = None
+        # Set when call archival is enabled
+        self.archiver: Optional[Archiver] = None
         self.is_initialized = False
 
+        # Drop per-session state when a session ends or expires
+        self.session_manager.add_end_listener(self.release_session)
+
+        # Per-provider concurrency limits and connection admission
+        self.limiters = build_limiters(config.get("concurrency", {}), self.providers)
+        self.admission = AdmissionController(
+            self.limiters,
+            latency_budget_ms=self.tuning.concurrency.latency_budget_ms,
+            client_limits=ClientLimits(config.get("security", {}))
+        )
+
+    def _conversation_config(self, settings: Optional[RetellSettings] = None) -> Dict:
+        settings = settings or self.settings
+        return {
+            "voice_id": settings.voice_id,
+            "language": settings.language,
+            "stream_latency_ms": settings.stream_latency,
+            "use_enhanced_model": settings.use_enhanced_model,
+            "audio_config": {
+                "auto_gain_control": settings.auto_gain_control,
+                "noise_suppression": settings.noise_suppression
+            }
+        }
+
+    def apply_tuning(self, tuning: Tuning):
+        """Swap in new tunable settings; turns already under way keep the snapshot they started with."""
+        # Nothing here awaits, so no turn can observe a partial swap; an invalid profile rejects the change
+        self.profiles.update(tuning)
+        self.speech_recognizer.configure(tuning.speech_recognition)
+        self.language_model.configure(tuning.llm)
+        self.voice_synthesizer.configure(tuning.voice)
+        configure_limiters(self.limiters, tuning.concurrency)
+        self.admission.latency_budget_ms = tuning.concurrency.latency_budget_ms
+        self.settings = tuning.retell
+        self.conversation_config = json.dumps({"type": "config", "data": self._conversation_config()})
+        self.tuning = tuning
+
+    def session_tuning(self, session_id: Optional[str]) -> Tuning:
+        """The tuning of a session's profile, or the top-level one."""
+        return self.profiles.tuning(session_id) or self.tuning
+
+    @property
+    def providers(self):
+        """Providers used by a single conversation turn, in pipeline order."""
+        return [
+            self.speech_recognizer.provider,
+            self.language_model.provider,
+            self.voice_synthesizer.provider
+        ]
+
+    @property
+    def client_limits(self) -> ClientLimits:
+        return self.admission.client_limits
+
+    def admit(self, client_id: str, origin: Optional[str] = None):
+        """Decide whether a new conversation from `client_id` may start."""
+        return self.admission.admit(client_id, self.providers, origin)
+
     async def initialize(self):
         """Initialize all components."""
         try:
-            await self.audio_processor.initialize()
-            await self.speech_recognizer.initialize()
-            await self.language_model.initialize()
-            await self.voice_synthesizer.initialize()
+            with startup_report.phase("audio"):
+                await self.audio_processor.initialize()
+                if self.dsp_pool is not None:
+                    await self.dsp_pool.initialize()
+            with startup_report.phase("speech_recognition"):
+                await self.speech_recognizer.initialize()
+            with startup_report.phase("llm"):
+                await self.language_model.initialize()
+            with startup_report.phase("voice"):
+                await self.voice_synthesizer.initialize()
+                await self.prepare_fillers()
             self.is_initialized = True
             logger.info("Retell agent initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Retell agent: {str(e)}")
             raise
 
-    async def start_conversation(self, session_id: str):
-        """Start a new conversation session with Retell."""
+    async def start_conversation(self, session_id: str, websocket) -> Optional[RetellConnection]:
+        """Open the session's Retell connection, if `retell.upstream` is enabled.
+
+        Inbound frames are then forwarded to Retell as they arrive, and Retell's
+        audio and transcriptions are sent on to `websocket`.
+        """
+        settings = self.session_tuning(session_id).retell
+        if not settings.upstream:
+            return None
         if not self.is_initialized:
             raise RuntimeError("Retell agent not initialized")
 
+        codec, sample_rate = self.audio_processor.session_codec(session_id)
+        config_message = json.dumps({
+            "type": "config",
+            "data": {**self._conversation_config(settings), "audio_encoding": codec, "sample_rate": sample_rate}
+        })
+
+        async def on_message(message):
+            await self._from_retell(websocket, session_id, message)
+
+        return self.retell_bridge.open(session_id, settings, config_message, on_message)
+
+    async def _from_retell(self, websocket, session_id: str, message):
+        """Pass Retell's audio and transcriptions on to the client."""
+        if isinstance(message, bytes):
+            await websocket.send_bytes(message)
+            return
         try:
-            # Connect to Retell websocket
-            websocket_url = f"wss://api.retellai.com/websocket?api_key={self.api_key}"
-            async with websockets.connect(websocket_url) as websocket:
-                # Configure conversation settings
-                config = {
-                    "voice_id": self.config["voice_id"],
-                    "language": self.config["language"],
-                    "stream_latency_ms": self.config["stream_latency"],
-                    "use_enhanced_model": self.config["use_enhanced_model"],
-                    "audio_config": {
-                        "auto_gain_control": self.config["auto_gain_control"],
-                        "noise_suppression": self.config["noise_suppression"]
-                    }
-                }
-                
-                await websocket.send(json.dumps({
-                    "type": "config",
-                    "data": config
-                }))
-
-                return websocket
+            event = decode(message)
+        except MessageError as e:
+            logger.debug("Ignoring Retell message for session {}: {}", session_id, e)
+            return
+        if isinstance(event, TranscriptionResult):
+            await websocket.send_json(event)
+
+    async def open_audio_session(self, session_id: str, codec: Optional[str] = None,
+                                 sample_rate: Optional[int] = None):
+        """Negotiate a session's codec and sample rate, raising AudioProcessingError if unsupported."""
+        # Validated locally; frame durations for rate limiting are also measured here
+        self.audio_processor.open_session(session_id, codec, sample_rate)
+        if self.dsp_pool is not None:
+            await self.dsp_pool.open_session(session_id, codec, sample_rate)
+        if self.recorder is not None:
+            self.recorder.open(session_id, codec, sample_rate)
+
+    def release_audio_session(self, session_id: str):
+        """Release a session's audio state, wherever it is held."""
+        self.audio_processor.release_session(session_id)
+        if self.dsp_pool is not None:
+            self.dsp_pool.release_session(session_id)
+        if self.recorder is not None:
+            self.recorder.close(session_id)
+        if self.archiver is not None:
+            self.archiver.close_session(session_id)
+        self.retell_bridge.release(session_id)
+
+    async def handle_frame(self, websocket, audio_data: bytes, session_id: str) -> Optional[Dict]:
+        """Run an inbound audio frame through the pipeline, returning the response if it completed a turn."""
+        started_at = time.monotonic()
+        heard_at = self.clock.now()
+        if self.recorder is not None:
+            self.recorder.record(session_id, AUDIO, audio_data)
+        upstream = self.retell_bridge.get(session_id)
+        if upstream is not None:
+            upstream.send_audio(audio_data)
+        tuning = self.session_tuning(session_id)
+        debounce = tuning.turn.debounce_ms / 1000
+        transcription = await self.handle_audio(websocket, audio_data, session_id)
+        frame_log("Frame of {} bytes handled in {:.1f}ms, transcript: {!r}", len(audio_data),
+                  (time.monotonic() - started_at) * 1000, transcription.text if transcription else None)
+        fragment = transcription is not None and transcription.is_final and transcription.text.strip()
+        # More speech soon after a turn started takes that turn's text back
+        carried = self._merge_pending_turn(session_id, heard_at, debounce) if fragment else None
+
+        if tuning.endpointing.enabled:
+            if carried:
+                self.endpointer.carry(session_id, carried)
+            text = self.endpointer.end_of_turn(
+                session_id, transcription, tuning.endpointing,
+                functools.partial(self._end_turn_on_silence, websocket, session_id)
+            )
+            if text is None:
+                return None
+        elif not fragment:
+            return None
+        else:
+            text = f"{carried} {transcription.text.strip()}" if carried else transcription.text
+        if transcription is not None:
+            message = dataclasses.replace(transcription, text=text, is_final=True)
+        else:
+            message = TranscriptionResult(text=text, is_final=True)
+        if debounce <= 0:
+            await self._wait_for_turn(session_id)
+            return await self.handle_message(message, session_id, started_at, websocket)
+        self._start_turn(websocket, message, session_id, started_at, heard_at)
+        return None
 
+    def _start_turn(self, websocket, message: TranscriptionResult, session_id: str, started_at: float,
+                    heard_at: float):
+        """Answer a turn in the background, after any turn of the session still in flight."""
+        pending = _PendingTurn(message.text, started_at, heard_at, self.pending_turns.get(session_id))
+        pending.task = asyncio.get_running_loop().create_task(self._run_turn(websocket, message, session_id, pending))
+        self.pending_turns[session_id] = pending
+
+    async def _wait_for_turn(self, session_id: str):
+        """Wait until the session's background turns have finished."""
+        pending = self.pending_turns.get(session_id)
+        if pending is not None:
+            await asyncio.wait([pending.task])
+
+    def _end_turn_on_silence(self, websocket, session_id: str, text: str):
+        """Start the turn the endpointer ended because no frame followed the caller's last words."""
+        logger.debug("Ending turn for session {} on silence without frames", session_id)
+        self._start_turn(websocket, TranscriptionResult(text=text, is_final=True), session_id, time.monotonic(),
+                         self.clock.now())
+
+    def _merge_pending_turn(self, session_id: str, now: float, debounce: float) -> Optional[str]:
+        """Cancel a session's pending turn if it started within `debounce` seconds, returning its text."""
+        pending = self.pending_turns.get(session_id)
+        if pending is None or pending.delivering or now - pending.heard_at > debounce:
+            return None
+        del self.pending_turns[session_id]
+        pending.task.cancel()
+        if pending.history is not None:
+            self.language_model.conversation_history[session_id] = pending.history
+        if pending.previous is not None and not pending.previous.task.done():
+            # The merged turn starts again after the same one
+            self.pending_turns[session_id] = pending.previous
+        self.merged_turns.inc()
+        logger.debug("Merging turn for session {} into further speech", session_id)
+        return pending.text
+
+    async def _run_turn(self, websocket, message: TranscriptionResult, session_id: str, pending: _PendingTurn):
+        """Prepare a turn's reply and send it, unless further speech cancels the turn first."""
+        try:
+            if pending.previous is not None:
+                # One turn at a time per session, so replies and history stay in order.
+                # asyncio.wait, so cancelling this turn leaves the previous one running
+                await asyncio.wait([pending.previous.task])
+                pending.previous = None
+            pending.history = list(self.language_model.conversation_history.get(session_id, []))
+            # Counted in flight so a drain waits for the reply
+            with self.session_manager.stage(session_id, "turn"):
+                response = await self.handle_message(message, session_id, pending.started_at, websocket)
+                pending.delivering = True
+                if response:
+                    await self.send_response(websocket, response)
         except Exception as e:
-            logger.error(f"Failed to start Retell conversation: {str(e)}")
-            raise
+            logger.error("Turn for session {} failed: {}", session_id, e)
+        finally:
+            if self.pending_turns.get(session_id) is pending:
+                del self.pending_turns[session_id]
 
-    async def handle_audio(self, websocket, audio_data: bytes):
+    @staticmethod
+    async def send_response(websocket, response: Dict):
+        """Send a response's text as JSON followed by its audio as binary frames."""
+        data = response["data"]
+        await websocket.send_json(Response(text=data["text"], rung=data["rung"]))
+        for frame in data.get("audio", []):
+            await websocket.send_bytes(frame)
+
+    async def handle_text(self, data: str, session_id: str, websocket=None) -> Optional[Dict]:
+        """Handle a text message from the client, replying with an error if it doesn't match a schema."""
+        if self.recorder is not None:
+            self.recorder.record(session_id, TEXT, data)
+        try:
+            message = decode(data)
+        except MessageError as e:
+            self.rejected_messages.inc()
+            logger.warning("Rejected message from session {}: {}", session_id, e)
+            if websocket is not None:
+                await websocket.send_json(Error(error=str(e)))
+            return None
+        # Answered after an audio turn still in flight, not alongside it
+        await self._wait_for_turn(session_id)
+        return await self.handle_message(message, session_id, websocket=websocket)
+
+    async def handle_audio(self, websocket, audio_data: bytes, session_id: Optional[str] = None):
         """Handle incoming audio data."""
+        tuning = self.session_tuning(session_id)
+        current_session.set(session_id)
         try:
             # Process audio
-            processed_audio = self.audio_processor.process(audio_data)
+            if self.dsp_pool is not None and session_id is not None:
+                processed_audio = await self.dsp_pool.process(audio_data, session_id)
+            elif self.frame_batcher is not None and session_id in self.audio_processor.sessions:
+                processed_audio = await self.frame_batcher.submit((audio_data, session_id))
+            else:
+                processed_audio = self.audio_processor.process(audio_data, session_id)
+            if self.archiver is not None:
+                self.archiver.audio(session_id, "in", processed_audio, self.audio_processor.sample_rate)
+
+            # Silent frames only advance the endpointer's silence timer
+            if tuning.endpointing.enabled and session_id is not None:
+                if not self.endpointer.observe_audio(session_id, processed_audio, tuning.endpointing):
+                    return None
             
             # Get transcription
-            transcription = await self.speech_recognizer.transcribe(processed_audio)
+            with self.session_manager.stage(session_id, "stt"):
+                async with self.limiters[self.speech_recognizer.provider].acquire():
+                    transcription = await self.speech_recognizer.transcribe(processed_audio, tuning.speech_recognition)
+            if self.archiver is not None and transcription.is_final and transcription.text:
+                self.archiver.event(session_id, "transcription", text=transcription.text)
             
             # Send transcription back to client
-            await websocket.send_json({
-                "type": "transcription",
-                "data": transcription
-            })
+            await websocket.send_json(transcription)
             
             return transcription
             
         except Exception as e:
-            logger.error(f"Error handling audio: {str(e)}")
+            logger.error("Error handling audio: {}", e)
             raise
 
-    async def handle_message(self, message: Dict, session_id: str):
-        """Handle incoming message from Retell."""
+    async def handle_message(self, message: Union[TranscriptionResult, TextInput], session_id: str,
+                             started_at: Optional[float] = None, websocket=None):
+        """Handle a transcription or typed text, returning the response to a final one.
+
+        `started_at` is when the turn began (default: now); the turn budget runs from it.
+        Backchannel clips are played on `websocket`, if given, while the reply is prepared.
+        """
+        tuning = self.session_tuning(session_id)
+        current_session.set(session_id)
         try:
-            if message["type"] == "transcription":
-                text = message["data"]["text"]
-                is_final = message["data"]["is_final"]
-
-                if is_final and text:
-                    # Generate response using language model
-                    response = await self.language_model.generate_response(text, session_id)
-                    
-                    # Synthesize speech
-                    audio_data = await self.voice_synthesizer.synthesize(response)
-                    
-                    return {
-                        "type": "response",
-                        "data": {
-                            "text": response,
-                            "audio": audio_data
-                        }
-                    }
+            if isinstance(message, TextInput) or message.is_final:
+                text = message.text
+                if text:
+                    token = current_turn.set(uuid.uuid4().hex[:12])
+                    try:
+                        return await self._respond(text, session_id, tuning, started_at or time.monotonic(), websocket)
+                    finally:
+                        current_turn.reset(token)
             
             return None
             
         except Exception as e:
-            logger.error(f"Error handling message: {str(e)}")
+            logger.error("Error handling message: {}", e)
             raise
 
+    async def _respond(self, text: str, session_id: str, tuning: Tuning, started_at: float,
+                       websocket=None) -> Dict:
+        """Generate and synthesize a reply, stepping down the degradation ladder when a stage overruns."""
+        budget = tuning.turn.budget_ms / 1000
+        deadline = started_at + budget if budget > 0 else None
+
+        # Acknowledge the caller while the reply is prepared; cut before it is returned
+        stop = asyncio.Event()
+        backchannel = None
+        if websocket is not None and tuning.turn.backchannel_delay_ms > 0:
+            backchannel = asyncio.get_running_loop().create_task(
+                self._play_backchannel(websocket, session_id, tuning, started_at, stop)
+            )
+        try:
+            rung, reply = await self._generate_reply(text, session_id, tuning, deadline)
+            audio_data = None
+            audio_frames = []
+            if reply is None:
+                reply = tuning.turn.filler_text
+                filler = self.fillers.get(tuning, reply, session_id)
+                if filler is None:
+                    rung = RUNG_TEXT_ONLY
+                    self.fillers.schedule(tuning, self.voice_synthesizer)
+                else:
+                    audio_frames = filler
+            else:
+                try:
+                    audio_data = await self._stage(
+                        session_id, "tts", self.voice_synthesizer.provider,
+                        lambda timeout: self.voice_synthesizer.synthesize(reply, tuning.voice, timeout=timeout),
+                        deadline
+                    )
+                except Exception as e:
+                    if deadline is None:
+                        raise
+                    logger.warning("Synthesis for session {} failed: {}", session_id, str(e) or type(e).__name__)
+                    rung = RUNG_TEXT_ONLY
+
+            # Transcode to the codec negotiated by the client
+            if audio_data is not None:
+                output_format = tuning.voice.provider.output_format
+                if self.dsp_pool is not None:
+                    audio_frames = await self.dsp_pool.encode_output(audio_data, output_format, session_id)
+                else:
+                    audio_frames = self.audio_processor.encode_output(audio_data, output_format, session_id)
+        finally:
+            if backchannel is not None:
+                stop.set()
+                await backchannel
+
+        if self.archiver is not None:
+            self.archiver.event(session_id, "turn", text=text)
+            self.archiver.event(session_id, "reply", text=reply, rung=rung)
+            output_format = tuning.voice.provider.output_format
+            if audio_data is not None and output_format.startswith("pcm_"):
+                self.archiver.audio(session_id, "out", audio_data, int(output_format.split("_")[1]))
+
+        elapsed_ms = (time.monotonic() - started_at) * 1000
+        self.turn_rungs[rung].inc()
+        self.user_turns.inc()
+        self.turn_latency.observe(elapsed_ms)
+        if rung != RUNG_FULL:
+            logger.warning("Turn for session {} degraded to {} after {:.0f}ms", session_id, rung, elapsed_ms)
+        return {
+            "type": "response",
+            "data": {
+                "text": reply,
+                "audio": audio_frames,
+                "rung": rung
+            }
+        }
+
+    async def _play_backchannel(self, websocket, session_id: str, tuning: Tuning, started_at: float,
+                                stop: asyncio.Event):
+        """Play a backchannel clip if `stop` isn't set `backchannel_delay_ms` after the turn started.
+
+        Frames are sent in real time, so setting `stop` cuts the clip at a frame boundary.
+        """
+        delay = started_at + tuning.turn.backchannel_delay_ms / 1000 - time.monotonic()
+        phrases = tuning.turn.backchannel_phrases
+        if await self._wait(stop, delay) or not phrases:
+            return
+        text = random.choice(phrases)
+        frames = self.fillers.get(tuning, text, session_id)
+        if frames is None:
+            self.fillers.schedule(tuning, self.voice_synthesizer)
+            return
+
+        self.backchannels.inc()
+        if self.archiver is not None:
+            self.archiver.event(session_id, "backchannel", text=text)
+        try:
+            await websocket.send_json(Backchannel(text=text))
+            for frame in frames:
+                await websocket.send_bytes(frame)
+                if await self._wait(stop, CLIP_FRAME_MS / 1000):
+                    # Let the client drop what it still has buffered of the clip
+                    await websocket.send_json(Clear())
+                    break
+        except Exception as e:
+            logger.warning("Backchannel for session {} failed: {}", session_id, e)
+
+    @staticmethod
+    async def _wait(event: asyncio.Event, seconds: float) -> bool:
+        """Wait up to `seconds` for `event`, returning whether it is set."""
+        if seconds > 0 and not event.is_set():
+            try:
+                await asyncio.wait_for(event.wait(), seconds)
+            except asyncio.TimeoutError:
+                pass
+        return event.is_set()
+
+    async def _generate_reply(self, text: str, session_id: str, tuning: Tuning,
+                              deadline: Optional[float]) -> Tuple[str, Optional[str]]:
+        """Return (rung, reply), retrying once with a cheaper request; the reply is None if both overran."""
+        for rung in (RUNG_FULL, RUNG_SHORT):
+            self.llm_calls.inc()
+            settings = tuning.llm if rung == RUNG_FULL else self._short_settings(tuning)
+            limit_ms = tuning.turn.llm_timeout_ms if rung == RUNG_FULL else tuning.turn.retry_timeout_ms
+            try:
+                reply = await self._stage(
+                    session_id, "llm", self.language_model.provider,
+                    lambda timeout: self.language_model.generate_response(
+                        text, session_id, settings, timeout=timeout, system_prompt=tuning.system_prompt or None
+                    ),
+                    deadline, limit_ms / 1000
+                )
+                return rung, reply
+            except Exception as e:
+                # Without a budget, failures propagate as before
+                if deadline is None:
+                    raise
+                logger.warning("LLM {} attempt for session {} failed: {}", rung, session_id, str(e) or type(e).__name__)
+        return RUNG_FILLER, None
+
+    async def _stage(self, session_id: str, stage: str, provider: str, call: Callable,
+                     deadline: Optional[float], limit: Optional[float] = None):
+        """Run `call(timeout)` under the provider's limiter, giving up at `deadline` or after `limit` seconds."""
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if limit is not None:
+                timeout = min(timeout, limit)
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+
+        async def run():
+            with self.session_manager.stage(session_id, stage):
+                async with self.limiters[provider].acquire():
+                    return await call(timeout)
+
+        return await asyncio.wait_for(run(), timeout)
+
+    @staticmethod
+    def _short_settings(tuning: Tuning) -> ProviderSettings:
+        """LLM settings for the retry rung: fewer tokens and, if configured, a faster model."""
+        provider = tuning.llm.provider
+        changes = {"max_tokens": min(provider.max_tokens, tuning.turn.short_max_tokens)}
+        if tuning.turn.short_model:
+            changes["model"] = tuning.turn.short_model
+        providers = {**tuning.llm.providers, tuning.llm.default_provider: dataclasses.replace(provider, **changes)}
+        return dataclasses.replace(tuning.llm, providers=providers)
+
+    async def prepare_fillers(self, tuning: Optional[Tuning] = None):
+        """Synthesize the filler and backchannel clips that aren't cached yet, for `tuning` or every profile using them."""
+        tunings = [tuning] if tuning is not None else [
+            profile for profile in self.profiles.tunings.values()
+            if profile.turn.budget_ms > 0 or profile.turn.backchannel_delay_ms > 0
+        ]
+        await asyncio.gather(*(self.fillers.prepare(profile, self.voice_synthesizer) for profile in tunings))
+
+    def turn_stats(self) -> Dict:
+        """Turns by degradation rung, backchannels, endpointing, LLM calls per turn, rejected messages and turn latency."""
+        return {
+            "rungs": {rung: counter.value for rung, counter in self.turn_rungs.items()},
+            "backchannels": self.backchannels.value,
+            "endpointing": self.endpointer.stats(),
+            "user_turns": self.user_turns.value,
+            "merged_turns": self.merged_turns.value,
+            "rejected_messages": self.rejected_messages.value,
+            "llm_calls_per_turn": round(self.llm_calls.value / max(self.user_turns.value, 1), 3),
+            "latency_ms": self.turn_latency.snapshot()
+        }
+
+    def export_session(self, session_id: str) -> Dict:
+        """Return the state needed to resume a session on another worker."""
+        return {"history": self.language_model.conversation_history.get(session_id, [])}
+
+    def import_session(self, session_id: str, state: Dict):
+        """Restore state exported by `export_session`."""
+        history = state.get("history")
+        if history:
+            self.language_model.conversation_history[session_id] = history
+
+    def release_session(self, session_id: str):
+        """Release LLM history and audio buffers held for a session."""
+        pending = self.pending_turns.pop(session_id, None)
+        while pending is not None:
+            pending.task.cancel()
+            pending = pending.previous
+        self.language_model.clear_history(session_id)
+        self.endpointer.release(session_id)
+        self.profiles.release(session_id)
+        self.release_audio_session(session_id)
+
     async def cleanup(self):
         """Cleanup resources."""
         try:
             await self.audio_processor.cleanup()
+            if self.dsp_pool is not None:
+                await self.dsp_pool.cleanup()
             await self.speech_recognizer.cleanup()
             await self.language_model.cleanup()
             await self.voice_synthesizer.cleanup()
+            await self.retell_bridge.close_all()
         except Exception as e:
             logger.error(f"Error during cleanup: {str(e)}")
             raise
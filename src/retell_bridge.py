@@ -0,0 +1,173 @@
+import asyncio
+import random
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Union
+from loguru import logger
+from src.utils.metrics import Counter
+from src.utils.settings import RetellSettings
+from src.utils.startup import startup_report
+
+# Called with each message Retell sends: bytes for audio, str for events
+MessageHandler = Callable[[Union[str, bytes]], Awaitable[None]]
+
+class BridgeStats:
+    def __init__(self):
+        self.connects = Counter("retell_connects")
+        self.reconnects = Counter("retell_reconnects")
+        self.forwarded = Counter("retell_frames_forwarded")
+        self.dropped = Counter("retell_frames_dropped")
+        self.received = Counter("retell_messages_received")
+
+class RetellConnection:
+    """A session's websocket to Retell, kept open until the session ends.
+
+    Audio frames are forwarded as given, without copying, from a bounded
+    buffer that also holds them while the connection is being replaced. The
+    session's config message is sent on every connect. Pings detect a dead
+    connection; a connection lost with an error is reopened with exponential
+    backoff, while one Retell closes normally ends the bridge.
+    """
+
+    def __init__(self, session_id: str, url: str, config_message: str, settings: RetellSettings,
+                 on_message: MessageHandler, stats: BridgeStats):
+        self.session_id = session_id
+        self.url = url
+        self.config_message = config_message
+        self.settings = settings
+        self.on_message = on_message
+        self.stats = stats
+        self.frames: deque = deque()
+        self.connected = False
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def closed(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def send_audio(self, frame: Union[bytes, memoryview]):
+        """Queue a frame for Retell, dropping the oldest queued one if the buffer is full."""
+        if len(self.frames) >= self.settings.buffer_frames:
+            self.frames.popleft()
+            self.stats.dropped.inc()
+        self.frames.append(frame)
+        self._ready.set()
+
+    async def _run(self):
+        websockets = startup_report.import_module("websockets")
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(
+                    self.url,
+                    open_timeout=self.settings.connect_timeout,
+                    ping_interval=self.settings.heartbeat_interval,
+                    ping_timeout=self.settings.heartbeat_timeout,
+                    max_size=None
+                ) as websocket:
+                    await websocket.send(self.config_message)
+                    self.connected = True
+                    self.stats.connects.inc()
+                    attempt = 0
+                    logger.info("Retell connection for session {} open", self.session_id)
+                    await self._pump(websocket)
+                # Retell ended the conversation
+                logger.info("Retell closed the connection for session {}", self.session_id)
+                return
+            except Exception as e:
+                logger.warning("Retell connection for session {} lost: {}", self.session_id, e)
+            finally:
+                self.connected = False
+            delay = min(self.settings.reconnect_max, self.settings.reconnect_initial * 2 ** attempt)
+            attempt += 1
+            self.stats.reconnects.inc()
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _pump(self, websocket):
+        """Forward queued audio and deliver Retell's messages until the connection closes."""
+        sender = asyncio.get_running_loop().create_task(self._send(websocket))
+        try:
+            async for message in websocket:
+                self.stats.received.inc()
+                try:
+                    await self.on_message(message)
+                except Exception as e:
+                    logger.error("Handling Retell message for session {} failed: {}", self.session_id, e)
+        finally:
+            sender.cancel()
+            try:
+                await sender
+            except asyncio.CancelledError:
+                pass
+
+    async def _send(self, websocket):
+        websockets = startup_report.import_module("websockets")
+        while True:
+            while self.frames:
+                frame = self.frames.popleft()
+                try:
+                    await websocket.send(frame)
+                except websockets.ConnectionClosed:
+                    # Sent again after reconnecting
+                    self.frames.appendleft(frame)
+                    return
+                self.stats.forwarded.inc()
+            self._ready.clear()
+            await self._ready.wait()
+
+    async def close(self):
+        """Close the connection and stop reconnecting."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+class RetellBridge:
+    """One managed Retell connection per session."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self.connections: Dict[str, RetellConnection] = {}
+        self.counters = BridgeStats()
+
+    def open(self, session_id: str, settings: RetellSettings, config_message: str,
+             on_message: MessageHandler) -> RetellConnection:
+        """Start a session's connection, replacing any it already has."""
+        self.release(session_id)
+        url = f"{settings.url}?api_key={self.api_key}" if self.api_key else settings.url
+        connection = RetellConnection(session_id, url, config_message, settings, on_message, self.counters)
+        self.connections[session_id] = connection
+        connection.start()
+        return connection
+
+    def get(self, session_id: Optional[str]) -> Optional[RetellConnection]:
+        return self.connections.get(session_id)
+
+    def release(self, session_id: str):
+        """Close a session's connection in the background."""
+        connection = self.connections.pop(session_id, None)
+        if connection is not None:
+            asyncio.get_running_loop().create_task(connection.close())
+
+    async def close_all(self):
+        connections = list(self.connections.values())
+        self.connections.clear()
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+    def stats(self) -> Dict:
+        stats = self.counters
+        return {
+            "connections": len(self.connections),
+            "connected": sum(connection.connected for connection in self.connections.values()),
+            "connects": stats.connects.value,
+            "reconnects": stats.reconnects.value,
+            "frames_forwarded": stats.forwarded.value,
+            "frames_dropped": stats.dropped.value,
+            "messages_received": stats.received.value
+        }
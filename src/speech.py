@@ -1,48 +1,59 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 import asyncio
-from deepgram import Deepgram
 import numpy as np
-from dataclasses import dataclass
 from loguru import logger
 import os
-
-@dataclass
-class TranscriptionResult:
-    text: str
-    is_final: bool
-    confidence: float
-    language: str
+from src.messages import TranscriptionResult
+from src.utils.settings import ProviderSettings, provider_settings
+from src.utils.startup import startup_report
 
 class SpeechRecognizer:
-    def __init__(self, config: Dict):
-        self.config = config
-        self.provider = config["default_provider"]
-        self.deepgram_client = None
+    def __init__(self, config: Union[Dict, ProviderSettings]):
+        self.configure(provider_settings("speech_recognition", config))
+        self.client = None
         self.is_initialized = False
+
+    def configure(self, settings: ProviderSettings):
+        """Use new provider settings for transcriptions that start from now on."""
+        self.settings = settings
+        self.provider = settings.default_provider
+        self.language = settings.provider.language
+        self.model = settings.provider.model
+        # Request options are built once rather than on every transcription
+        self.options = self._build_options(settings)
+
+    def _build_options(self, settings: ProviderSettings) -> Dict:
+        provider = settings.provider
+        return {
+            "model": provider.model,
+            "language": provider.language,
+            "interim_results": provider.interim_results,
+            "punctuate": provider.punctuate,
+            "diarize": provider.diarize
+        }
         
     async def initialize(self):
         """Initialize speech recognition clients."""
         try:
-            self.provider = self.config.get("default_provider", "deepgram")
-            self.language = self.config["providers"][self.provider]["language"]
-            self.model = self.config["providers"][self.provider]["model"]
-            
-            # Initialize Deepgram client
-            self.client = Deepgram(os.getenv("DEEPGRAM_API_KEY"))
+            # Initialize Deepgram client; the SDK is only imported when it is the configured provider
+            deepgram = startup_report.import_module("deepgram")
+            self.client = deepgram.Deepgram(os.getenv("DEEPGRAM_API_KEY"))
             self.is_initialized = True
             logger.info(f"Speech recognizer initialized with provider: {self.provider}")
         except Exception as e:
             logger.error(f"Failed to initialize speech recognizer: {str(e)}")
             raise
             
-    async def transcribe(self, audio_data: np.ndarray) -> TranscriptionResult:
-        """Transcribe audio data to text."""
+    async def transcribe(self, audio_data: np.ndarray,
+                         settings: Optional[ProviderSettings] = None) -> TranscriptionResult:
+        """Transcribe audio data to text, with `settings` if a turn captured older ones."""
         if not self.is_initialized:
             raise RuntimeError("Speech recognizer not initialized")
             
         try:
             if self.provider == "deepgram":
-                return await self._transcribe_deepgram(audio_data)
+                options = self.options if settings is None or settings is self.settings else self._build_options(settings)
+                return await self._transcribe_deepgram(audio_data, options)
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
                 
@@ -50,23 +61,14 @@ class SpeechRecognizer:
             logger.error(f"Transcription error: {str(e)}")
             raise
             
-    async def _transcribe_deepgram(self, audio_data: np.ndarray) -> TranscriptionResult:
+    async def _transcribe_deepgram(self, audio_data: np.ndarray, options: Dict) -> TranscriptionResult:
         """Transcribe using Deepgram."""
         try:
             # Convert numpy array to bytes
             audio_bytes = (audio_data * 32767).astype(np.int16).tobytes()
             
-            # Get transcription options from config
-            options = {
-                "model": self.config["providers"]["deepgram"]["model"],
-                "language": self.config["providers"]["deepgram"]["language"],
-                "interim_results": self.config["providers"]["deepgram"]["interim_results"],
-                "punctuate": self.config["providers"]["deepgram"]["punctuate"],
-                "diarize": self.config["providers"]["deepgram"]["diarize"]
-            }
-            
             # Send audio to Deepgram
-            response = await self.deepgram_client.transcription.prerecorded(
+            response = await self.client.transcription.prerecorded(
                 {"buffer": audio_bytes, "mimetype": "audio/raw"},
                 options
             )
@@ -78,13 +80,18 @@ class SpeechRecognizer:
                 text=result["transcript"],
                 is_final=True,  # For pre-recorded audio, always final
                 confidence=result["confidence"],
-                language=self.config["providers"]["deepgram"]["language"]
+                language=options["language"]
             )
             
         except Exception as e:
             logger.error(f"Deepgram transcription error: {str(e)}")
             raise
             
+    async def cleanup(self):
+        """Release the provider client."""
+        self.client = None
+        self.is_initialized = False
+
     def health_check(self) -> Dict:
         """Check the health of the speech recognition service."""
         return {
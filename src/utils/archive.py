@@ -0,0 +1,223 @@
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from loguru import logger
+from src.utils.metrics import Counter
+from src.utils.settings import ArchiveSettings
+
+# Queue item kinds
+_AUDIO, _EVENT, _CLOSE = range(3)
+
+# 16-bit mono PCM WAV header: RIFF size, sample rate, byte rate, data size
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+def _wav_header(sample_rate: int, data_bytes: int) -> bytes:
+    return WAV_HEADER.pack(b"RIFF", WAV_HEADER.size - 8 + data_bytes, b"WAVE", b"fmt ", 16, 1, 1,
+                           sample_rate, sample_rate * 2, 2, 16, b"data", data_bytes)
+
+class _Track:
+    """One direction of a session's audio, written as numbered WAV segments."""
+
+    def __init__(self, directory: str, name: str, sample_rate: int, segment_seconds: float):
+        self.directory = directory
+        self.name = name
+        self.sample_rate = sample_rate
+        self.segment_frames = int(segment_seconds * sample_rate)
+        self.segment = 0
+        self.frames = 0
+        self.file = None
+
+    def write(self, pcm: bytes):
+        if self.file is None:
+            # A session resumed on this node continues after its existing segments
+            path = os.path.join(self.directory, f"{self.name}-{self.segment:04d}.wav")
+            while os.path.exists(path):
+                self.segment += 1
+                path = os.path.join(self.directory, f"{self.name}-{self.segment:04d}.wav")
+            self.file = open(path, "wb")
+            self.file.write(_wav_header(self.sample_rate, 0))
+        # The header's sizes are patched on sync and close, not on every write
+        self.file.write(pcm)
+        self.frames += len(pcm) // 2
+        if self.frames >= self.segment_frames:
+            self.close()
+            self.segment += 1
+
+    def _patch_header(self):
+        self.file.seek(0)
+        self.file.write(_wav_header(self.sample_rate, self.frames * 2))
+        self.file.seek(0, os.SEEK_END)
+
+    def sync(self):
+        """Make the segment readable as it stands, even if the process dies before it closes."""
+        if self.file is not None:
+            self._patch_header()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self._patch_header()
+            self.file.close()
+            self.file = None
+            self.frames = 0
+
+class _SessionArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.tracks: Dict[Tuple[str, int], _Track] = {}
+        self.transcript = open(os.path.join(directory, "transcript.jsonl"), "a")
+        self.started_at = time.time()
+
+    def close(self):
+        for track in self.tracks.values():
+            track.close()
+        self.transcript.close()
+
+class Archiver:
+    """Archives conversation audio and transcripts without touching turn latency.
+
+    The pipeline only appends to a bounded queue; a background thread writes
+    each session to `<directory>/<session_id>/`: inbound and outbound audio as
+    WAV segments of `segment_seconds`, and a `transcript.jsonl` of what was
+    said. Files are fsynced every `fsync_interval` seconds. When the queue is
+    full, items are dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, settings: ArchiveSettings):
+        self.settings = settings
+        self.queue: "queue.Queue" = queue.Queue(maxsize=settings.queue_size)
+        self.sessions: Dict[str, _SessionArchive] = {}
+        self.dropped = Counter("archive_dropped")
+        self.written = Counter("archive_items_written")
+        # Items accepted into the queue, counted by the caller, and taken off it by the writer thread
+        self.queued = 0
+        self.taken = 0
+        # (session ID, items queued before its close) for closes that didn't fit in a full queue
+        self.closing: deque = deque()
+        self._thread: Optional[threading.Thread] = None
+
+    def _put(self, item: tuple):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped.inc()
+        else:
+            self.queued += 1
+
+    def audio(self, session_id: Optional[str], direction: str, audio: Any, sample_rate: int):
+        """Queue float32 samples or int16 PCM bytes heard ("in") or spoken ("out") in a session."""
+        if session_id is not None:
+            self._put((_AUDIO, session_id, time.time(), (direction, audio, sample_rate)))
+
+    def event(self, session_id: Optional[str], kind: str, **data):
+        """Queue a transcript line, such as a transcription or a reply."""
+        if session_id is not None:
+            self._put((_EVENT, session_id, time.time(), (kind, data)))
+
+    def close_session(self, session_id: str):
+        """Close a session's files once everything queued before is written."""
+        try:
+            self.queue.put_nowait((_CLOSE, session_id, time.time(), None))
+        except queue.Full:
+            # Never dropped, or the session's files would stay open. It runs once the items
+            # queued before it are written, whether or not the queue ever empties
+            self.closing.append((session_id, self.queued))
+        else:
+            self.queued += 1
+
+    def start(self):
+        """Start the writer thread."""
+        if self._thread is None:
+            os.makedirs(self.settings.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write what is queued, close every file and stop the writer thread."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _session(self, session_id: str) -> _SessionArchive:
+        archive = self.sessions.get(session_id)
+        if archive is None:
+            name = re.sub(r"[^\w-]", "_", session_id)
+            archive = self.sessions[session_id] = _SessionArchive(os.path.join(self.settings.directory, name))
+        return archive
+
+    def _write(self, kind: int, session_id: str, timestamp: float, payload: Any):
+        if kind == _CLOSE:
+            archive = self.sessions.pop(session_id, None)
+            if archive is not None:
+                archive.close()
+            return
+        archive = self._session(session_id)
+        if kind == _AUDIO:
+            direction, audio, sample_rate = payload
+            if isinstance(audio, np.ndarray):
+                audio = (np.clip(audio.reshape(-1), -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            track = archive.tracks.get((direction, sample_rate))
+            if track is None:
+                track = archive.tracks[(direction, sample_rate)] = _Track(
+                    archive.directory, f"{direction}-{sample_rate}", sample_rate, self.settings.segment_seconds
+                )
+            track.write(audio)
+        else:
+            event, data = payload
+            line = {"time": round(timestamp - archive.started_at, 3), "event": event, **data}
+            archive.transcript.write(json.dumps(line) + "\n")
+        self.written.inc()
+
+    def _sync(self):
+        for archive in self.sessions.values():
+            archive.transcript.flush()
+            os.fsync(archive.transcript.fileno())
+            for track in archive.tracks.values():
+                track.sync()
+
+    def _run(self):
+        next_sync = time.monotonic() + self.settings.fsync_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, next_sync - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                self.taken += 1
+                try:
+                    self._write(*item)
+                except Exception as e:
+                    logger.error("Archiving for session {} failed: {}", item[1], e)
+            # The queue is first in, first out, so these sessions have nothing left in it
+            while self.closing and self.closing[0][1] <= self.taken:
+                self._write(_CLOSE, self.closing.popleft()[0], 0.0, None)
+            if time.monotonic() >= next_sync:
+                try:
+                    self._sync()
+                except OSError as e:
+                    logger.error("Archive fsync failed: {}", e)
+                next_sync = time.monotonic() + self.settings.fsync_interval
+        for archive in self.sessions.values():
+            archive.close()
+        self.sessions.clear()
+        self.closing.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped.value,
+            "written": self.written.value,
+            "open_sessions": len(self.sessions)
+        }
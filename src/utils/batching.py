@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+from src.utils.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class FrameBatcher:
+    """Collects items submitted within a short window and processes them in one call.
+
+    The window adapts to load. When fewer than two items are expected within
+    `max_window`, a batch is flushed on the next loop iteration, so a lightly
+    loaded server adds no latency but still coalesces frames that arrive
+    together. Under load the window grows to the time needed to collect
+    `target_batch` items, capped at `max_window`; a batch of `max_batch`
+    flushes immediately. `process_batch` may return an exception in place of
+    an item's result to fail that item alone.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_window: float = 0.004,
+                 max_batch: int = 64, target_batch: int = 16):
+        self.process_batch = process_batch
+        self.max_window = max_window
+        self.max_batch = max_batch
+        self.target_batch = target_batch
+        self.queue: List[tuple] = []
+        self.flush_handle: Optional[asyncio.Handle] = None
+        # EWMA of the time between submissions, in seconds
+        self.interval: Optional[float] = None
+        self.last_submit: Optional[float] = None
+        self.batch_sizes = Histogram("dsp_batch_size", BATCH_SIZE_BUCKETS)
+
+    @property
+    def window(self) -> float:
+        """Current batching window in seconds."""
+        if not self.interval or self.max_window / self.interval < 2:
+            return 0.0
+        return min(self.max_window, self.target_batch * self.interval)
+
+    def _record_arrival(self, now: float):
+        if self.last_submit is not None:
+            interval = now - self.last_submit
+            self.interval = interval if self.interval is None else self.interval + 0.1 * (interval - self.interval)
+        self.last_submit = now
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        self._record_arrival(time.monotonic())
+        future = loop.create_future()
+        self.queue.append((item, future))
+
+        if len(self.queue) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            window = self.window
+            if window:
+                self.flush_handle = loop.call_later(window, self._flush)
+            else:
+                self.flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.queue = self.queue, []
+        if not batch:
+            return
+        self.batch_sizes.observe(len(batch))
+
+        try:
+            results = self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batch size distribution and current window."""
+        return {
+            "window_ms": self.window * 1000,
+            "mean_batch": self.batch_sizes.total / self.batch_sizes.count if self.batch_sizes.count else 0.0,
+            "batch_size": self.batch_sizes.snapshot()
+        }
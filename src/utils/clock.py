@@ -0,0 +1,16 @@
+import asyncio
+import time
+from typing import Callable
+
+class LoopClock:
+    """Monotonic time and timers on the running event loop.
+
+    Turn timing that decides what the pipeline does (debounce merges, endpoint
+    timers) reads this clock, so a replay can substitute the recorded timeline.
+    """
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> asyncio.TimerHandle:
+        return asyncio.get_running_loop().call_later(delay, callback, *args)
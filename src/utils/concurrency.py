@@ -0,0 +1,185 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from loguru import logger
+from src.utils.exceptions import ProviderOverloadedError
+from src.utils.metrics import Counter, Histogram
+from src.utils.rate_limit import ClientLimits
+from src.utils.settings import ConcurrencySettings, ProviderLimitSettings
+
+# WebSocket close codes (RFC 6455)
+WS_CLOSE_UNSUPPORTED_DATA = 1003
+WS_CLOSE_POLICY_VIOLATION = 1008
+WS_CLOSE_SERVICE_RESTART = 1012
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+DEFAULT_PROVIDER_LIMITS = {
+    "max_concurrency": 20,
+    "max_queue": 100,
+}
+
+class ProviderLimiter:
+    """Bound the number of in-flight requests to a single provider."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float,
+                 ewma_alpha: float = 0.2):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.ewma_alpha = ewma_alpha
+        self.in_flight = 0
+        self.waiting = 0
+        self.service_time_ms = 0.0
+        self.queue_wait = Histogram(f"{name}_queue_wait_ms")
+        self.rejected = Counter(f"{name}_rejected")
+        # Created lazily so the semaphore binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Wait for a free slot, then hold it for the duration of the block."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Requests keep the semaphore they queued on, even if the limit is changed meanwhile
+        semaphore = self._semaphore
+
+        if self.waiting >= self.max_queue:
+            self.rejected.inc()
+            raise ProviderOverloadedError(f"{self.name} queue is full ({self.waiting} waiting)")
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected.inc()
+            raise ProviderOverloadedError(
+                f"Timed out after {self.queue_timeout}s waiting for {self.name}"
+            )
+        finally:
+            self.waiting -= 1
+
+        started_at = time.monotonic()
+        self.queue_wait.observe((started_at - queued_at) * 1000)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+            elapsed_ms = (time.monotonic() - started_at) * 1000
+            if self.service_time_ms == 0.0:
+                self.service_time_ms = elapsed_ms
+            else:
+                self.service_time_ms += self.ewma_alpha * (elapsed_ms - self.service_time_ms)
+
+    def configure(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        """Change limits for requests that arrive from now on.
+
+        Requests already holding or waiting for a slot finish under the old
+        limit, so in-flight work can briefly exceed a lowered limit.
+        """
+        if max_concurrency != self.max_concurrency:
+            self._semaphore = None
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+    def projected_latency_ms(self) -> float:
+        """Estimate queue wait plus service time for a request issued now."""
+        backlog = self.in_flight + self.waiting + 1 - self.max_concurrency
+        wait_ms = 0.0
+        if backlog > 0:
+            wait_ms = backlog / self.max_concurrency * self.service_time_ms
+        return wait_ms + self.service_time_ms
+
+    def stats(self) -> Dict:
+        """Return limiter state and queue-wait histogram."""
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "service_time_ms": round(self.service_time_ms, 2),
+            "rejected": self.rejected.value,
+            "queue_wait_ms": self.queue_wait.snapshot(),
+        }
+
+@dataclass
+class AdmissionDecision:
+    """Whether a connection may start; if not, the close code it is sent after the handshake."""
+
+    admitted: bool
+    code: int = 1000
+    reason: str = ""
+
+class AdmissionController:
+    """Decide whether a new conversation may start given provider load and client limits."""
+
+    def __init__(self, limiters: Dict[str, ProviderLimiter], latency_budget_ms: float,
+                 client_limits: ClientLimits):
+        self.limiters = limiters
+        self.latency_budget_ms = latency_budget_ms
+        self.client_limits = client_limits
+        self.rejected_overload = Counter("admission_rejected_overload")
+        self.rejected_client = Counter("admission_rejected_client")
+
+    def projected_latency_ms(self, providers: Iterable[str]) -> float:
+        """Projected end-to-end latency of a turn through the given providers."""
+        return sum(
+            self.limiters[name].projected_latency_ms()
+            for name in providers if name in self.limiters
+        )
+
+    def admit(self, client_id: str, providers: Iterable[str],
+              origin: Optional[str] = None) -> AdmissionDecision:
+        """Check client allowlist/limits and projected latency for a new connection."""
+        reason = self.client_limits.check_connection(client_id, origin)
+        if reason:
+            self.rejected_client.inc()
+            logger.warning(f"Rejected connection from {client_id}: {reason}")
+            return AdmissionDecision(False, WS_CLOSE_POLICY_VIOLATION, reason)
+
+        projected = self.projected_latency_ms(providers)
+        if self.latency_budget_ms > 0 and projected > self.latency_budget_ms:
+            self.rejected_overload.inc()
+            logger.warning(
+                f"Rejected connection from {client_id}: projected latency "
+                f"{projected:.0f}ms exceeds budget {self.latency_budget_ms:.0f}ms"
+            )
+            return AdmissionDecision(False, WS_CLOSE_TRY_AGAIN_LATER, "Server overloaded")
+
+        return AdmissionDecision(True)
+
+    def stats(self) -> Dict:
+        """Return admission counters and per-provider limiter stats."""
+        return {
+            "latency_budget_ms": self.latency_budget_ms,
+            "rejected_overload": self.rejected_overload.value,
+            "rejected_client": self.rejected_client.value,
+            "rate_limit_buckets": self.client_limits.stats(),
+            "providers": {name: limiter.stats() for name, limiter in self.limiters.items()},
+        }
+
+def build_limiters(config: Dict, providers: Iterable[str]) -> Dict[str, ProviderLimiter]:
+    """Create one limiter per provider from the `concurrency` config section."""
+    provider_config = config.get("providers", {})
+    queue_timeout = config.get("queue_timeout", 5.0)
+    limiters = {}
+    for name in providers:
+        settings = {**DEFAULT_PROVIDER_LIMITS, **provider_config.get(name, {})}
+        limiters[name] = ProviderLimiter(
+            name,
+            max_concurrency=settings["max_concurrency"],
+            max_queue=settings["max_queue"],
+            queue_timeout=queue_timeout,
+        )
+    return limiters
+
+def configure_limiters(limiters: Dict[str, ProviderLimiter], settings: ConcurrencySettings):
+    """Apply new `concurrency` settings to existing limiters."""
+    for name, limiter in limiters.items():
+        limits = settings.providers.get(name, ProviderLimitSettings())
+        limiter.configure(limits.max_concurrency, limits.max_queue, settings.queue_timeout)
@@ -0,0 +1,8 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# Session whose frame or turn is running in the current task; set by RetellAgent
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+
+# Turn being answered in the current task
+current_turn: ContextVar[Optional[str]] = ContextVar("current_turn", default=None)
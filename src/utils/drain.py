@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+from loguru import logger
+from src.messages import Reconnect
+from src.utils.concurrency import WS_CLOSE_SERVICE_RESTART
+from src.utils.session import SessionManager
+from src.utils.session_store import SessionStore
+
+class DrainController:
+    """Drain live conversations before shutdown.
+
+    Once draining, new connections are refused and each open session is closed
+    as soon as it has no turn in flight. Sessions still busy at the deadline are
+    closed regardless. If a session store is configured, session state is saved
+    first and the client is told which session ID to resume on reconnect.
+    """
+
+    def __init__(self, session_manager: SessionManager, connections: Dict,
+                 export_state: Callable[[str], Dict], session_store: Optional[SessionStore] = None,
+                 timeout: float = 30.0, poll_interval: float = 0.1):
+        self.session_manager = session_manager
+        self.connections = connections
+        self.export_state = export_state
+        self.session_store = session_store
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.is_draining = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Begin draining. Safe to call more than once."""
+        if self._task is None:
+            self.is_draining = True
+            self._task = asyncio.create_task(self._drain())
+        return self._task
+
+    async def _drain(self):
+        deadline = time.monotonic() + self.timeout
+        logger.info(f"Draining {len(self.connections)} sessions (timeout {self.timeout}s)")
+
+        while self.connections and time.monotonic() < deadline:
+            for session_id in list(self.connections):
+                if not self.session_manager.is_busy(session_id):
+                    await self._hand_off(session_id)
+            if self.connections:
+                await asyncio.sleep(self.poll_interval)
+
+        if self.connections:
+            logger.warning(f"Drain deadline reached with {len(self.connections)} sessions busy")
+            for session_id in list(self.connections):
+                await self._hand_off(session_id)
+
+        logger.info("Drain complete")
+
+    async def _hand_off(self, session_id: str):
+        websocket = self.connections.pop(session_id, None)
+        if websocket is None:
+            return
+
+        resumable = False
+        if self.session_store is not None:
+            try:
+                await self.session_store.save(session_id, self.export_state(session_id))
+                resumable = True
+            except Exception as e:
+                logger.error(f"Failed to save session {session_id} for hand-off: {str(e)}")
+
+        try:
+            if resumable:
+                await websocket.send_json(Reconnect(session_id=session_id))
+            await websocket.close(code=WS_CLOSE_SERVICE_RESTART, reason="Server restarting")
+        except Exception as e:
+            logger.debug(f"Error closing drained session {session_id}: {str(e)}")
@@ -33,3 +33,15 @@ class APIKeyError(VoiceAgentError):
 class ConnectionError(VoiceAgentError):
     """Raised when there's a connection issue with external services."""
     pass
+
+class ProviderOverloadedError(VoiceAgentError):
+    """Raised when a provider's concurrency queue is full or the wait times out."""
+    pass
+
+class RateLimitError(VoiceAgentError):
+    """Raised when a client exceeds its rate limit."""
+    pass
+
+class MessageError(VoiceAgentError):
+    """Raised when a client message doesn't match any message schema."""
+    pass
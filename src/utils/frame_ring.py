@@ -0,0 +1,58 @@
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Optional
+import numpy as np
+
+class FrameRing:
+    """Fixed-size frame slots in shared memory.
+
+    The creating process owns the slots: it takes a free slot, writes a frame
+    into it and passes only the slot index to the attached process, which
+    reads the frame and writes its result back into the same slot. Slots are
+    recycled in FIFO order. Attach only from processes started by the owner,
+    which share its resource tracker, so the segment is unlinked exactly once.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * slot_bytes)
+        self.frames = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=self.memory.buf)
+        self.free = deque(range(slots)) if self.owner else deque()
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def acquire(self) -> Optional[int]:
+        """Take a free slot, or None if all slots are in flight."""
+        return self.free.popleft() if self.free else None
+
+    def release(self, slot: int):
+        """Return a slot to the free list."""
+        self.free.append(slot)
+
+    def write(self, slot: int, data) -> int:
+        """Copy bytes or an array into a slot and return its length in bytes."""
+        if isinstance(data, np.ndarray):
+            raw = np.ascontiguousarray(data).view(np.uint8).reshape(-1)
+        else:
+            raw = np.frombuffer(data, dtype=np.uint8)
+        self.frames[slot, :len(raw)] = raw
+        return len(raw)
+
+    def read(self, slot: int, length: int) -> bytes:
+        """Copy the first `length` bytes of a slot."""
+        return self.frames[slot, :length].tobytes()
+
+    def array(self, slot: int, length: int, dtype=np.float32) -> np.ndarray:
+        """Copy a slot out as an array."""
+        return self.frames[slot, :length].view(dtype).copy()
+
+    def close(self):
+        """Detach from the shared memory, removing it if this process created it."""
+        self.frames = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
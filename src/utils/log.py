@@ -0,0 +1,107 @@
+import json
+import sys
+import time
+from typing import Dict, List
+from loguru import logger
+from src.utils.context import current_session, current_turn
+from src.utils.settings import MonitoringSettings
+
+# Lowest level any configured sink accepts; loguru's default stderr sink takes DEBUG
+_min_level = logger.level("DEBUG").no
+
+# Sampling of high-frequency events, set from the monitoring config
+_sampling = {"rate": 5.0, "sample": 100}
+
+# Record fields that are part of the JSON line itself rather than `extra`
+_RESERVED = ("session_id", "turn_id", "json")
+
+def _add_context(record: Dict):
+    record["extra"].setdefault("session_id", current_session.get())
+    record["extra"].setdefault("turn_id", current_turn.get())
+
+def _json_format(record: Dict) -> str:
+    """One JSON object per line with the session and turn the record was logged in."""
+    line = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "session_id": record["extra"].get("session_id"),
+        "turn_id": record["extra"].get("turn_id"),
+    }
+    line.update((key, value) for key, value in record["extra"].items() if key not in _RESERVED)
+    if record["exception"] is not None:
+        line["exception"] = f"{record['exception'].type.__name__}: {record['exception'].value}"
+    record["extra"]["json"] = json.dumps(line, default=str)
+    return "{extra[json]}\n"
+
+def _text_format(record: Dict) -> str:
+    context = " [{extra[session_id]}]" if record["extra"].get("session_id") else ""
+    return ("<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan>" + context +
+            " - <level>{message}</level>\n{exception}")
+
+def configure_logging(settings: MonitoringSettings) -> List[int]:
+    """Replace loguru's sinks with background-written ones, returning their handler IDs.
+
+    Sinks are written from a queue by a background thread, so a slow disk or
+    terminal never blocks the event loop. Every record carries the session and
+    turn it was logged in.
+    """
+    global _min_level
+    logger.remove()
+    logger.configure(patcher=_add_context)
+    level = settings.log_level.upper()
+    formatter = _json_format if settings.log_json else _text_format
+    handlers = [logger.add(sys.stderr, level=level, format=formatter, enqueue=True)]
+    if settings.log_file:
+        handlers.append(logger.add(
+            settings.log_file,
+            level=level,
+            format=formatter,
+            rotation=settings.log_rotation,
+            retention=settings.log_retention,
+            enqueue=True
+        ))
+    _min_level = logger.level(level).no
+    _sampling["rate"] = settings.log_sample_rate
+    _sampling["sample"] = settings.log_sample_every
+    return handlers
+
+class SampledLog:
+    """A high-frequency log event, such as one per audio frame.
+
+    Levels no sink accepts are skipped before anything is formatted. Otherwise
+    up to `log_sample_rate` records per second get through, and beyond that one
+    in `log_sample_every`, carrying how many were suppressed since the last.
+    Messages use loguru's deferred `{}` formatting.
+    """
+
+    def __init__(self, event: str, level: str = "DEBUG"):
+        self.event = event
+        self.level = level
+        self.level_no = logger.level(level).no
+        self.tokens = _sampling["rate"]
+        self.updated = time.monotonic()
+        # Records over the rate, and those of them not let through by sampling since the last record
+        self.skipped = 0
+        self.suppressed = 0
+
+    def __call__(self, message: str, *args, **kwargs):
+        if self.level_no < _min_level:
+            return
+        now = time.monotonic()
+        rate = _sampling["rate"]
+        self.tokens = min(rate, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+        else:
+            self.skipped += 1
+            if self.skipped % _sampling["sample"]:
+                self.suppressed += 1
+                return
+        suppressed, self.suppressed = self.suppressed, 0
+        logger.opt(depth=1).bind(event=self.event, suppressed=suppressed).log(self.level, message, *args, **kwargs)
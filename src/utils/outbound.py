@@ -0,0 +1,181 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from src.messages import Batch, TranscriptionResult, encode
+from src.utils.concurrency import WS_CLOSE_POLICY_VIOLATION
+from src.utils.metrics import Counter, Histogram
+from src.utils.settings import OutboundSettings
+
+# Queue item kinds; interim transcripts may be superseded or dropped
+_JSON, _BYTES, _INTERIM = range(3)
+
+class OutboundStats:
+    """Queue depth and drops across every connection's outbound queue."""
+
+    def __init__(self):
+        self.queues: "weakref.WeakSet[OutboundQueue]" = weakref.WeakSet()
+        self.superseded = Counter("outbound_interim_superseded")
+        self.dropped = Counter("outbound_interim_dropped")
+        self.batches = Counter("outbound_batches")
+        self.slow_disconnects = Counter("outbound_slow_disconnects")
+        # Queued bytes seen by each enqueue
+        self.depth = Histogram("outbound_queue_bytes", buckets=(0, 1024, 4096, 16384, 65536, 262144, 1048576))
+
+    def snapshot(self) -> Dict:
+        queues = list(self.queues)
+        return {
+            "connections": len(queues),
+            "queued_items": sum(len(q.items) for q in queues),
+            "queued_bytes": sum(q.queued_bytes for q in queues),
+            "interim_superseded": self.superseded.value,
+            "interim_dropped": self.dropped.value,
+            "batches": self.batches.value,
+            "slow_disconnects": self.slow_disconnects.value,
+            "depth_bytes": self.depth.snapshot()
+        }
+
+class OutboundQueue:
+    """A connection's bounded send queue, drained by a dedicated writer task.
+
+    It has the websocket's send_json/send_bytes/close interface, but sending only
+    enqueues, so a client that reads slowly stalls its own writer rather than
+    the session's STT/LLM pipeline. Only the latest interim transcript is kept,
+    and none while the queue is congested, so audio and final messages go
+    first. A client whose backlog exceeds `max_queue_bytes` or
+    `max_queue_delay_ms` is disconnected.
+    """
+
+    def __init__(self, websocket, settings: OutboundSettings, stats: Optional[OutboundStats] = None):
+        self.websocket = websocket
+        self.settings = settings
+        self.stats = stats or OutboundStats()
+        self.stats.queues.add(self)
+        # [kind, payload, size, enqueued_at]; lists so a pending interim can be replaced in place
+        self.items: deque = deque()
+        self.queued_bytes = 0
+        self.pending_interim: Optional[list] = None
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def send_json(self, message: Any):
+        """Queue a message (a schema from src.messages), encoded when the writer sends it."""
+        kind = _JSON
+        if isinstance(message, TranscriptionResult) and not message.is_final:
+            kind = _INTERIM
+            if self.pending_interim is not None:
+                # Only the latest interim transcript is worth sending
+                self.pending_interim[1] = message
+                self.stats.superseded.inc()
+                return
+            if self.queued_bytes >= self.settings.congestion_bytes:
+                self.stats.dropped.inc()
+                return
+        # Control messages are counted at a nominal size
+        self._enqueue(kind, message, 64)
+
+    async def send_bytes(self, data: bytes):
+        """Queue a binary (audio) frame."""
+        self._enqueue(_BYTES, data, len(data))
+
+    def _enqueue(self, kind: int, payload: Any, size: int):
+        if self.closed:
+            return
+        item = [kind, payload, size, time.monotonic()]
+        self.items.append(item)
+        self.queued_bytes += size
+        if kind == _INTERIM:
+            self.pending_interim = item
+        self.stats.depth.observe(self.queued_bytes)
+        self._ready.set()
+
+        lag_ms = (item[3] - self.items[0][3]) * 1000
+        if self.queued_bytes > self.settings.max_queue_bytes or lag_ms > self.settings.max_queue_delay_ms:
+            self._disconnect(f"{self.queued_bytes} bytes queued, oldest {lag_ms:.0f}ms ago")
+
+    def _disconnect(self, reason: str):
+        """Drop the backlog of a client that can't keep up and close its connection."""
+        self.closed = True
+        self.items.clear()
+        self.queued_bytes = 0
+        self.pending_interim = None
+        self.stats.slow_disconnects.inc()
+        logger.warning("Disconnecting slow client: {}", reason)
+        asyncio.get_running_loop().create_task(self._close_slow())
+
+    async def _close_slow(self):
+        try:
+            await self.websocket.close(code=WS_CLOSE_POLICY_VIOLATION, reason="Client too slow")
+        except Exception as e:
+            logger.debug("Error closing slow client: {}", e)
+
+    def _pop(self) -> list:
+        item = self.items.popleft()
+        self.queued_bytes -= item[2]
+        if item is self.pending_interim:
+            self.pending_interim = None
+        return item
+
+    def _next_message(self):
+        """The next frame to send, coalescing adjacent control messages if enabled."""
+        kind, payload, _, _ = self._pop()
+        if kind == _BYTES or not self.settings.coalesce_control:
+            return kind, payload
+        batch: List[Any] = [payload]
+        while self.items and self.items[0][0] != _BYTES and len(batch) < self.settings.max_batch:
+            batch.append(self._pop()[1])
+        if len(batch) == 1:
+            return kind, payload
+        self.stats.batches.inc()
+        return _JSON, Batch(tuple(batch))
+
+    async def _write(self):
+        try:
+            while True:
+                if not self.items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                kind, payload = self._next_message()
+                if kind == _BYTES:
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(encode(payload))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The connection is gone; the receive loop ends the session
+            self.closed = True
+            logger.debug("Outbound writer stopped: {}", e)
+
+    async def flush(self, timeout: float = 1.0):
+        """Wait up to `timeout` seconds for what is queued to be sent."""
+        deadline = time.monotonic() + timeout
+        while (self.items and not self.closed and self._writer is not None and not self._writer.done()
+               and time.monotonic() < deadline):
+            await asyncio.sleep(0.01)
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None):
+        """Close the connection after what is already queued."""
+        await self.flush()
+        self.closed = True
+        await self.websocket.close(code=code, reason=reason)
+
+    async def stop(self):
+        """Stop the writer, discarding anything still queued."""
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
@@ -0,0 +1,216 @@
+import ipaddress
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from loguru import logger
+
+class TokenBucket:
+    """Token bucket refilled lazily on each check."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated_at = now
+
+class TokenBucketTable:
+    """Keyed token buckets with O(1) checks and amortized idle-bucket compaction.
+
+    Buckets are kept in least-recently-used order, so every bucket that has been
+    idle long enough to refill completely sits at the front of the table and can
+    be evicted without scanning the active ones.
+    """
+
+    def __init__(self, capacity: float, period: float, compact_every: int = 1024):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / period if period > 0 else 0.0
+        # Time for an empty bucket to refill; idle longer than this means "full"
+        self.idle_after = self.capacity / self.refill_rate if self.refill_rate > 0 else float("inf")
+        self.compact_every = compact_every
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._ops = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def allow(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take `cost` tokens from the bucket for `key` if available."""
+        if not self.enabled:
+            return True
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.capacity, now)
+            self.buckets[key] = bucket
+        else:
+            self.buckets.move_to_end(key)
+            elapsed = now - bucket.updated_at
+            if elapsed > 0:
+                bucket.tokens = min(self.capacity, bucket.tokens + elapsed * self.refill_rate)
+        bucket.updated_at = now
+
+        self._ops += 1
+        if self._ops >= self.compact_every:
+            self.compact(now)
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return True
+        return False
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Evict buckets that have refilled completely. Returns the number evicted."""
+        if now is None:
+            now = time.monotonic()
+        self._ops = 0
+        evicted = 0
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if now - bucket.updated_at < self.idle_after:
+                break
+            del self.buckets[key]
+            evicted += 1
+        return evicted
+
+    def remove(self, key: str):
+        """Drop the bucket for `key`."""
+        self.buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+class IPAllowlist:
+    """IP/CIDR allowlist with lookups bounded by the number of distinct prefix lengths."""
+
+    def __init__(self, entries: Iterable[str]):
+        # (version, prefix length) -> set of network addresses as integers
+        self.networks: Dict[Tuple[int, int], Set[int]] = {}
+        for entry in entries:
+            network = ipaddress.ip_network(str(entry), strict=False)
+            key = (network.version, network.prefixlen)
+            self.networks.setdefault(key, set()).add(int(network.network_address))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.networks)
+
+    def allows(self, host: str) -> bool:
+        """Return True if `host` is covered by the allowlist (or the list is empty)."""
+        if not self.enabled:
+            return True
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        value = int(address)
+        bits = address.max_prefixlen
+        for (version, prefixlen), addresses in self.networks.items():
+            if version != address.version:
+                continue
+            mask = ((1 << prefixlen) - 1) << (bits - prefixlen)
+            if value & mask in addresses:
+                return True
+        return False
+
+class ClientLimits:
+    """Per-IP and per-session limits configured from the `security` section.
+
+    - `rate_limit`: connections plus control messages per minute, per IP
+    - `session_limits.messages_per_minute`: websocket frames per minute, per session
+    - `session_limits.audio_seconds_per_minute`: audio per minute, per session and per IP
+    - `session_limits.max_sessions_per_ip`: concurrent sessions per IP
+    """
+
+    def __init__(self, config: Dict):
+        session_limits = config.get("session_limits", {})
+        audio_per_minute = session_limits.get("audio_seconds_per_minute", 0)
+        max_sessions_per_ip = session_limits.get("max_sessions_per_ip", 0)
+        self.max_sessions_per_ip = max_sessions_per_ip
+
+        self.allowlist = IPAllowlist(config.get("ip_whitelist") or [])
+        self.allowed_origins = set(config.get("allowed_origins") or ["*"])
+        self.ip_requests = TokenBucketTable(config.get("rate_limit", 0), 60.0)
+        self.ip_audio = TokenBucketTable(audio_per_minute * max(max_sessions_per_ip, 1), 60.0)
+        self.session_messages = TokenBucketTable(session_limits.get("messages_per_minute", 0), 60.0)
+        self.session_audio = TokenBucketTable(audio_per_minute, 60.0)
+        # Open sessions per IP, and the IP of each session
+        self.ip_sessions: Dict[str, int] = {}
+        self.session_ips: Dict[str, str] = {}
+
+    def check_connection(self, client_id: str, origin: Optional[str] = None) -> Optional[str]:
+        """Return a rejection reason for a new connection, or None if it may proceed."""
+        if not self.allowlist.allows(client_id):
+            return "Client address not allowed"
+        if "*" not in self.allowed_origins and origin not in self.allowed_origins:
+            return "Origin not allowed"
+        # New addresses are where the tables grow, so idle buckets are evicted here
+        self.compact()
+        if not self.ip_requests.allow(client_id):
+            return "Rate limit exceeded"
+        if self.max_sessions_per_ip and self.ip_sessions.get(client_id, 0) >= self.max_sessions_per_ip:
+            return "Too many sessions"
+        return None
+
+    def start_session(self, client_id: str, session_id: str):
+        """Count an admitted session against its IP until `end_session`."""
+        self.end_session(session_id)
+        self.session_ips[session_id] = client_id
+        self.ip_sessions[client_id] = self.ip_sessions.get(client_id, 0) + 1
+
+    def rename_session(self, session_id: str, new_id: str):
+        """Keep counting a session that takes over a handed-off session's ID."""
+        client_id = self.session_ips.pop(session_id, None)
+        self.end_session(session_id)
+        if client_id is not None:
+            self.end_session(new_id)
+            self.session_ips[new_id] = client_id
+
+    def allow_message(self, client_id: str, session_id: str) -> bool:
+        """Charge one control message to the client and session."""
+        return (
+            self.session_messages.allow(session_id)
+            and self.ip_requests.allow(client_id)
+        )
+
+    def allow_audio(self, client_id: str, session_id: str, seconds: float) -> bool:
+        """Charge one audio frame of `seconds` duration to the client and session."""
+        return (
+            self.session_messages.allow(session_id)
+            and self.session_audio.allow(session_id, seconds)
+            and self.ip_audio.allow(client_id, seconds)
+        )
+
+    def end_session(self, session_id: str):
+        """Release per-session buckets and the session's place in its IP's count."""
+        self.session_messages.remove(session_id)
+        self.session_audio.remove(session_id)
+        client_id = self.session_ips.pop(session_id, None)
+        if client_id is not None:
+            remaining = self.ip_sessions[client_id] - 1
+            if remaining:
+                self.ip_sessions[client_id] = remaining
+            else:
+                del self.ip_sessions[client_id]
+
+    def compact(self) -> int:
+        """Evict idle buckets from every table."""
+        evicted = sum(
+            table.compact()
+            for table in (self.ip_requests, self.ip_audio, self.session_messages, self.session_audio)
+        )
+        if evicted:
+            logger.debug(f"Compacted {evicted} idle rate limit buckets")
+        return evicted
+
+    def stats(self) -> Dict:
+        """Return the number of tracked buckets per table and of IPs with open sessions."""
+        return {
+            "ip_sessions": len(self.ip_sessions),
+            "ip_requests": len(self.ip_requests),
+            "ip_audio": len(self.ip_audio),
+            "session_messages": len(self.session_messages),
+            "session_audio": len(self.session_audio),
+        }
@@ -0,0 +1,428 @@
+import asyncio
+import dataclasses
+import gzip
+import heapq
+import itertools
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from src.speech import TranscriptionResult
+from src.utils.context import current_session
+from src.utils.metrics import Counter
+
+# Event kinds: session start, inbound audio and text, provider responses, and a provider
+# call cancelled before it answered (its value is the stage's kind)
+OPEN, AUDIO, TEXT, STT, LLM, TTS, CANCELLED = range(1, 8)
+INBOUND = (OPEN, AUDIO, TEXT)
+
+# Record header: kind, seconds since the session opened, provider latency (ms), payload length
+RECORD = struct.Struct("<BdfI")
+
+# Writer queue item kinds
+_WRITE, _CLOSE = range(2)
+
+# Agent attribute, call and event kind of each provider stage
+STAGES = (
+    ("speech_recognizer", "transcribe", STT),
+    ("language_model", "generate_response", LLM),
+    ("voice_synthesizer", "synthesize", TTS)
+)
+
+def _encode(kind: int, value: Any) -> bytes:
+    if kind in (AUDIO, TTS):
+        return bytes(value)
+    if kind == TEXT:
+        return value.encode()
+    if kind == CANCELLED:
+        return bytes([value])
+    if kind == STT:
+        value = dataclasses.asdict(value)
+    return json.dumps(value).encode()
+
+def _decode(kind: int, payload: bytes) -> Any:
+    if kind in (AUDIO, TTS):
+        return payload
+    if kind == TEXT:
+        return payload.decode()
+    if kind == CANCELLED:
+        return payload[0]
+    value = json.loads(payload)
+    return TranscriptionResult(**value) if kind == STT else value
+
+class SessionRecording:
+    """One recorded session: (kind, offset seconds, latency ms, value) events in arrival order."""
+
+    def __init__(self, session_id: str, events: List[Tuple[int, float, float, Any]]):
+        self.session_id = session_id
+        self.events = events
+
+    @classmethod
+    def load(cls, path: str) -> "SessionRecording":
+        """Read a recording written by Recorder, including parts appended on resume."""
+        events = []
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+        position = 0
+        while position < len(data):
+            kind, offset, latency_ms, length = RECORD.unpack_from(data, position)
+            position += RECORD.size
+            events.append((kind, offset, latency_ms, _decode(kind, data[position:position + length])))
+            position += length
+        session_id = os.path.basename(path)[:-len(".rec")]
+        return cls(session_id, events)
+
+    def save(self, directory: str):
+        """Write the recording in Recorder's format."""
+        with gzip.open(os.path.join(directory, f"{self.session_id}.rec"), "wb", compresslevel=1) as f:
+            for kind, offset, latency_ms, value in self.events:
+                payload = _encode(kind, value)
+                f.write(RECORD.pack(kind, offset, latency_ms, len(payload)))
+                f.write(payload)
+
+def load_recordings(directory: str) -> List[SessionRecording]:
+    """Load every recording in a directory, ordered by file name."""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".rec"))
+    return [SessionRecording.load(os.path.join(directory, name)) for name in names]
+
+class Recorder:
+    """Writes each session's inbound audio and messages, and every provider response
+    with its latency, to a compressed `<session_id>.rec` file.
+
+    Events are encoded by the caller and queued; a background thread compresses
+    and writes them. A session resumed here appends to its existing file. When
+    the queue is full, events are dropped and counted instead of blocking a turn.
+    """
+
+    def __init__(self, directory: str, queue_size: int = 50000):
+        self.directory = directory
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        # Session ID -> monotonic time the session opened
+        self.sessions: Dict[str, float] = {}
+        # Session ID -> open file, used by the writer thread only
+        self.files: Dict[str, gzip.GzipFile] = {}
+        self.dropped = Counter("recording_dropped")
+        # Items accepted into the queue, counted by the caller, and taken off it by the writer thread
+        self.queued = 0
+        self.taken = 0
+        # (session ID, items queued before its close) for closes that didn't fit in a full queue
+        self.closing: deque = deque()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """Start the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+            self._thread.start()
+
+    def open(self, session_id: str, codec: Optional[str], sample_rate: Optional[int]):
+        """Start a session's recording with its negotiated codec and rate."""
+        self.start()
+        self.sessions[session_id] = time.monotonic()
+        self.record(session_id, OPEN, {"codec": codec, "sample_rate": sample_rate})
+
+    def record(self, session_id: Optional[str], kind: int, value: Any, latency_ms: float = 0.0):
+        """Queue an event for a session's recording, if it is being recorded."""
+        opened_at = self.sessions.get(session_id)
+        if opened_at is None:
+            return
+        payload = _encode(kind, value)
+        header = RECORD.pack(kind, time.monotonic() - opened_at, latency_ms, len(payload))
+        try:
+            self.queue.put_nowait((_WRITE, session_id, (header, payload)))
+        except queue.Full:
+            self.dropped.inc()
+        else:
+            self.queued += 1
+
+    def close(self, session_id: str):
+        """Finish a session's recording once everything queued before is written."""
+        if self.sessions.pop(session_id, None) is None:
+            return
+        try:
+            self.queue.put_nowait((_CLOSE, session_id, None))
+        except queue.Full:
+            # Never dropped, or the session's file would stay open. It runs once the items
+            # queued before it are written, whether or not the queue ever empties
+            self.closing.append((session_id, self.queued))
+        else:
+            self.queued += 1
+
+    def stop(self):
+        """Write what is queued, close every file and stop the writer thread."""
+        self.sessions.clear()
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _write(self, kind: int, session_id: str, data: Optional[tuple]):
+        if kind == _CLOSE:
+            f = self.files.pop(session_id, None)
+            if f is not None:
+                f.close()
+            return
+        f = self.files.get(session_id)
+        if f is None:
+            name = re.sub(r"[^\w-]", "_", session_id)
+            # Appended as a new gzip member, so a resumed session keeps what was recorded before.
+            # Level 1 keeps compression cheap enough to run on live traffic
+            f = self.files[session_id] = gzip.open(os.path.join(self.directory, f"{name}.rec"), "ab",
+                                                   compresslevel=1)
+        header, payload = data
+        f.write(header)
+        f.write(payload)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            self.taken += 1
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error("Recording for session {} failed: {}", item[1], e)
+            # The queue is first in, first out, so these sessions have nothing left in it
+            while self.closing and self.closing[0][1] <= self.taken:
+                self._write(_CLOSE, self.closing.popleft()[0], None)
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+        self.closing.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped.value,
+            "open_sessions": len(self.sessions)
+        }
+
+class _Stage:
+    """Stands in for a pipeline component, replacing one call and delegating everything else."""
+
+    def __init__(self, component, method: str, kind: int):
+        self.component = component
+        self.method = method
+        self.kind = kind
+
+    def __getattr__(self, name: str):
+        if name == self.method:
+            return self._call
+        return getattr(self.component, name)
+
+class _RecordingStage(_Stage):
+    def __init__(self, component, method: str, kind: int, recorder: Recorder):
+        super().__init__(component, method, kind)
+        self.recorder = recorder
+
+    async def _call(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await getattr(self.component, self.method)(*args, **kwargs)
+        except asyncio.CancelledError:
+            # Kept in order, so a replay cancels the same call rather than answering it
+            self.recorder.record(current_session.get(), CANCELLED, self.kind, (time.perf_counter() - start) * 1000)
+            raise
+        self.recorder.record(current_session.get(), self.kind, result, (time.perf_counter() - start) * 1000)
+        return result
+
+class _ReplayTimer:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class ReplayClock:
+    """The agent's clock during a replay: each session's time is the recorded
+    offset of the event being fed, so debounce merges and endpoint timers take
+    the paths they took when the session was recorded, at any `time_scale`.
+    """
+
+    def __init__(self):
+        self.offsets: Dict[str, float] = {}
+        # Session ID -> heap of (due offset, sequence, timer, callback, args)
+        self.timers: Dict[str, List] = defaultdict(list)
+        # Set once a session's recorded input has all been fed
+        self.finished: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self._sequence = itertools.count()
+
+    def now(self) -> float:
+        return self.offsets.get(current_session.get(), 0.0)
+
+    def call_later(self, delay: float, callback, *args) -> _ReplayTimer:
+        session_id = current_session.get()
+        timer = _ReplayTimer()
+        heapq.heappush(self.timers[session_id],
+                       (self.now() + delay, next(self._sequence), timer, callback, args))
+        return timer
+
+    def advance(self, session_id: str, offset: float):
+        """Move a session to `offset`, first running the timers due by then at their own offsets."""
+        timers = self.timers[session_id]
+        while timers and timers[0][0] <= offset:
+            due, _, timer, callback, args = heapq.heappop(timers)
+            if not timer.cancelled:
+                self.offsets[session_id] = due
+                callback(*args)
+        self.offsets[session_id] = offset
+
+    def finish(self, session_id: str):
+        self.finished[session_id].set()
+        self.timers.pop(session_id, None)
+
+# Stands in for the response of a call that was cancelled while recording
+_CANCELLED = object()
+
+class _ReplayStage(_Stage):
+    def __init__(self, component, method: str, kind: int, responses: Dict[str, deque], latency_scale: float,
+                 clock: ReplayClock):
+        super().__init__(component, method, kind)
+        self.responses = responses
+        self.latency_scale = latency_scale
+        self.clock = clock
+
+    async def initialize(self):
+        """Replayed providers need no client."""
+
+    async def cleanup(self):
+        pass
+
+    async def _call(self, *args, **kwargs):
+        session_id = current_session.get()
+        queue = self.responses.get(session_id)
+        if not queue:
+            raise RuntimeError(f"No recorded {self.method} response left for session {session_id}")
+        latency_ms, value = queue[0]
+        if value is _CANCELLED:
+            # Wait for the replay to cancel the call as the recorded session did
+            try:
+                await self.clock.finished[session_id].wait()
+            except asyncio.CancelledError:
+                queue.popleft()
+                raise
+            raise RuntimeError(f"Recorded {self.method} call for session {session_id} was cancelled, "
+                               "but the replay didn't cancel it")
+        await asyncio.sleep(latency_ms * self.latency_scale / 1000)
+        # Taken only once answered, so a call cancelled while waiting leaves it for the next
+        queue.popleft()
+        return value
+
+def install_recorder(agent, recorder: Recorder):
+    """Record an agent's sessions and provider responses."""
+    agent.recorder = recorder
+    for attribute, method, kind in STAGES:
+        setattr(agent, attribute, _RecordingStage(getattr(agent, attribute), method, kind, recorder))
+
+def install_replay(agent, recordings: List[SessionRecording], latency_scale: float = 1.0):
+    """Answer an agent's provider calls from recordings, after the recorded latency times `latency_scale`.
+
+    Calls cancelled while recording wait to be cancelled again, and the agent's
+    turn timing follows the recorded offsets.
+    """
+    agent.clock = agent.endpointer.clock = ReplayClock()
+    for attribute, method, kind in STAGES:
+        responses = defaultdict(deque)
+        for recording in recordings:
+            for event_kind, _, latency_ms, value in recording.events:
+                if event_kind == kind:
+                    responses[recording.session_id].append((latency_ms, value))
+                elif event_kind == CANCELLED and value == kind:
+                    responses[recording.session_id].append((latency_ms, _CANCELLED))
+        setattr(agent, attribute,
+                _ReplayStage(getattr(agent, attribute), method, kind, responses, latency_scale, agent.clock))
+
+class _NullWebSocket:
+    """Discards what the agent sends to the client during a replay."""
+
+    async def send_json(self, data: Dict):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+def _summarize(latencies: List[float]) -> Dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+async def replay_sessions(agent, recordings: List[SessionRecording], time_scale: float = 0.0) -> Dict:
+    """Feed recorded sessions through an agent set up with `install_replay`, concurrently.
+
+    Inbound events are sent at their recorded offsets times `time_scale`, or
+    back to back when it is 0; either way the agent's clock reads the recorded
+    offsets. Returns latency percentiles for audio frames
+    and for frames and messages that produced a response.
+    """
+    latencies = defaultdict(list)
+    websocket = _NullWebSocket()
+    clock = agent.clock
+    started_at = time.perf_counter()
+
+    def turn_done(start: float):
+        def record(task: asyncio.Task):
+            if not task.cancelled():
+                latencies["turn"].append((time.perf_counter() - start) * 1000)
+        return record
+
+    async def run(recording: SessionRecording):
+        session_id = recording.session_id
+        current_session.set(session_id)
+        agent.session_manager.create_session(session_id)
+        pending = None
+        try:
+            for kind, offset, _, value in recording.events:
+                if kind not in INBOUND:
+                    continue
+                if time_scale > 0:
+                    await asyncio.sleep(max(0.0, started_at + offset * time_scale - time.perf_counter()))
+                clock.advance(session_id, offset)
+                start = time.perf_counter()
+                if kind == OPEN:
+                    await agent.open_audio_session(session_id, value["codec"], value["sample_rate"])
+                    continue
+                if kind == AUDIO:
+                    response = await agent.handle_frame(websocket, value, session_id)
+                else:
+                    response = await agent.handle_text(value, session_id, websocket)
+                elapsed = (time.perf_counter() - start) * 1000
+                latencies["frame" if kind == AUDIO else "text"].append(elapsed)
+                if response:
+                    latencies["turn"].append(elapsed)
+                elif agent.pending_turns.get(session_id) not in (None, pending):
+                    # Debounced turns are answered in the background
+                    pending = agent.pending_turns[session_id]
+                    pending.task.add_done_callback(turn_done(start))
+            # Timers that fired before the recording ended
+            clock.advance(session_id, max((event[1] for event in recording.events), default=0.0))
+            clock.finish(session_id)
+            if session_id in agent.pending_turns:
+                await asyncio.wait([agent.pending_turns[session_id].task])
+        finally:
+            # Ending the session releases the agent's state for it
+            agent.session_manager.end_session(session_id)
+
+    results = await asyncio.gather(*(run(recording) for recording in recordings), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    for error in errors:
+        logger.error(f"Replay failed: {str(error)}")
+    return {
+        "sessions": len(recordings),
+        "errors": len(errors),
+        "wall_ms": round((time.perf_counter() - started_at) * 1000, 3),
+        "latency": {name: _summarize(values) for name, values in sorted(latencies.items())}
+    }
@@ -0,0 +1,72 @@
+import dataclasses
+import json
+from typing import Any, Callable, Dict, Tuple
+from loguru import logger
+from src.utils.exceptions import ConfigurationError
+
+# (dumps, loads); dumps returns str and must handle dataclasses
+JSONCodec = Tuple[Callable[[Any], str], Callable[[Any], Any]]
+
+def _default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib() -> JSONCodec:
+    encoder = json.JSONEncoder(default=_default, separators=(",", ":"))
+    return encoder.encode, json.loads
+
+def _orjson() -> JSONCodec:
+    import orjson
+    dumps = orjson.dumps
+    # Serializes dataclasses natively
+    return (lambda obj: dumps(obj).decode()), orjson.loads
+
+# JSON implementations by name, built on first use
+ENCODERS: Dict[str, Callable[[], JSONCodec]] = {
+    "json": _stdlib,
+    "orjson": _orjson,
+}
+
+# Tried in order for "auto"
+_PREFERRED = ("orjson", "json")
+
+_codec: Dict[str, Any] = {"name": "json"}
+_codec["dumps"], _codec["loads"] = _stdlib()
+
+def register_encoder(name: str, factory: Callable[[], JSONCodec]):
+    """Make a JSON implementation available to `configure_json`."""
+    ENCODERS[name] = factory
+
+def configure_json(name: str = "auto") -> str:
+    """Select the JSON implementation for websocket messages, returning its name.
+
+    "auto" picks the fastest installed one; naming one that isn't installed
+    raises ConfigurationError.
+    """
+    names = _PREFERRED if name == "auto" else (name,)
+    for candidate in names:
+        factory = ENCODERS.get(candidate)
+        if factory is None:
+            raise ConfigurationError(f"Unknown JSON encoder: {candidate}")
+        try:
+            _codec["dumps"], _codec["loads"] = factory()
+        except ImportError:
+            if name != "auto":
+                raise ConfigurationError(f"JSON encoder {candidate} is not installed")
+            continue
+        _codec["name"] = candidate
+        logger.debug("Using {} for JSON", candidate)
+        return candidate
+    raise ConfigurationError("No JSON encoder available")
+
+def dumps(obj: Any) -> str:
+    """Serialize to JSON text; dataclasses become objects."""
+    return _codec["dumps"](obj)
+
+def loads(data: Any) -> Any:
+    """Parse JSON text or bytes, raising ValueError if it is malformed."""
+    return _codec["loads"](data)
+
+def encoder_name() -> str:
+    return _codec["name"]
@@ -1,36 +1,78 @@
-
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
 import uuid
 from loguru import logger
+from src.utils.timer_wheel import TimerWheel
+
+# Granularity of session expiry checks in seconds
+EXPIRY_TICK = 1.0
+MAX_WHEEL_SLOTS = 8192
+
+# Sessions are counted per creation epoch so age histograms don't scan sessions
+AGE_EPOCH = 60.0
+AGE_BUCKETS = (60, 300, 900, 1800, 3600)
+
+PIPELINE_STAGES = ("turn", "stt", "llm", "tts")
 
 class Session:
+    __slots__ = ("id", "created_at", "last_activity", "is_active", "in_flight")
+
     def __init__(self, id: str):
         self.id = id
-        self.created_at = datetime.now()
-        self.last_activity = datetime.now()
+        # Monotonic so age and activity tracking are immune to wall clock changes
+        self.created_at = time.monotonic()
+        self.last_activity = self.created_at
         self.is_active = True
+        # Number of pipeline stages currently running for this session
+        self.in_flight = 0
 
     def update_activity(self):
         """Update last activity timestamp."""
-        self.last_activity = datetime.now()
+        self.last_activity = time.monotonic()
 
 class SessionManager:
     def __init__(self):
         """Initialize session manager."""
         self.sessions: Dict[str, Session] = {}
         self.session_timeout = 3600  # Default timeout of 1 hour
+        self.wheel = self._create_wheel()
+        self.end_listeners: List[Callable[[str], None]] = []
+
+        # Incrementally maintained statistics
+        self.busy_sessions = 0
+        self.stage_in_flight: Dict[str, int] = {stage: 0 for stage in PIPELINE_STAGES}
+        self.created_per_epoch: Dict[int, int] = {}
+        self._expiry_task: Optional[asyncio.Task] = None
         self.is_initialized = True
         logger.info("Session manager initialized")
 
+    def _create_wheel(self) -> TimerWheel:
+        # One revolution covers the timeout, so timers rarely need more than one pass
+        slots = min(int(self.session_timeout / EXPIRY_TICK) + 1, MAX_WHEEL_SLOTS)
+        return TimerWheel(EXPIRY_TICK, slots, time.monotonic())
+
     def set_timeout(self, timeout: int):
         """Set session timeout in seconds."""
         self.session_timeout = timeout
+        self.wheel = self._create_wheel()
+        for session in self.sessions.values():
+            self.wheel.schedule(session.id, session.last_activity + timeout)
+
+    def add_end_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the session ID whenever a session ends or expires."""
+        self.end_listeners.append(listener)
 
-    def create_session(self) -> str:
+    def create_session(self, session_id: Optional[str] = None) -> str:
         """Create a new session and return its ID."""
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = Session(session_id)
+        session_id = session_id or str(uuid.uuid4())
+        session = Session(session_id)
+        self.sessions[session_id] = session
+        epoch = int(session.created_at // AGE_EPOCH)
+        self.created_per_epoch[epoch] = self.created_per_epoch.get(epoch, 0) + 1
+        self.wheel.schedule(session_id, session.last_activity + self.session_timeout)
         logger.info(f"Created new session: {session_id}")
         return session_id
 
@@ -42,26 +84,128 @@ class SessionManager:
             return session
         return None
 
+    def touch(self, session_id: str):
+        """Record activity on a session.
+
+        The expiry timer is not moved here; it is re-armed lazily when it fires,
+        which keeps per-frame activity updates O(1).
+        """
+        session = self.sessions.get(session_id)
+        if session:
+            session.update_activity()
+
     def end_session(self, session_id: str) -> bool:
         """End a session."""
         if session_id in self.sessions:
-            self.sessions[session_id].is_active = False
-            del self.sessions[session_id]
+            session = self.sessions.pop(session_id)
+            session.is_active = False
+            if session.in_flight:
+                self.busy_sessions -= 1
+            epoch = int(session.created_at // AGE_EPOCH)
+            remaining = self.created_per_epoch[epoch] - 1
+            if remaining:
+                self.created_per_epoch[epoch] = remaining
+            else:
+                del self.created_per_epoch[epoch]
+            self.wheel.cancel(session_id)
+            for listener in self.end_listeners:
+                try:
+                    listener(session_id)
+                except Exception as e:
+                    logger.error(f"Error in session end listener: {str(e)}")
             logger.info(f"Removed inactive session: {session_id}")
             return True
         return False
 
-    def cleanup_sessions(self):
-        """Clean up expired sessions."""
-        current_time = datetime.now()
-        timeout = timedelta(seconds=self.session_timeout)
-        expired_sessions = [
-            session_id for session_id, session in self.sessions.items()
-            if current_time - session.last_activity > timeout
-        ]
-        for session_id in expired_sessions:
+    def cleanup_sessions(self, now: Optional[float] = None) -> List[str]:
+        """Clean up expired sessions and return their IDs."""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        for session_id in self.wheel.advance(now):
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            deadline = session.last_activity + self.session_timeout
+            if deadline > now:
+                # Active since the timer was armed; re-arm for the new deadline
+                self.wheel.schedule(session_id, deadline)
+                continue
             self.end_session(session_id)
+            expired.append(session_id)
+        if expired:
+            logger.info(f"Expired {len(expired)} idle sessions")
+        return expired
+
+    async def _run_expiry(self):
+        while True:
+            await asyncio.sleep(EXPIRY_TICK)
+            self.cleanup_sessions()
+
+    def start(self):
+        """Start the background expiry task."""
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(self._run_expiry())
+
+    async def stop(self):
+        """Stop the background expiry task."""
+        if self._expiry_task:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+
+    @contextmanager
+    def stage(self, session_id: Optional[str], stage: str):
+        """Count a pipeline stage as in flight for the duration of the block."""
+        session = self.sessions.get(session_id) if session_id is not None else None
+        self.stage_in_flight[stage] = self.stage_in_flight.get(stage, 0) + 1
+        if session is not None:
+            if session.in_flight == 0:
+                self.busy_sessions += 1
+            session.in_flight += 1
+        try:
+            yield
+        finally:
+            self.stage_in_flight[stage] -= 1
+            # The session may have ended while the stage was running
+            if session is not None and session.is_active:
+                session.in_flight -= 1
+                if session.in_flight == 0:
+                    self.busy_sessions -= 1
 
     def get_active_sessions_count(self) -> int:
         """Return the number of active sessions."""
-        return sum(1 for session in self.sessions.values() if session.is_active)
+        return len(self.sessions)
+
+    def is_busy(self, session_id: str) -> bool:
+        """Return True if the session has a stage in flight."""
+        session = self.sessions.get(session_id)
+        return session is not None and session.in_flight > 0
+
+    def stats(self, now: Optional[float] = None) -> Dict:
+        """Return session counts, an age histogram and per-stage in-flight totals.
+
+        Cost is bounded by the number of creation epochs within the session
+        timeout, independent of the number of sessions.
+        """
+        if now is None:
+            now = time.monotonic()
+        age_counts = [0] * (len(AGE_BUCKETS) + 1)
+        for epoch, count in self.created_per_epoch.items():
+            age = now - epoch * AGE_EPOCH
+            age_counts[bisect_left(AGE_BUCKETS, age)] += count
+        labels = [f"<={bound}s" for bound in AGE_BUCKETS] + [f">{AGE_BUCKETS[-1]}s"]
+
+        total = len(self.sessions)
+        return {
+            "total": total,
+            # Open sessions, as get_active_sessions_count() reports them
+            "active": total,
+            "busy": self.busy_sessions,
+            "idle": total - self.busy_sessions,
+            "age_histogram": dict(zip(labels, age_counts)),
+            "in_flight": dict(self.stage_in_flight),
+        }
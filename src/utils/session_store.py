@@ -0,0 +1,43 @@
+import json
+from typing import Dict, Optional
+from loguru import logger
+
+KEY_PREFIX = "voice-agent:session:"
+
+class SessionStore:
+    """Redis-backed store used to hand session state between workers."""
+
+    def __init__(self, config: Dict):
+        self.url = config.get("url", "redis://localhost:6379/0")
+        self.ttl = config.get("ttl", 300)
+        self.client = None
+        self.is_initialized = False
+
+    async def initialize(self):
+        """Connect to Redis."""
+        try:
+            import redis.asyncio as redis
+
+            self.client = redis.from_url(self.url)
+            await self.client.ping()
+            self.is_initialized = True
+            logger.info("Session store initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize session store: {str(e)}")
+            raise
+
+    async def save(self, session_id: str, state: Dict):
+        """Store state for a session until it is resumed or the TTL passes."""
+        await self.client.set(KEY_PREFIX + session_id, json.dumps(state), ex=self.ttl)
+
+    async def load(self, session_id: str) -> Optional[Dict]:
+        """Fetch and remove the stored state for a session."""
+        key = KEY_PREFIX + session_id
+        data = await self.client.getdel(key)
+        return json.loads(data) if data else None
+
+    async def cleanup(self):
+        """Close the Redis connection."""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
@@ -0,0 +1,386 @@
+import collections.abc
+import dataclasses
+import os
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Tuple, Type, TypeVar, Union
+import yaml
+from src.utils.exceptions import ConfigurationError
+
+# Environment overrides look like VOICE_AGENT__AUDIO__SAMPLE_RATE=8000
+ENV_PREFIX = "VOICE_AGENT__"
+
+T = TypeVar("T")
+
+def settings(cls: Type[T]) -> Type[T]:
+    """Make a frozen dataclass with __slots__ (dataclass(slots=True) needs Python 3.10)."""
+    cls = dataclass(frozen=True)(cls)
+    names = tuple(f.name for f in dataclasses.fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in names + ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    # Frozen instances can't be restored through setattr, so pickle by field values
+    namespace["__getstate__"] = lambda self: tuple(getattr(self, name) for name in names)
+    namespace["__setstate__"] = lambda self, state: [object.__setattr__(self, n, v) for n, v in zip(names, state)]
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+def minimum(value: float) -> Dict:
+    """Field metadata requiring a value of at least `value`."""
+    return {"minimum": value}
+
+def _convert(kind, value: Any, path: str):
+    """Check `value` against a field annotation, converting lists and nested sections."""
+    origin = typing.get_origin(kind)
+    if dataclasses.is_dataclass(kind):
+        return from_dict(kind, value, path)
+    if origin is Union:
+        for option in typing.get_args(kind):
+            try:
+                return _convert(option, value, path)
+            except ConfigurationError:
+                continue
+        raise ConfigurationError(f"Invalid value for {path}: {value!r}")
+    if origin is tuple:
+        if not isinstance(value, (list, tuple)):
+            raise ConfigurationError(f"{path} must be a list")
+        item = typing.get_args(kind)[0]
+        return tuple(_convert(item, entry, f"{path}[{i}]") for i, entry in enumerate(value))
+    if origin in (dict, collections.abc.Mapping):
+        if not isinstance(value, dict):
+            raise ConfigurationError(f"{path} must be a mapping")
+        item = typing.get_args(kind)[1]
+        return {key: _convert(item, entry, f"{path}.{key}") for key, entry in value.items()}
+    if kind is Any:
+        return value
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if (kind is int and isinstance(value, bool)) or not isinstance(value, kind):
+        raise ConfigurationError(f"{path} must be {kind.__name__}, got {value!r}")
+    return value
+
+def from_dict(cls: Type[T], data: Any, path: str) -> T:
+    """Build a settings object from a config mapping, raising ConfigurationError if it doesn't match."""
+    if isinstance(data, cls):
+        return data
+    if not isinstance(data, dict):
+        raise ConfigurationError(f"{path} must be a mapping")
+    hints = typing.get_type_hints(cls)
+    names = {f.name for f in dataclasses.fields(cls)}
+    unknown = set(data) - names
+    if unknown:
+        raise ConfigurationError(f"Unknown parameter: {path}.{sorted(unknown)[0]}")
+
+    values = {}
+    for f in dataclasses.fields(cls):
+        name = f"{path}.{f.name}"
+        if f.name not in data:
+            if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+                raise ConfigurationError(f"Missing required parameter: {name}")
+            continue
+        value = _convert(hints[f.name], data[f.name], name)
+        if "minimum" in f.metadata and isinstance(value, (int, float)) and value < f.metadata["minimum"]:
+            raise ConfigurationError(f"{name} must be at least {f.metadata['minimum']}")
+        values[f.name] = value
+    return cls(**values)
+
+@settings
+class AppSettings:
+    name: str
+    version: str
+    environment: str = "development"
+    drain_timeout: float = field(default=30.0, metadata=minimum(0))
+    workers: Union[int, str] = 1
+    max_workers: int = field(default=8, metadata=minimum(1))
+    # JSON implementation for websocket messages: "auto" (fastest installed), "orjson" or "json"
+    json_encoder: str = "auto"
+
+@settings
+class AudioSettings:
+    sample_rate: int = field(metadata=minimum(8000))
+    channels: int = field(metadata=minimum(1))
+    chunk_size: int = field(metadata=minimum(1))
+    buffer_size: int = field(metadata=minimum(1))
+    codec: str = "float32"
+    noise_suppression: bool = True
+    auto_gain_control: bool = True
+    agc_target_rms: float = field(default=0.1, metadata=minimum(0))
+    dsp_workers: int = field(default=0, metadata=minimum(0))
+    dsp_shared_memory: bool = True
+    # Per-worker shared-memory slots; 16 KiB holds 85 ms of 48 kHz float32 mono
+    dsp_slots: int = field(default=128, metadata=minimum(1))
+    dsp_slot_bytes: int = field(default=16384, metadata=minimum(1))
+    batch_max_window_ms: float = field(default=0.0, metadata=minimum(0))
+    batch_max_size: int = field(default=64, metadata=minimum(1))
+
+@settings
+class DeepgramSettings:
+    model: str
+    language: str
+    interim_results: bool = False
+    punctuate: bool = True
+    diarize: bool = False
+    smart_format: bool = False
+
+@settings
+class OpenAISettings:
+    model: str
+    temperature: float = field(default=0.7, metadata=minimum(0))
+    max_tokens: int = field(default=150, metadata=minimum(1))
+
+@settings
+class ElevenLabsSettings:
+    voice_id: str = "default"
+    stability: float = field(default=0.5, metadata=minimum(0))
+    similarity_boost: float = field(default=0.75, metadata=minimum(0))
+    output_format: str = "mp3_44100"
+
+# Typed settings for each supported provider, by config section
+PROVIDER_SETTINGS: Dict[str, Dict[str, type]] = {
+    "speech_recognition": {"deepgram": DeepgramSettings},
+    "llm": {"openai": OpenAISettings},
+    "voice": {"elevenlabs": ElevenLabsSettings},
+}
+
+@settings
+class ProviderSettings:
+    """A provider section: the default provider's typed settings plus every enabled provider."""
+    default_provider: str
+    providers: Mapping[str, Any]
+
+    @property
+    def provider(self) -> Any:
+        return self.providers[self.default_provider]
+
+def provider_settings(section: str, data: Any) -> ProviderSettings:
+    """Parse a speech_recognition, llm or voice section."""
+    raw = from_dict(ProviderSettings, data, section)
+    supported = PROVIDER_SETTINGS[section]
+    providers = {}
+    for name, options in raw.providers.items():
+        path = f"{section}.providers.{name}"
+        if isinstance(options, dict):
+            # `enabled` switches a provider on or off; it isn't one of the provider's settings
+            options = dict(options)
+            if options.pop("enabled", True) is False:
+                continue
+        if name not in supported:
+            raise ConfigurationError(f"Unsupported provider: {path}")
+        providers[name] = from_dict(supported[name], options, path)
+    if raw.default_provider not in providers:
+        raise ConfigurationError(f"{section}.default_provider {raw.default_provider!r} is not configured")
+    return ProviderSettings(raw.default_provider, providers)
+
+@settings
+class RetellSettings:
+    enabled: bool
+    voice_id: str
+    language: str
+    stream_latency: int = field(metadata=minimum(0))
+    use_enhanced_model: bool = False
+    auto_gain_control: bool = True
+    noise_suppression: bool = True
+    # Stream each session to Retell over its own managed websocket
+    upstream: bool = False
+    url: str = "wss://api.retellai.com/websocket"
+    connect_timeout: float = field(default=5.0, metadata=minimum(0.1))
+    # Websocket ping interval, and how long a pong may take before the connection is replaced
+    heartbeat_interval: float = field(default=15.0, metadata=minimum(0.1))
+    heartbeat_timeout: float = field(default=10.0, metadata=minimum(0.1))
+    # Reconnect delay doubles from the first to the maximum, with jitter
+    reconnect_initial: float = field(default=0.5, metadata=minimum(0))
+    reconnect_max: float = field(default=10.0, metadata=minimum(0))
+    # Frames held while (re)connecting; beyond this the oldest are dropped
+    buffer_frames: int = field(default=250, metadata=minimum(1))
+
+@settings
+class TurnSettings:
+    # End-to-end budget from the frame that completes a turn to its reply; 0 disables
+    budget_ms: float = field(default=0.0, metadata=minimum(0))
+    llm_timeout_ms: float = field(default=1800.0, metadata=minimum(0))
+    # Second, cheaper attempt after the first times out or fails
+    retry_timeout_ms: float = field(default=800.0, metadata=minimum(0))
+    short_max_tokens: int = field(default=60, metadata=minimum(1))
+    short_model: str = ""
+    # Spoken when no reply can be generated in time
+    filler_text: str = "One moment, please."
+    # A short acknowledgement played if reply audio isn't ready this long after a turn starts; 0 disables
+    backchannel_delay_ms: float = field(default=0.0, metadata=minimum(0))
+    backchannel_phrases: Tuple[str, ...] = ("Mm-hmm.", "Okay.", "Let me see.")
+    # Audio turns are answered in the background; more speech this soon after a turn started
+    # cancels its reply and merges both into one turn. 0 answers each turn inline
+    debounce_ms: float = field(default=0.0, metadata=minimum(0))
+
+@settings
+class EndpointingSettings:
+    # Hold transcript fragments until the caller has finished speaking; off starts a turn per fragment
+    enabled: bool = False
+    # Processed-frame RMS at or above which a frame counts as speech
+    vad_threshold: float = field(default=0.01, metadata=minimum(0))
+    # Silence that ends a turn, by how finished the utterance sounds
+    silence_ms: float = field(default=700.0, metadata=minimum(0))
+    complete_silence_ms: float = field(default=300.0, metadata=minimum(0))
+    incomplete_silence_ms: float = field(default=1400.0, metadata=minimum(0))
+    # Divides every silence wait; above 1 ends turns sooner
+    aggressiveness: float = field(default=1.0, metadata=minimum(0.1))
+
+@settings
+class ProviderLimitSettings:
+    max_concurrency: int = field(default=20, metadata=minimum(1))
+    max_queue: int = field(default=100, metadata=minimum(0))
+
+@settings
+class ConcurrencySettings:
+    latency_budget_ms: float = field(default=0.0, metadata=minimum(0))
+    queue_timeout: float = field(default=5.0, metadata=minimum(0))
+    providers: Mapping[str, ProviderLimitSettings] = field(default_factory=dict)
+
+@settings
+class ProfileSettings:
+    """One brand's agent: its prompt, cache namespace, session quota and setting overrides."""
+    system_prompt: str = ""
+    # Namespace of the profile's cached TTS clips (default: the profile name)
+    cache_namespace: str = ""
+    # Concurrent sessions; 0 is unlimited
+    max_sessions: int = field(default=0, metadata=minimum(0))
+    # Overrides of these tunable sections for the profile's sessions
+    retell: Mapping[str, Any] = field(default_factory=dict)
+    speech_recognition: Mapping[str, Any] = field(default_factory=dict)
+    llm: Mapping[str, Any] = field(default_factory=dict)
+    voice: Mapping[str, Any] = field(default_factory=dict)
+    turn: Mapping[str, Any] = field(default_factory=dict)
+    endpointing: Mapping[str, Any] = field(default_factory=dict)
+
+@settings
+class ProfilesSettings:
+    # Profile of connections that don't name one; "default" is the top-level config
+    default: str = "default"
+    agents: Mapping[str, ProfileSettings] = field(default_factory=dict)
+
+@settings
+class SessionStoreSettings:
+    enabled: bool = False
+    url: str = "redis://localhost:6379/0"
+    ttl: int = field(default=300, metadata=minimum(1))
+
+@settings
+class TuningSettings:
+    # YAML file of runtime overrides, watched by every server process; empty disables
+    file: str = ""
+    poll_interval: float = field(default=2.0, metadata=minimum(0.1))
+
+@settings
+class RecordingSettings:
+    # Capture sessions and provider responses for offline replay, written off the event loop
+    enabled: bool = False
+    directory: str = "recordings"
+    # Events waiting to be written; more are dropped
+    queue_size: int = field(default=50000, metadata=minimum(1))
+
+@settings
+class ArchiveSettings:
+    # Keep call audio and transcripts for QA, written off the event loop
+    enabled: bool = False
+    directory: str = "archive"
+    # Items (frames and transcript lines) waiting to be written; more are dropped
+    queue_size: int = field(default=50000, metadata=minimum(1))
+    segment_seconds: float = field(default=300.0, metadata=minimum(1))
+    fsync_interval: float = field(default=5.0, metadata=minimum(0.1))
+
+@settings
+class OutboundSettings:
+    # Per-connection send queue; a client further behind than either bound is disconnected
+    max_queue_bytes: int = field(default=2_000_000, metadata=minimum(1))
+    max_queue_delay_ms: float = field(default=10000.0, metadata=minimum(0))
+    # Interim transcripts are dropped while this much is queued
+    congestion_bytes: int = field(default=64_000, metadata=minimum(0))
+    # Send adjacent control messages as one {"type": "batch"} frame
+    coalesce_control: bool = False
+    max_batch: int = field(default=32, metadata=minimum(1))
+
+@settings
+class MonitoringSettings:
+    log_level: str
+    # JSON lines carrying session and turn IDs, instead of human-readable text
+    log_json: bool = False
+    log_file: str = ""
+    log_rotation: str = "1 day"
+    log_retention: str = "30 days"
+    # Per-frame events: records per second let through, then one in every `log_sample_every`
+    log_sample_rate: float = field(default=5.0, metadata=minimum(0))
+    log_sample_every: int = field(default=100, metadata=minimum(1))
+    metrics_enabled: bool = True
+    tracing_enabled: bool = False
+
+@settings
+class SessionLimitSettings:
+    messages_per_minute: int = field(default=0, metadata=minimum(0))
+    audio_seconds_per_minute: float = field(default=0.0, metadata=minimum(0))
+    max_sessions_per_ip: int = field(default=0, metadata=minimum(0))
+
+@settings
+class SecuritySettings:
+    token_expiry: int = field(metadata=minimum(1))
+    rate_limit: int = field(default=0, metadata=minimum(0))
+    ip_whitelist: Tuple[str, ...] = ()
+    allowed_origins: Tuple[str, ...] = ("*",)
+    session_limits: SessionLimitSettings = field(default_factory=SessionLimitSettings)
+
+@settings
+class Settings:
+    """The whole configuration, validated and immutable."""
+    app: AppSettings
+    audio: AudioSettings
+    speech_recognition: ProviderSettings
+    llm: ProviderSettings
+    voice: ProviderSettings
+    retell: RetellSettings
+    monitoring: MonitoringSettings
+    security: SecuritySettings
+    concurrency: ConcurrencySettings = field(default_factory=ConcurrencySettings)
+    turn: TurnSettings = field(default_factory=TurnSettings)
+    endpointing: EndpointingSettings = field(default_factory=EndpointingSettings)
+    session_store: SessionStoreSettings = field(default_factory=SessionStoreSettings)
+    tuning: TuningSettings = field(default_factory=TuningSettings)
+    recording: RecordingSettings = field(default_factory=RecordingSettings)
+    archive: ArchiveSettings = field(default_factory=ArchiveSettings)
+    outbound: OutboundSettings = field(default_factory=OutboundSettings)
+    profiles: ProfilesSettings = field(default_factory=ProfilesSettings)
+
+    @classmethod
+    def from_dict(cls, config: Any) -> "Settings":
+        """Validate a parsed config.yaml."""
+        if not isinstance(config, dict):
+            raise ConfigurationError("Configuration must be a mapping")
+        values = {}
+        for f in dataclasses.fields(cls):
+            if f.name not in config:
+                if f.default_factory is dataclasses.MISSING:
+                    raise ConfigurationError(f"Missing required section: {f.name}")
+                continue
+            if f.name in PROVIDER_SETTINGS:
+                values[f.name] = provider_settings(f.name, config[f.name])
+            else:
+                values[f.name] = from_dict(typing.get_type_hints(cls)[f.name], config[f.name], f.name)
+        unknown = set(config) - set(typing.get_type_hints(cls))
+        if unknown:
+            raise ConfigurationError(f"Unknown section: {sorted(unknown)[0]}")
+        return cls(**values)
+
+def apply_env_overrides(config: Dict, environ: Optional[Mapping[str, str]] = None) -> Dict:
+    """Override config values from VOICE_AGENT__SECTION__KEY environment variables.
+
+    Values are parsed as YAML, so numbers, booleans and lists keep their types.
+    """
+    environ = os.environ if environ is None else environ
+    for variable, raw in environ.items():
+        if not variable.startswith(ENV_PREFIX):
+            continue
+        keys = variable[len(ENV_PREFIX):].lower().split("__")
+        target = config
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+            if not isinstance(target, dict):
+                raise ConfigurationError(f"{variable} does not name a config section")
+        target[keys[-1]] = yaml.safe_load(raw)
+    return config
@@ -0,0 +1,57 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, Optional
+from loguru import logger
+
+class StartupReport:
+    """Import and initialization timings collected while the process starts."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+        self.ready_ms: Optional[float] = None
+
+    def import_module(self, name: str) -> ModuleType:
+        """Import a module on first use, recording how long the first import took."""
+        if name in sys.modules:
+            return sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.imports[name] = (time.perf_counter() - start) * 1000
+        return module
+
+    def record(self, phase: str, since: Optional[float] = None):
+        """Record a phase that ran from `since` (default: process start) until now."""
+        start = self.started_at if since is None else since
+        self.phases[phase] = (time.perf_counter() - start) * 1000
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of startup work."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def mark_ready(self):
+        """Record time to ready and log the report."""
+        self.ready_ms = (time.perf_counter() - self.started_at) * 1000
+        imports = ", ".join(f"{name} {ms:.0f}ms" for name, ms in sorted(self.imports.items(), key=lambda item: -item[1]))
+        phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+        logger.info(f"Ready in {self.ready_ms:.0f}ms (phases: {phases}; provider imports: {imports or 'none'})")
+
+    def snapshot(self) -> Dict:
+        """Return the report as a serializable dict."""
+        return {
+            "ready_ms": self.ready_ms,
+            "phases_ms": dict(self.phases),
+            "imports_ms": dict(self.imports)
+        }
+
+# Shared by the app and the components it starts
+startup_report = StartupReport()
@@ -0,0 +1,65 @@
+import math
+from typing import Dict, Hashable, List
+
+class TimerWheel:
+    """Hashed timer wheel.
+
+    Deadlines are rounded up to whole ticks and bucketed by `tick % slots`, so
+    scheduling and cancelling are O(1) and advancing the wheel only touches the
+    slots that have come due, making expiry O(expired) rather than O(all timers).
+    """
+
+    def __init__(self, tick: float, slots: int, now: float = 0.0):
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick and slots must be positive")
+        self.tick = tick
+        self.slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self.current_tick = self._to_tick(now)
+        # key -> deadline tick, used for O(1) cancel/reschedule
+        self.deadlines: Dict[Hashable, int] = {}
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(math.floor(timestamp / self.tick))
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Schedule `key` to fire at `deadline`, replacing any existing timer."""
+        self.cancel(key)
+        deadline_tick = max(int(math.ceil(deadline / self.tick)), self.current_tick + 1)
+        self.slots[deadline_tick % len(self.slots)][key] = deadline_tick
+        self.deadlines[key] = deadline_tick
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the timer for `key` if one is scheduled."""
+        deadline_tick = self.deadlines.pop(key, None)
+        if deadline_tick is None:
+            return False
+        del self.slots[deadline_tick % len(self.slots)][key]
+        return True
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Move the wheel to `now` and return the keys whose deadlines have passed."""
+        target_tick = self._to_tick(now)
+        if target_tick <= self.current_tick:
+            return []
+
+        # Each slot needs to be visited at most once, even after a long pause
+        first_tick = max(self.current_tick + 1, target_tick - len(self.slots) + 1)
+        expired = []
+        for tick in range(first_tick, target_tick + 1):
+            slot = self.slots[tick % len(self.slots)]
+            if not slot:
+                continue
+            due = [key for key, deadline_tick in slot.items() if deadline_tick <= target_tick]
+            for key in due:
+                del slot[key]
+                del self.deadlines[key]
+            expired.extend(due)
+
+        self.current_tick = target_tick
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.deadlines
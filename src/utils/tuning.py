@@ -0,0 +1,201 @@
+import asyncio
+import copy
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+import yaml
+from loguru import logger
+from src.utils.exceptions import ConfigurationError
+from src.utils.settings import (
+    ConcurrencySettings,
+    EndpointingSettings,
+    ProviderSettings,
+    RetellSettings,
+    TuningSettings,
+    TurnSettings,
+    from_dict,
+    provider_settings,
+    settings
+)
+
+# Config sections that can change while calls are running
+TUNABLE_SECTIONS = ("retell", "speech_recognition", "llm", "voice", "concurrency", "turn", "endpointing")
+
+# Applied changes kept for /tuning and /metrics
+HISTORY_SIZE = 20
+
+@settings
+class Tuning:
+    """Tunable settings in effect for turns that start now."""
+    version: int
+    retell: RetellSettings
+    speech_recognition: ProviderSettings
+    llm: ProviderSettings
+    voice: ProviderSettings
+    concurrency: ConcurrencySettings
+    turn: TurnSettings
+    endpointing: EndpointingSettings
+    # Set for an agent profile's sessions (see src/profiles.py)
+    profile: str = "default"
+    system_prompt: str = ""
+    cache_namespace: str = ""
+
+def parse_tuning(config: Dict, version: int = 0) -> Tuning:
+    """Build a Tuning from the tunable sections of a config."""
+    return Tuning(
+        version=version,
+        retell=from_dict(RetellSettings, config["retell"], "retell"),
+        speech_recognition=provider_settings("speech_recognition", config["speech_recognition"]),
+        llm=provider_settings("llm", config["llm"]),
+        voice=provider_settings("voice", config["voice"]),
+        concurrency=from_dict(ConcurrencySettings, config.get("concurrency", {}), "concurrency"),
+        turn=from_dict(TurnSettings, config.get("turn", {}), "turn"),
+        endpointing=from_dict(EndpointingSettings, config.get("endpointing", {}), "endpointing")
+    )
+
+def merge(base: Dict, overrides: Dict) -> Dict:
+    """Deep-merge `overrides` into a copy of `base`."""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def _flatten(config: Any, prefix: str = "") -> Dict[str, Any]:
+    if not isinstance(config, dict):
+        return {prefix: config}
+    flat = {}
+    for key, value in config.items():
+        flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    return flat
+
+def _check_tunable(overrides: Any):
+    if not isinstance(overrides, dict):
+        raise ConfigurationError("Tuning overrides must be a mapping")
+    for section, values in overrides.items():
+        if section not in TUNABLE_SECTIONS:
+            raise ConfigurationError(f"{section} can't be changed at runtime")
+        if isinstance(values, dict) and "default_provider" in values:
+            raise ConfigurationError(f"{section}.default_provider can't be changed at runtime")
+
+class Tuner:
+    """Applies runtime overrides of tunable settings to a RetellAgent.
+
+    Overrides are layered over the config the process started with. They are
+    kept in a YAML file that every server process watches, so a change made
+    through the admin endpoint of one worker reaches all of them. A change is
+    validated in full before anything is swapped, gets a version number, and
+    is logged with every value it changed. Turns that already started finish
+    on the settings they started with.
+    """
+
+    def __init__(self, config: Dict, agent, tuning_settings: TuningSettings):
+        self.base = {section: copy.deepcopy(config[section]) for section in TUNABLE_SECTIONS if section in config}
+        self.agent = agent
+        self.path = tuning_settings.file
+        self.poll_interval = tuning_settings.poll_interval
+        self.overrides: Dict = {}
+        self.effective = _flatten(self.base)
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.file_mtime: Optional[int] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @property
+    def version(self) -> int:
+        return self.agent.tuning.version
+
+    def apply(self, overrides: Dict, source: str, version: Optional[int] = None) -> Dict:
+        """Replace the current overrides, returning the history entry for the change."""
+        _check_tunable(overrides)
+        config = merge(self.base, overrides)
+        tuning = parse_tuning(config, version if version is not None and version > self.version else self.version + 1)
+
+        effective = _flatten(config)
+        changes = {
+            key: [self.effective.get(key), effective.get(key)]
+            for key in sorted(set(self.effective) | set(effective))
+            if self.effective.get(key) != effective.get(key)
+        }
+        self.agent.apply_tuning(tuning)
+        self.overrides = copy.deepcopy(overrides)
+        self.effective = effective
+
+        entry = {"version": tuning.version, "source": source, "applied_at": time.time(), "changes": changes}
+        self.history.append(entry)
+        summary = ", ".join(f"{key} {old!r} -> {new!r}" for key, (old, new) in changes.items()) or "no changes"
+        logger.info(f"Tuning v{tuning.version} applied from {source}: {summary}")
+        return entry
+
+    def update(self, changes: Dict, source: str) -> Dict:
+        """Merge `changes` into the current overrides, apply them and write them to the overrides file."""
+        _check_tunable(changes)
+        entry = self.apply(merge(self.overrides, changes), source)
+        if self.path:
+            self._write_file()
+        return entry
+
+    def _write_file(self):
+        # Written with its version so other workers apply it under the same number
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            yaml.safe_dump({"version": self.version, **self.overrides}, f, sort_keys=False)
+        os.replace(temporary, self.path)
+        self.file_mtime = os.stat(self.path).st_mtime_ns
+
+    def check_file(self) -> bool:
+        """Apply the overrides file if it changed since it was last read."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.file_mtime:
+            return False
+        self.file_mtime = mtime
+
+        try:
+            overrides = {}
+            if mtime is not None:
+                with open(self.path, "r") as f:
+                    overrides = yaml.safe_load(f) or {}
+            if not isinstance(overrides, dict):
+                raise ConfigurationError("Tuning overrides must be a mapping")
+            version = overrides.pop("version", None)
+            if overrides == self.overrides:
+                return False
+            self.apply(overrides, self.path, version if isinstance(version, int) else None)
+            return True
+        except (ConfigurationError, yaml.YAMLError) as e:
+            # A bad edit leaves the current settings in place
+            logger.error(f"Ignoring tuning file {self.path}: {str(e)}")
+            return False
+
+    async def _watch(self):
+        while True:
+            self.check_file()
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start watching the overrides file."""
+        if self.path and (self._watch_task is None or self._watch_task.done()):
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        """Stop watching the overrides file."""
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def stats(self) -> Dict:
+        """Current version, overrides and recent changes."""
+        return {
+            "version": self.version,
+            "overrides": self.overrides,
+            "history": list(self.history)
+        }
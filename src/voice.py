@@ -1,26 +1,50 @@
-from typing import Dict, Optional
-import elevenlabs
+import asyncio
+import functools
+from typing import Dict, Optional, Union, TYPE_CHECKING
 import numpy as np
 from loguru import logger
 import os
+from src.utils.settings import ProviderSettings, provider_settings
+from src.utils.startup import startup_report
+
+if TYPE_CHECKING:
+    import aiohttp
+
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
 
 class VoiceSynthesizer:
-    def __init__(self, config: Dict):
-        self.config = config
-        self.provider = config["default_provider"]
+    def __init__(self, config: Union[Dict, ProviderSettings]):
+        self.configure(provider_settings("voice", config))
+        self.http_session: Optional["aiohttp.ClientSession"] = None
         self.is_initialized = False
+
+    def configure(self, settings: ProviderSettings):
+        """Use new provider settings for syntheses that start from now on."""
+        self.settings = settings
+        self.provider = settings.default_provider
+        self.voice_id = settings.provider.voice_id
+        self.stability = settings.provider.stability
+        self.similarity_boost = settings.provider.similarity_boost
+        # "pcm_<rate>" returns raw int16 PCM that can be transcoded to the client's codec
+        self.output_format = settings.provider.output_format
+        # Request pieces that don't depend on the text are built once
+        self.request = self._build_request(settings)
+
+    @staticmethod
+    def _build_request(settings: ProviderSettings) -> Dict:
+        provider = settings.provider
+        return {
+            "voice_id": provider.voice_id,
+            "url": f"{ELEVENLABS_API_URL}/text-to-speech/{provider.voice_id}",
+            "params": {"output_format": provider.output_format},
+            "voice_settings": {"stability": provider.stability, "similarity_boost": provider.similarity_boost}
+        }
         
     async def initialize(self):
         """Initialize voice synthesis clients."""
         try:
-            self.provider = self.config.get("default_provider", "elevenlabs")
-            provider_config = self.config["providers"][self.provider]
-            
-            # Initialize ElevenLabs client
-            elevenlabs.set_api_key(os.getenv("ELEVENLABS_API_KEY"))
-            self.voice_id = provider_config.get("voice_id", "default")
-            self.stability = provider_config.get("stability", 0.5)
-            self.similarity_boost = provider_config.get("similarity_boost", 0.75)
+            # Initialize ElevenLabs client; the SDK is only imported when it is the configured provider
+            startup_report.import_module("elevenlabs").set_api_key(os.getenv("ELEVENLABS_API_KEY"))
             
             self.is_initialized = True
             logger.info(f"Voice synthesizer initialized with provider: {self.provider}")
@@ -28,14 +52,19 @@ class VoiceSynthesizer:
             logger.error(f"Failed to initialize voice synthesizer: {str(e)}")
             raise
         
-    async def synthesize(self, text: str) -> bytes:
-        """Synthesize text to speech."""
+    async def synthesize(self, text: str, settings: Optional[ProviderSettings] = None,
+                         timeout: Optional[float] = None) -> bytes:
+        """Synthesize text to speech, with `settings` if a turn captured older ones.
+
+        `timeout` (seconds) bounds the provider request.
+        """
         if not self.is_initialized:
             raise RuntimeError("Voice synthesizer not initialized")
             
         try:
             if self.provider == "elevenlabs":
-                return await self._synthesize_elevenlabs(text)
+                request = self.request if settings is None or settings is self.settings else self._build_request(settings)
+                return await self._synthesize_elevenlabs(text, request, timeout)
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
                 
@@ -43,27 +72,54 @@ class VoiceSynthesizer:
             logger.error(f"Voice synthesis error: {str(e)}")
             raise
             
-    async def _synthesize_elevenlabs(self, text: str) -> bytes:
+    async def _synthesize_elevenlabs(self, text: str, request: Dict, timeout: Optional[float] = None) -> bytes:
         """Synthesize text using ElevenLabs API."""
         try:
-            # Get voice configuration
-            voice_config = self.config["providers"]["elevenlabs"]
+            if request["params"]["output_format"].startswith("pcm_"):
+                return await self._synthesize_elevenlabs_pcm(text, request, timeout)
             
-            # Generate audio
-            audio = elevenlabs.generate(
+            # The SDK call blocks, so it runs in a thread; a turn deadline stops waiting for it
+            elevenlabs = startup_report.import_module("elevenlabs")
+            generate = functools.partial(
+                elevenlabs.generate,
                 text=text,
-                voice=voice_config["voice_id"],
+                voice=request["voice_id"],
                 model="eleven_monolingual_v1",
-                stability=voice_config["stability"],
-                similarity_boost=voice_config["similarity_boost"]
+                **request["voice_settings"]
             )
-            
-            return audio
+            return await asyncio.get_running_loop().run_in_executor(None, generate)
             
         except Exception as e:
             logger.error(f"ElevenLabs synthesis error: {str(e)}")
             raise
             
+    async def _synthesize_elevenlabs_pcm(self, text: str, request: Dict, timeout: Optional[float] = None) -> bytes:
+        """Request raw PCM from the ElevenLabs REST API."""
+        payload = {
+            "text": text,
+            "model_id": "eleven_monolingual_v1",
+            "voice_settings": request["voice_settings"]
+        }
+        headers = {"xi-api-key": os.getenv("ELEVENLABS_API_KEY", "")}
+        aiohttp = startup_report.import_module("aiohttp")
+        if self.http_session is None:
+            self.http_session = aiohttp.ClientSession()
+        async with self.http_session.post(
+            request["url"],
+            params=request["params"],
+            json=payload,
+            headers=headers,
+            **({"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {})
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def cleanup(self):
+        """Close HTTP connections."""
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+
     def health_check(self) -> Dict:
         """Check the health of the voice synthesis service."""
         return {
@@ -1,15 +1,83 @@
+import asyncio
 import pytest
 import os
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
 from src.audio import AudioProcessor
 from src.llm import LanguageModel
+from src.messages import Response
 from src.speech import SpeechRecognizer
 from src.voice import VoiceSynthesizer
 from src.retell_agent import RetellAgent
+from src.utils.serialization import loads
 from src.utils.session import SessionManager
+from src.utils.tuning import merge
 from fastapi.testclient import TestClient
 from app import app
 
+class RecordingWebSocket:
+    """Records what was sent, parsing text frames; `gate` holds each send until set."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.closed = None
+
+    async def send_json(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        await self.gate.wait()
+        self.sent.append(loads(data))
+
+    async def send_bytes(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = (code, reason)
+
+    def responses(self):
+        return [message for message in self.sent if isinstance(message, Response)]
+
+class StubLLM:
+    """Stands in for the language model, answering "Reply to <text>".
+
+    `delays` is how long each call takes: one value for every call, or a list
+    with one entry per call. An entry may be an `asyncio.Event` to wait for.
+    Each call is recorded in `calls` and answered turns join the history.
+    """
+
+    def __init__(self, agent, delays=0):
+        self.history = agent.language_model.conversation_history
+        self.delays = delays
+        self.calls = []
+        self.active = 0
+        self.concurrent = 0
+        agent.language_model.generate_response = self
+
+    @property
+    def texts(self):
+        return [call.text for call in self.calls]
+
+    async def __call__(self, text, session_id, settings=None, timeout=None, system_prompt=None):
+        self.calls.append(SimpleNamespace(text=text, settings=settings, timeout=timeout,
+                                          system_prompt=system_prompt))
+        delay = self.delays[len(self.calls) - 1] if isinstance(self.delays, list) else self.delays
+        self.active += 1
+        self.concurrent = max(self.concurrent, self.active)
+        try:
+            if isinstance(delay, asyncio.Event):
+                await delay.wait()
+            else:
+                await asyncio.sleep(delay)
+        finally:
+            self.active -= 1
+        self.history.setdefault(session_id, []).append({"content": text})
+        return f"Reply to {text}"
+
 @pytest.fixture
 def mock_env(monkeypatch):
     """Mock environment variables."""
@@ -152,6 +220,18 @@ def retell_agent(config, session_manager):
     """Retell agent fixture."""
     return RetellAgent(config, session_manager)
 
+@pytest.fixture
+def make_agent(config, session_manager):
+    """Build Retell agents with sections merged over the test configuration.
+
+    Synthesis is stubbed to return `audio`.
+    """
+    def make(overrides=None, audio=b"audio"):
+        agent = RetellAgent(merge(config, overrides or {}), session_manager)
+        agent.voice_synthesizer.synthesize = AsyncMock(return_value=audio)
+        return agent
+    return make
+
 @pytest.fixture
 def client():
     """Test client fixture."""
@@ -1,6 +1,12 @@
+import asyncio
+import socket
 import pytest
+import uvicorn
+import websockets
 from fastapi.testclient import TestClient
+import app as app_module
 from app import app
+from src.utils.concurrency import AdmissionDecision
 
 @pytest.fixture
 def client():
@@ -30,3 +36,37 @@ def test_websocket_connection(client):
         websocket.send_bytes(b"test_audio_data")
         response = websocket.receive_bytes()
         assert isinstance(response, bytes)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reject_with", ["drain", "admission", "profile", "codec"])
+async def test_rejections_reach_client_with_close_code(monkeypatch, reject_with):
+    # TestClient accepts closes before the handshake; a real server answers them with HTTP 403
+    expected, query = {
+        "drain": (1012, ""),
+        "admission": (1013, ""),
+        "profile": (1008, "?profile=unknown"),
+        "codec": (1003, "?codec=speex"),
+    }[reject_with]
+    if reject_with == "drain":
+        monkeypatch.setattr(app_module.drain_controller, "is_draining", True)
+    elif reject_with == "admission":
+        monkeypatch.setattr(app_module.retell_agent, "admit",
+                            lambda *args: AdmissionDecision(False, 1013, "Server overloaded"))
+    else:
+        monkeypatch.setattr(app_module.retell_agent, "admit", lambda *args: AdmissionDecision(True))
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        port = sock.getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}/conversation{query}") as websocket:
+            with pytest.raises(websockets.ConnectionClosed):
+                await websocket.recv()
+        assert websocket.close_code == expected
+    finally:
+        server.should_exit = True
+        await task
@@ -0,0 +1,114 @@
+import json
+import time
+import wave
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.retell_agent import RetellAgent
+from src.speech import TranscriptionResult
+from src.utils.archive import Archiver
+from src.utils.settings import ArchiveSettings
+
+@pytest.fixture
+def archiver(tmp_path):
+    archiver = Archiver(ArchiveSettings(enabled=True, directory=str(tmp_path), segment_seconds=1))
+    yield archiver
+    archiver.stop()
+
+def frames(path):
+    with wave.open(str(path), "rb") as f:
+        return f.getframerate(), f.getnframes()
+
+def test_writes_audio_segments_and_transcript(archiver, tmp_path):
+    archiver.start()
+    # 1.5 s of 16 kHz audio in 100 ms frames
+    for _ in range(15):
+        archiver.audio("call-1", "in", np.full(1600, 0.1, dtype=np.float32), 16000)
+    archiver.audio("call-1", "out", np.zeros(8000, dtype=np.int16).tobytes(), 16000)
+    archiver.event("call-1", "transcription", text="Hello")
+    archiver.event("call-1", "reply", text="Hi there", rung="full")
+    archiver.close_session("call-1")
+    archiver.stop()
+
+    session = tmp_path / "call-1"
+    assert frames(session / "in-16000-0000.wav") == (16000, 16000)
+    assert frames(session / "in-16000-0001.wav") == (16000, 8000)
+    assert frames(session / "out-16000-0000.wav") == (16000, 8000)
+    lines = [json.loads(line) for line in (session / "transcript.jsonl").read_text().splitlines()]
+    assert [(line["event"], line["text"]) for line in lines] == [("transcription", "Hello"), ("reply", "Hi there")]
+    assert lines[1]["rung"] == "full"
+    assert archiver.stats()["open_sessions"] == 0
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    archiver = Archiver(ArchiveSettings(enabled=True, directory=str(tmp_path), queue_size=2))
+    # Not started, so nothing drains the queue
+    for _ in range(5):
+        archiver.event("call-1", "transcription", text="Hello")
+    archiver.close_session("call-1")
+    assert archiver.stats()["dropped"] == 3
+    assert list(archiver.closing) == [("call-1", 2)]
+
+    archiver.start()
+    archiver.stop()
+    assert len((tmp_path / "call-1" / "transcript.jsonl").read_text().splitlines()) == 2
+    assert archiver.stats()["open_sessions"] == 0
+
+def test_close_runs_while_the_queue_stays_busy(tmp_path):
+    archiver = Archiver(ArchiveSettings(enabled=True, directory=str(tmp_path), queue_size=2))
+    archiver.event("call-1", "transcription", text="Hello")
+    archiver.event("call-1", "reply", text="Hi there")
+    archiver.close_session("call-1")
+    # Sustained load: the queue is never seen empty
+    archiver.queue.empty = lambda: False
+    archiver.start()
+    for _ in range(100):
+        if not archiver.closing:
+            break
+        time.sleep(0.01)
+    assert not archiver.closing
+    assert archiver.stats()["open_sessions"] == 0
+    archiver.stop()
+
+def test_segment_is_readable_after_sync(archiver, tmp_path):
+    archiver.start()
+    archiver.audio("call-1", "in", np.zeros(1600, dtype=np.float32), 16000)
+    archiver.audio("call-1", "in", np.zeros(1600, dtype=np.float32), 16000)
+    while archiver.stats()["written"] < 2:
+        time.sleep(0.01)
+    # As the periodic fsync leaves it, before the segment is closed
+    archiver._sync()
+    assert frames(tmp_path / "call-1" / "in-16000-0000.wav") == (16000, 3200)
+
+def test_resumed_session_keeps_earlier_segments(archiver, tmp_path):
+    archiver.start()
+    archiver.audio("call-1", "in", np.zeros(1600, dtype=np.float32), 16000)
+    archiver.close_session("call-1")
+    archiver.audio("call-1", "in", np.zeros(1600, dtype=np.float32), 16000)
+    archiver.stop()
+    assert sorted(path.name for path in (tmp_path / "call-1").glob("*.wav")) == [
+        "in-16000-0000.wav", "in-16000-0001.wav"
+    ]
+
+@pytest.mark.asyncio
+async def test_agent_archives_a_turn(config, session_manager, archiver, tmp_path):
+    config["voice"]["providers"]["elevenlabs"]["output_format"] = "pcm_16000"
+    agent = RetellAgent(config, session_manager)
+    agent.archiver = archiver
+    archiver.start()
+    agent.audio_processor.process = MagicMock(return_value=np.zeros(1600, dtype=np.float32))
+    agent.speech_recognizer.transcribe = AsyncMock(
+        return_value=TranscriptionResult(text="Hello.", is_final=True, confidence=0.9, language="en-US")
+    )
+    agent.language_model.generate_response = AsyncMock(return_value="Hi.")
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=np.zeros(3200, dtype=np.int16).tobytes())
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(MagicMock(send_json=AsyncMock()), b"frame", session_id)
+    session_manager.end_session(session_id)
+    archiver.stop()
+
+    session = tmp_path / session_id
+    assert frames(session / "in-16000-0000.wav") == (16000, 1600)
+    assert frames(session / "out-16000-0000.wav") == (16000, 3200)
+    events = [json.loads(line)["event"] for line in (session / "transcript.jsonl").read_text().splitlines()]
+    assert events == ["transcription", "turn", "reply"]
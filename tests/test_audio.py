@@ -55,3 +55,15 @@ def test_automatic_gain_control(audio_processor):
     
     # Check if gain was adjusted
     assert np.max(np.abs(processed)) <= 1.0
+
+def test_session_buffers(audio_processor):
+    frame = np.full(1024, 0.5, dtype=np.float32).tobytes()
+    for _ in range(5):
+        audio_processor.process(frame, "session")
+
+    state = audio_processor.sessions["session"]
+    assert state.buffer.shape == (4096, 1)
+    assert state.buffer_index == (5 * 1024) % 4096
+
+    audio_processor.release_session("session")
+    assert "session" not in audio_processor.sessions
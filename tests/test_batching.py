@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from src.utils.batching import FrameBatcher
+
+@pytest.mark.asyncio
+async def test_frames_submitted_together_share_a_batch():
+    batches = []
+
+    def process_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = FrameBatcher(process_batch)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+    assert results == [i * 2 for i in range(10)]
+    assert batches == [list(range(10))]
+
+@pytest.mark.asyncio
+async def test_window_adapts_to_arrival_rate():
+    batcher = FrameBatcher(lambda items: items, max_window=0.004, target_batch=16)
+    assert batcher.window == 0.0
+
+    # One frame every 10 ms: not worth waiting for
+    batcher.interval = 0.01
+    assert batcher.window == 0.0
+
+    # One frame every 0.1 ms: wait long enough to collect a target batch
+    batcher.interval = 0.0001
+    assert batcher.window == pytest.approx(0.0016)
+
+    batcher.interval = 0.00001
+    assert batcher.window == pytest.approx(0.00016)
+    batcher.interval = 0.001
+    assert batcher.window == 0.004
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_and_errors_fail_one_item():
+    def process_batch(items):
+        return [ValueError("bad") if item < 0 else item for item in items]
+
+    batcher = FrameBatcher(process_batch, max_batch=2)
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()["batch_size"]["count"] == 1
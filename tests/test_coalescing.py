@@ -0,0 +1,141 @@
+import asyncio
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.speech import TranscriptionResult
+from tests.conftest import RecordingWebSocket, StubLLM
+
+def result(text):
+    return TranscriptionResult(text=text, is_final=True, confidence=0.9, language="en-US")
+
+@pytest.fixture
+def agent(make_agent):
+    agent = make_agent({"turn": {"debounce_ms": 400}})
+    agent.audio_processor.process = MagicMock(return_value=np.zeros(160, dtype=np.float32))
+    return agent
+
+async def settle(agent):
+    while agent.pending_turns:
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_fragments_within_debounce_make_one_request(agent, session_manager):
+    llm = StubLLM(agent, 0.2)
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Book a flight"), result("to Boston.")])
+    websocket = RecordingWebSocket()
+    session_id = session_manager.create_session()
+
+    assert await agent.handle_frame(websocket, b"frame", session_id) is None
+    await asyncio.sleep(0.05)
+    assert await agent.handle_frame(websocket, b"frame", session_id) is None
+    await settle(agent)
+
+    assert llm.texts == ["Book a flight", "Book a flight to Boston."]
+    assert [message.text for message in websocket.responses()] == ["Reply to Book a flight to Boston."]
+    stats = agent.turn_stats()
+    assert stats["user_turns"] == 1
+    assert stats["merged_turns"] == 1
+    assert stats["llm_calls_per_turn"] == 2
+
+@pytest.mark.asyncio
+async def test_merged_turn_restores_history(agent, session_manager):
+    StubLLM(agent)
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Book a flight"), result("to Boston.")])
+
+    async def slow_synthesize(text, settings=None, timeout=None):
+        await asyncio.sleep(0.2)
+        return b"audio"
+
+    agent.voice_synthesizer.synthesize = slow_synthesize
+    websocket = RecordingWebSocket()
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(websocket, b"frame", session_id)
+    await asyncio.sleep(0.05)
+    # The first reply was generated but not yet sent
+    assert agent.language_model.conversation_history[session_id] == [{"content": "Book a flight"}]
+    await agent.handle_frame(websocket, b"frame", session_id)
+    await settle(agent)
+
+    assert agent.language_model.conversation_history[session_id] == [{"content": "Book a flight to Boston."}]
+    assert len(websocket.responses()) == 1
+
+@pytest.mark.asyncio
+async def test_speech_after_debounce_is_a_new_turn(agent, session_manager):
+    llm = StubLLM(agent)
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Hello."), result("Are you there?")])
+    websocket = RecordingWebSocket()
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(websocket, b"frame", session_id)
+    await settle(agent)
+    await agent.handle_frame(websocket, b"frame", session_id)
+    await settle(agent)
+
+    assert llm.texts == ["Hello.", "Are you there?"]
+    assert len(websocket.responses()) == 2
+    assert agent.turn_stats()["llm_calls_per_turn"] == 1
+
+@pytest.mark.asyncio
+async def test_ending_session_cancels_pending_turn(agent, session_manager):
+    StubLLM(agent, 1)
+    agent.speech_recognizer.transcribe = AsyncMock(return_value=result("Hello."))
+    websocket = RecordingWebSocket()
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(websocket, b"frame", session_id)
+    task = agent.pending_turns[session_id].task
+    session_manager.end_session(session_id)
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert websocket.responses() == []
+
+@pytest.mark.asyncio
+async def test_no_debounce_answers_inline(make_agent, session_manager):
+    agent = make_agent()
+    agent.audio_processor.process = MagicMock(return_value=np.zeros(160, dtype=np.float32))
+    agent.speech_recognizer.transcribe = AsyncMock(return_value=result("Hello."))
+    StubLLM(agent)
+
+    response = await agent.handle_frame(RecordingWebSocket(), b"frame", session_manager.create_session())
+    assert response["data"]["text"] == "Reply to Hello."
+
+@pytest.mark.asyncio
+async def test_turn_after_debounce_waits_for_reply_in_flight(agent, session_manager):
+    release = asyncio.Event()
+    llm = StubLLM(agent, [release, 0])
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Hello."), result("Are you there?")])
+    websocket = RecordingWebSocket()
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(websocket, b"frame", session_id)
+    first = agent.pending_turns[session_id]
+    await asyncio.sleep(0.45)
+    # Past the debounce window, before the first reply is sent
+    await agent.handle_frame(websocket, b"frame", session_id)
+    await asyncio.sleep(0.05)
+    assert llm.texts == ["Hello."]
+    release.set()
+    await settle(agent)
+
+    assert first.task.done() and not first.task.cancelled()
+    assert llm.concurrent == 1
+    assert llm.texts == ["Hello.", "Are you there?"]
+    assert [message.text for message in websocket.responses()] == ["Reply to Hello.", "Reply to Are you there?"]
+    assert agent.language_model.conversation_history[session_id] == [{"content": "Hello."}, {"content": "Are you there?"}]
+
+@pytest.mark.asyncio
+async def test_ending_session_cancels_queued_turns(agent, session_manager):
+    StubLLM(agent, 1)
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Hello."), result("Are you there?")])
+    session_id = session_manager.create_session()
+
+    await agent.handle_frame(RecordingWebSocket(), b"frame", session_id)
+    first = agent.pending_turns[session_id].task
+    agent.pending_turns[session_id].heard_at -= 1
+    await agent.handle_frame(RecordingWebSocket(), b"frame", session_id)
+    second = agent.pending_turns[session_id].task
+    await asyncio.sleep(0.05)
+    session_manager.end_session(session_id)
+    await asyncio.wait([first, second], timeout=0.5)
+    assert first.cancelled() and second.cancelled()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.codec import OPUS_FRAME_MS, OpusCodec, create_codec
+from src.utils.exceptions import AudioProcessingError
+
+@pytest.fixture
+def sine():
+    t = np.arange(1600) / 16000
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+@pytest.mark.parametrize("name,bytes_per_sample,tolerance", [
+    ("float32", 4, 1e-7),
+    ("pcm16", 2, 1e-4),
+    ("mulaw", 1, 0.02),
+    ("alaw", 1, 0.02),
+])
+def test_codec_round_trip(sine, name, bytes_per_sample, tolerance):
+    codec = create_codec(name, 16000)
+    frames = codec.encode(sine)
+    assert len(frames) == 1
+    assert len(frames[0]) == len(sine) * bytes_per_sample
+
+    decoded = codec.decode(frames[0])
+    assert decoded.dtype == np.float32
+    assert np.max(np.abs(decoded - sine)) < tolerance
+    assert codec.duration(frames[0]) == pytest.approx(0.1)
+
+def test_g711_known_values():
+    mulaw = create_codec("mulaw", 8000)
+    alaw = create_codec("alaw", 8000)
+    silence = np.zeros(4, dtype=np.float32)
+    assert mulaw.encode(silence)[0] == b"\xff" * 4
+    assert alaw.encode(silence)[0] == b"\xd5" * 4
+
+def test_codec_aliases_and_errors():
+    assert create_codec("PCMU", 8000).name == "mulaw"
+    assert create_codec("linear16", 16000).name == "pcm16"
+    with pytest.raises(AudioProcessingError):
+        create_codec("flac", 16000)
+
+def test_opus_packet_duration():
+    # config 1 (SILK, 20 ms), one frame
+    assert OpusCodec.duration(None, bytes([1 << 3, 0])) == pytest.approx(0.02)
+    # config 31 (CELT, 20 ms), code 3 with 3 frames
+    assert OpusCodec.duration(None, bytes([(31 << 3) | 3, 3])) == pytest.approx(0.06)
+    assert len(OPUS_FRAME_MS) == 32
+
+def test_audio_processor_decodes_session_codec(audio_processor, sine):
+    audio_processor.open_session("telephony", "mulaw")
+    encoded = create_codec("mulaw", 16000).encode(sine)[0]
+
+    processed = audio_processor.process(encoded, "telephony")
+    assert processed.dtype == np.float32
+    assert len(processed) == len(sine)
+    assert audio_processor.duration(encoded, "telephony") == pytest.approx(0.1)
+
+def test_audio_processor_transcodes_pcm_output(audio_processor, sine):
+    audio_processor.open_session("telephony", "mulaw")
+    pcm = (sine * 32767).astype(np.int16).tobytes()
+
+    frames = audio_processor.encode_output(pcm, "pcm_16000", "telephony")
+    assert len(frames[0]) == len(sine)
+    # Non-PCM provider output is passed through
+    assert audio_processor.encode_output(b"mp3", "mp3_44100", "telephony") == [b"mp3"]
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from src.utils.concurrency import (
+    AdmissionController,
+    ProviderLimiter,
+    WS_CLOSE_POLICY_VIOLATION,
+    WS_CLOSE_TRY_AGAIN_LATER,
+    build_limiters,
+)
+from src.utils.exceptions import ProviderOverloadedError
+from src.utils.rate_limit import ClientLimits
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_in_flight():
+    limiter = ProviderLimiter("openai", max_concurrency=2, max_queue=10, queue_timeout=1.0)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert limiter.queue_wait.count == 6
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_when_queue_full():
+    limiter = ProviderLimiter("deepgram", max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    with pytest.raises(ProviderOverloadedError):
+        async with limiter.acquire():
+            pass
+    assert limiter.rejected.value == 1
+
+@pytest.mark.asyncio
+async def test_limiter_queue_timeout():
+    limiter = ProviderLimiter("elevenlabs", max_concurrency=1, max_queue=5, queue_timeout=0.01)
+    async with limiter.acquire():
+        with pytest.raises(ProviderOverloadedError):
+            async with limiter.acquire():
+                pass
+
+def test_admission_rejects_over_budget():
+    limiters = build_limiters({}, ["deepgram", "openai"])
+    limiters["openai"].service_time_ms = 800
+    limiters["openai"].in_flight = limiters["openai"].max_concurrency
+    limiters["openai"].waiting = 40
+    controller = AdmissionController(limiters, latency_budget_ms=1000, client_limits=ClientLimits({}))
+
+    decision = controller.admit("10.0.0.1", ["deepgram", "openai"])
+    assert not decision.admitted
+    assert decision.code == WS_CLOSE_TRY_AGAIN_LATER
+
+def test_admission_applies_client_rate_limit():
+    controller = AdmissionController({}, latency_budget_ms=0, client_limits=ClientLimits({"rate_limit": 2}))
+    assert controller.admit("10.0.0.1", []).admitted
+    assert controller.admit("10.0.0.1", []).admitted
+    decision = controller.admit("10.0.0.1", [])
+    assert decision.code == WS_CLOSE_POLICY_VIOLATION
+    # Other clients have their own bucket
+    assert controller.admit("10.0.0.2", []).admitted
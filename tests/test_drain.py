@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from src.messages import Reconnect
+from src.utils.concurrency import WS_CLOSE_SERVICE_RESTART
+from src.utils.drain import DrainController
+from src.utils.session import SessionManager
+from tests.conftest import RecordingWebSocket
+
+class FakeStore:
+    def __init__(self):
+        self.saved = {}
+
+    async def save(self, session_id, state):
+        self.saved[session_id] = state
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_busy_sessions():
+    manager = SessionManager()
+    idle_ws, busy_ws = RecordingWebSocket(), RecordingWebSocket()
+    connections = {manager.create_session("idle"): idle_ws, manager.create_session("busy"): busy_ws}
+    store = FakeStore()
+    controller = DrainController(
+        manager, connections, lambda session_id: {"history": [session_id]},
+        session_store=store, timeout=5.0, poll_interval=0.01
+    )
+
+    with manager.stage("busy", "turn"):
+        task = controller.start()
+        assert controller.is_draining
+        await asyncio.sleep(0.03)
+        # Idle session is handed off straight away; busy one waits for its turn
+        assert idle_ws.closed[0] == WS_CLOSE_SERVICE_RESTART
+        assert busy_ws.closed is None
+
+    await task
+    assert busy_ws.closed[0] == WS_CLOSE_SERVICE_RESTART
+    assert busy_ws.sent == [Reconnect(session_id="busy")]
+    assert store.saved == {"idle": {"history": ["idle"]}, "busy": {"history": ["busy"]}}
+    assert connections == {}
+
+@pytest.mark.asyncio
+async def test_drain_deadline_closes_busy_sessions():
+    manager = SessionManager()
+    websocket = RecordingWebSocket()
+    connections = {manager.create_session("busy"): websocket}
+    controller = DrainController(manager, connections, dict, timeout=0.05, poll_interval=0.01)
+
+    with manager.stage("busy", "turn"):
+        await controller.start()
+
+    assert websocket.closed[0] == WS_CLOSE_SERVICE_RESTART
+    # Without a session store there is nothing to resume
+    assert websocket.sent == []
+
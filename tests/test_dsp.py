@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from src.audio import AudioProcessor
+from src.dsp import AutomaticGainControl, NoiseSuppressor, process_batched
+from src.utils.exceptions import AudioProcessingError
+
+RATE = 16000
+
+def speech_like(seconds=3.0, start=1.0, end=2.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    voiced = (t > start) & (t < end)
+    tone = 0.3 * np.sin(2 * np.pi * 300 * t) + 0.1 * np.sin(2 * np.pi * 1200 * t)
+    return np.where(voiced, tone, 0).astype(np.float32)
+
+def stream(processor, signal, sizes=(320,)):
+    chunks, start, i = [], 0, 0
+    while start < len(signal):
+        size = sizes[i % len(sizes)]
+        chunks.append(processor.process(signal[start:start + size]))
+        start += size
+        i += 1
+    return np.concatenate(chunks)
+
+def snr_db(signal, reference):
+    return 10 * np.log10(np.sum(reference ** 2) / np.sum((signal - reference) ** 2))
+
+def test_suppressor_reconstructs_with_unit_gain():
+    suppressor = NoiseSuppressor(RATE, oversubtraction=0.0)
+    signal = np.random.default_rng(0).uniform(-0.5, 0.5, RATE).astype(np.float32)
+
+    # Odd frame sizes still return exactly as many samples as were passed in
+    output = stream(suppressor, signal, sizes=(320, 37, 161))
+    assert len(output) == len(signal)
+
+    delay = suppressor.latency
+    np.testing.assert_allclose(output[delay:], signal[:-delay], atol=1e-5)
+
+def test_suppressor_improves_snr():
+    clean = speech_like()
+    noise = (np.random.default_rng(1).standard_normal(len(clean)) * 0.02).astype(np.float32)
+    suppressor = NoiseSuppressor(RATE)
+    output = stream(suppressor, clean + noise)
+
+    delay = suppressor.latency
+    before = snr_db((clean + noise)[:-delay], clean[:-delay])
+    after = snr_db(output[delay:], clean[:-delay])
+    assert after > before + 3
+
+    # Noise in the trailing pause is attenuated by more than 6 dB
+    tail = output[-RATE // 2:]
+    assert np.sqrt(np.mean(tail ** 2)) < 0.5 * 0.02
+
+def test_suppressor_stereo_shape():
+    suppressor = NoiseSuppressor(RATE, channels=2)
+    frame = np.zeros((333, 2), dtype=np.float32)
+    assert suppressor.process(frame).shape == (333, 2)
+
+def test_agc_raises_quiet_speech_smoothly():
+    agc = AutomaticGainControl(RATE, target_rms=0.1)
+    t = np.arange(RATE * 2) / RATE
+    quiet = (0.03 * np.sin(2 * np.pi * 300 * t)).astype(np.float32)
+    output = stream(agc, quiet)
+
+    settled = output[RATE:]
+    assert np.sqrt(np.mean(settled ** 2)) == pytest.approx(0.1, rel=0.2)
+    # Gain is ramped across blocks, so there are no steps between frames
+    envelope = np.abs(output[RATE:]).reshape(-1, 160).max(axis=1)
+    assert np.max(np.abs(np.diff(envelope))) < 0.01
+
+def test_agc_holds_gain_in_silence():
+    agc = AutomaticGainControl(RATE)
+    agc.process(np.full(1600, 0.1, dtype=np.float32))
+    gain = agc.gain
+
+    noise = np.random.default_rng(2).uniform(-0.001, 0.001, RATE).astype(np.float32)
+    output = agc.process(noise)
+    assert agc.gain == pytest.approx(gain, rel=0.05)
+    assert np.max(np.abs(output)) < 0.01
+
+def test_audio_processor_uses_session_dsp(audio_processor):
+    state = audio_processor.open_session("dsp")
+    assert state.suppressor is not None and state.agc is not None
+
+    frame = speech_like(seconds=0.02, start=0.0).tobytes()
+    processed = audio_processor.process(frame, "dsp")
+    assert len(processed) == 320
+    assert state.suppressor.noise_power is not None
+
+def test_batched_suppression_matches_per_session():
+    rng = np.random.default_rng(3)
+    signals = [(speech_like(seconds=0.5) + rng.standard_normal(8000) * 0.02).astype(np.float32) for _ in range(4)]
+    single = [NoiseSuppressor(RATE) for _ in signals]
+    batched = [NoiseSuppressor(RATE) for _ in signals]
+
+    for start in range(0, 8000, 320):
+        frames = [signal[start:start + 320].reshape(-1, 1) for signal in signals]
+        expected = [suppressor.process(frame) for suppressor, frame in zip(single, frames)]
+        for output, reference in zip(process_batched(batched, frames), expected):
+            np.testing.assert_allclose(output, reference, atol=1e-6)
+
+def test_batched_agc_matches_per_session():
+    levels = [0.01, 0.03, 0.2]
+    single = [AutomaticGainControl(RATE) for _ in levels]
+    batched = [AutomaticGainControl(RATE) for _ in levels]
+    t = np.arange(320) / RATE
+    for _ in range(20):
+        frames = [(level * np.sin(2 * np.pi * 300 * t)).astype(np.float32).reshape(-1, 1) for level in levels]
+        expected = [control.process(frame) for control, frame in zip(single, frames)]
+        for output, reference in zip(process_batched(batched, frames), expected):
+            np.testing.assert_allclose(output, reference, atol=1e-6)
+    assert [control.gain for control in batched] == pytest.approx([control.gain for control in single])
+
+def test_audio_processor_batch_matches_process(audio_processor, config):
+    rng = np.random.default_rng(4)
+    for session_id, rate in (("a", 16000), ("b", 16000), ("c", 8000)):
+        audio_processor.open_session(session_id, sample_rate=rate)
+    frames = [(rng.uniform(-0.3, 0.3, 320).astype(np.float32).tobytes(), session_id)
+              for session_id in ("a", "b", "c", "a")]
+    results = audio_processor.process_batch(frames + [(b"\x00" * 3, "b")])
+
+    reference = AudioProcessor(config["audio"])
+    for session_id, rate in (("a", 16000), ("b", 16000), ("c", 8000)):
+        reference.open_session(session_id, sample_rate=rate)
+    for (audio_data, session_id), result in zip(frames, results):
+        np.testing.assert_allclose(result, reference.process(audio_data, session_id), atol=1e-6)
+    assert isinstance(results[-1], AudioProcessingError)
+
+def test_first_frame_of_unopened_session_is_streamed(audio_processor, config):
+    rng = np.random.default_rng(5)
+    frames = [rng.uniform(-0.3, 0.3, 320).astype(np.float32).tobytes() for _ in range(3)]
+    reference = AudioProcessor(config["audio"])
+    reference.open_session("s1")
+    for frame in frames:
+        np.testing.assert_allclose(audio_processor.process(frame, "s1"), reference.process(frame, "s1"), atol=1e-6)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import signal
+import numpy as np
+import pytest
+from src.audio import AudioProcessor
+from src.dsp_pool import DSPPool
+from src.utils.exceptions import AudioProcessingError
+
+@pytest.fixture
+async def dsp_pool(config):
+    pool = DSPPool(config["audio"], workers=2)
+    await pool.initialize()
+    yield pool
+    await pool.cleanup()
+
+def test_session_affinity_is_stable(config):
+    pool = DSPPool(config["audio"], workers=4)
+    assert all(pool.worker_for("session") == pool.worker_for("session") for _ in range(10))
+    assert len({pool.worker_for(f"session-{i}") for i in range(100)}) == 4
+
+@pytest.mark.asyncio
+async def test_pool_matches_in_loop_processing(dsp_pool, config):
+    local = AudioProcessor(config["audio"])
+    frames = [np.random.uniform(-0.5, 0.5, 320).astype(np.float32).tobytes() for _ in range(5)]
+
+    # Session state carries across frames in the worker exactly as it does in-process
+    for session_id in ("a", "b"):
+        await dsp_pool.open_session(session_id)
+        local.open_session(session_id)
+        for frame in frames:
+            remote = await dsp_pool.process(frame, session_id)
+            np.testing.assert_allclose(remote, local.process(frame, session_id), atol=1e-6)
+
+    tts = (np.zeros(160, dtype=np.int16)).tobytes()
+    assert await dsp_pool.encode_output(tts, "pcm_16000", "a") == local.encode_output(tts, "pcm_16000", "a")
+    dsp_pool.release_session("a")
+
+@pytest.mark.asyncio
+async def test_oversized_frames_bypass_shared_memory(dsp_pool):
+    await dsp_pool.open_session("large")
+    frame = np.zeros(dsp_pool.slot_bytes, dtype=np.float32).tobytes()
+    output = await dsp_pool.process(frame, "large")
+    assert len(output) == dsp_pool.slot_bytes
+    assert all(len(worker.ring.free) == worker.ring.slots for worker in dsp_pool.workers)
+
+@pytest.mark.asyncio
+async def test_worker_errors_are_raised(dsp_pool):
+    with pytest.raises(AudioProcessingError):
+        await dsp_pool.open_session("bad", sample_rate=4000)
+
+@pytest.mark.asyncio
+async def test_dead_worker_is_replaced_and_its_sessions_reopened(dsp_pool, config):
+    await dsp_pool.open_session("a", "pcm16")
+    index = dsp_pool.worker_for("a")
+    dead = dsp_pool.workers[index]
+    dead.process.kill()
+    while dsp_pool.workers[index] is dead:
+        await asyncio.sleep(0.01)
+
+    # The session starts over on the new worker instead of failing until a restart
+    local = AudioProcessor(config["audio"])
+    local.open_session("a", "pcm16")
+    frame = np.arange(320, dtype=np.int16).tobytes()
+    np.testing.assert_allclose(await dsp_pool.process(frame, "a"), local.process(frame, "a"), atol=1e-6)
+    assert all(worker.process.is_alive() for worker in dsp_pool.workers)
+
+@pytest.mark.asyncio
+async def test_full_pipe_does_not_block_the_event_loop(dsp_pool):
+    await dsp_pool.open_session("a")
+    worker = dsp_pool.workers[dsp_pool.worker_for("a")]
+    os.kill(worker.process.pid, signal.SIGSTOP)
+    try:
+        # Oversized frames go through the pipe, far more than it buffers
+        frame = np.zeros(dsp_pool.slot_bytes, dtype=np.float32).tobytes()
+        requests = [asyncio.ensure_future(dsp_pool.process(frame, "a")) for _ in range(64)]
+        await asyncio.sleep(0.1)
+        assert not any(request.done() for request in requests)
+    finally:
+        os.kill(worker.process.pid, signal.SIGCONT)
+    outputs = await asyncio.wait_for(asyncio.gather(*requests), 10)
+    assert all(len(output) == dsp_pool.slot_bytes for output in outputs)
@@ -0,0 +1,131 @@
+import asyncio
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.endpointing import COMPLETE, INCOMPLETE, UNKNOWN, Endpointer, completeness
+from src.retell_agent import RetellAgent
+from src.speech import TranscriptionResult
+from src.utils.settings import EndpointingSettings
+
+SETTINGS = EndpointingSettings(enabled=True)
+# 100 ms at 16 kHz
+SPEECH = np.full(1600, 0.1, dtype=np.float32)
+SILENCE = np.zeros(1600, dtype=np.float32)
+
+def result(text):
+    return TranscriptionResult(text=text, is_final=True, confidence=0.9, language="en-US")
+
+def feed(endpointer, frames, settings=SETTINGS):
+    """Run (audio, text) frames through the endpointer, returning the turns it ended."""
+    turns = []
+    for audio, text in frames:
+        endpointer.observe_audio("s", audio, settings)
+        turn = endpointer.end_of_turn("s", result(text) if text else None, settings)
+        if turn is not None:
+            turns.append(turn)
+    return turns
+
+@pytest.mark.parametrize("text, expected", [
+    ("I need to change my booking.", COMPLETE),
+    ("Is it open today?", COMPLETE),
+    ("I want to fly to Boston and", INCOMPLETE),
+    ("so, um", INCOMPLETE),
+    ("My account number is,", INCOMPLETE),
+    ("hello there", UNKNOWN),
+    ("", UNKNOWN),
+])
+def test_completeness(text, expected):
+    assert completeness(text) == expected
+
+def test_fragments_are_held_until_silence():
+    endpointer = Endpointer(16000)
+    turns = feed(endpointer, [(SPEECH, "I want to"), (SPEECH, "book a flight."), (SILENCE, None)])
+    assert turns == []
+    turns = feed(endpointer, [(SILENCE, None), (SILENCE, None)])
+    assert turns == ["I want to book a flight."]
+    assert endpointer.stats()["held_fragments"] == 2
+
+def test_trailing_conjunction_waits_longer():
+    endpointer = Endpointer(16000)
+    assert feed(endpointer, [(SPEECH, "I want to fly to Boston and")] + [(SILENCE, None)] * 10) == []
+    assert feed(endpointer, [(SPEECH, "then Denver.")] + [(SILENCE, None)] * 3) == [
+        "I want to fly to Boston and then Denver."
+    ]
+
+def test_aggressiveness_scales_waits():
+    eager = EndpointingSettings(enabled=True, aggressiveness=4.0)
+    assert Endpointer(16000).required_silence_ms("hello there", eager) == 175
+    assert feed(Endpointer(16000), [(SPEECH, "hello there"), (SILENCE, None), (SILENCE, None)], eager) == [
+        "hello there"
+    ]
+
+def test_silence_without_text_is_not_a_turn():
+    assert feed(Endpointer(16000), [(SILENCE, None)] * 20) == []
+
+@pytest.mark.asyncio
+async def test_agent_replies_once_per_utterance(config, session_manager):
+    config["endpointing"] = {"enabled": True, "silence_ms": 150, "complete_silence_ms": 150}
+    agent = RetellAgent(config, session_manager)
+    frames = iter([SPEECH, SPEECH, SILENCE, SILENCE])
+    agent.audio_processor.process = MagicMock(side_effect=lambda audio, session_id: next(frames))
+    agent.speech_recognizer.transcribe = AsyncMock(side_effect=[result("Book a flight"), result("to Boston.")])
+    agent.language_model.generate_response = AsyncMock(return_value="Sure.")
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=b"audio")
+    websocket = MagicMock(send_json=AsyncMock())
+    session_id = session_manager.create_session()
+
+    responses = [await agent.handle_frame(websocket, b"frame", session_id) for _ in range(4)]
+
+    assert responses[:3] == [None, None, None]
+    assert responses[3]["data"]["text"] == "Sure."
+    # Silent frames skip speech recognition
+    assert agent.speech_recognizer.transcribe.await_count == 2
+    agent.language_model.generate_response.assert_awaited_once()
+    assert agent.language_model.generate_response.call_args.args[0] == "Book a flight to Boston."
+
+@pytest.mark.asyncio
+async def test_held_utterance_ends_when_frames_stop():
+    # Clients with DTX or their own VAD send nothing once the caller goes quiet
+    endpointer = Endpointer(16000)
+    settings = EndpointingSettings(enabled=True, complete_silence_ms=50)
+    ended = []
+    endpointer.observe_audio("s", SPEECH, settings)
+    assert endpointer.end_of_turn("s", result("Book a flight."), settings, ended.append) is None
+
+    await asyncio.sleep(0.1)
+    assert ended == ["Book a flight."]
+    assert endpointer.stats()["timeouts"] == 1
+    assert endpointer.sessions["s"].parts == []
+
+@pytest.mark.asyncio
+async def test_speech_cancels_the_silence_timer():
+    endpointer = Endpointer(16000)
+    settings = EndpointingSettings(enabled=True, complete_silence_ms=50)
+    ended = []
+    endpointer.observe_audio("s", SPEECH, settings)
+    endpointer.end_of_turn("s", result("Book a flight."), settings, ended.append)
+    endpointer.observe_audio("s", SPEECH, settings)
+
+    await asyncio.sleep(0.1)
+    assert ended == []
+    endpointer.release("s")
+
+@pytest.mark.asyncio
+async def test_agent_replies_after_the_last_frame(config, session_manager):
+    config["endpointing"] = {"enabled": True, "complete_silence_ms": 50}
+    config["turn"] = {"debounce_ms": 0}
+    agent = RetellAgent(config, session_manager)
+    agent.audio_processor.process = MagicMock(return_value=SPEECH)
+    agent.speech_recognizer.transcribe = AsyncMock(return_value=result("Book a flight."))
+    agent.language_model.generate_response = AsyncMock(return_value="Sure.")
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=b"audio")
+    websocket = MagicMock(send_json=AsyncMock(), send_bytes=AsyncMock())
+    session_id = session_manager.create_session()
+
+    assert await agent.handle_frame(websocket, b"frame", session_id) is None
+    await asyncio.sleep(0.1)
+    await asyncio.gather(*(pending.task for pending in agent.pending_turns.values()))
+
+    agent.language_model.generate_response.assert_awaited_once()
+    sent = [call.args[0] for call in websocket.send_json.await_args_list]
+    assert sent[-1].text == "Sure."
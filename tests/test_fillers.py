@@ -0,0 +1,68 @@
+import asyncio
+import numpy as np
+import pytest
+from src.messages import Backchannel, Clear, TranscriptionResult
+from tests.conftest import RecordingWebSocket, StubLLM
+
+MESSAGE = TranscriptionResult(text="Hello", is_final=True)
+
+# One second of 16 kHz PCM
+CLIP = np.zeros(16000, dtype=np.int16).tobytes()
+
+@pytest.fixture
+def agent(make_agent):
+    return make_agent({"voice": {"providers": {"elevenlabs": {"output_format": "pcm_16000"}}},
+                       "turn": {"backchannel_delay_ms": 50, "backchannel_phrases": ["Mm-hmm."]}}, audio=CLIP)
+
+@pytest.fixture
+async def session_id(agent, session_manager):
+    session_id = session_manager.create_session()
+    await agent.open_audio_session(session_id, "mulaw", 8000)
+    return session_id
+
+@pytest.mark.asyncio
+async def test_clips_are_prepared_as_frames(agent, session_id):
+    await agent.prepare_fillers()
+    frames = agent.fillers.get(agent.tuning, "Mm-hmm.", session_id)
+    # 20 ms of 8 kHz mu-law per frame
+    assert len(frames) == 50
+    assert all(len(frame) == 160 for frame in frames)
+    assert agent.fillers.get(agent.tuning, "One moment, please.", session_id) is not None
+    assert agent.voice_synthesizer.synthesize.await_count == 2
+
+@pytest.mark.asyncio
+async def test_backchannel_cut_when_reply_is_ready(agent, session_id):
+    await agent.prepare_fillers()
+    StubLLM(agent, 0.2)
+    websocket = RecordingWebSocket()
+
+    response = await agent.handle_message(MESSAGE, session_id, websocket=websocket)
+
+    assert response["data"]["rung"] == "full"
+    assert websocket.sent[0] == Backchannel(text="Mm-hmm.")
+    assert websocket.sent[-1] == Clear()
+    clip_frames = websocket.sent[1:-1]
+    assert 0 < len(clip_frames) < 50
+    assert all(len(frame) == 160 for frame in clip_frames)
+    assert agent.turn_stats()["backchannels"] == 1
+
+@pytest.mark.asyncio
+async def test_no_backchannel_for_fast_reply(agent, session_id):
+    await agent.prepare_fillers()
+    StubLLM(agent)
+    websocket = RecordingWebSocket()
+    await agent.handle_message(MESSAGE, session_id, websocket=websocket)
+    assert websocket.sent == []
+    assert agent.turn_stats()["backchannels"] == 0
+
+@pytest.mark.asyncio
+async def test_missing_clip_is_synthesized_for_later_turns(agent, session_id):
+    StubLLM(agent, 0.1)
+    websocket = RecordingWebSocket()
+    await agent.handle_message(MESSAGE, session_id, websocket=websocket)
+    assert websocket.sent == []
+    assert agent.fillers.get(agent.tuning, "Mm-hmm.", session_id) is not None
+
+def test_encode_clip_flushes_partial_frame(audio_processor):
+    frames = audio_processor.encode_clip(np.zeros(170, dtype=np.int16).tobytes(), "pcm_8000", "pcm16", 8000)
+    assert [len(frame) for frame in frames] == [320, 20]
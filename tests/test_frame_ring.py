@@ -0,0 +1,29 @@
+import numpy as np
+from src.utils.frame_ring import FrameRing
+
+def test_slots_are_shared_between_attachments():
+    ring = FrameRing(4, 64)
+    try:
+        attached = FrameRing(4, 64, ring.name)
+        slot = ring.acquire()
+        length = ring.write(slot, np.arange(8, dtype=np.float32))
+        assert length == 32
+
+        # The attached side reads the frame and writes its result into the same slot
+        assert np.frombuffer(attached.read(slot, length), dtype=np.float32)[7] == 7
+        attached.write(slot, b"\x00" * 32)
+        np.testing.assert_array_equal(ring.array(slot, length), np.zeros(8, dtype=np.float32))
+        attached.close()
+    finally:
+        ring.close()
+
+def test_free_list_recycles_slots():
+    ring = FrameRing(2, 16)
+    try:
+        first, second = ring.acquire(), ring.acquire()
+        assert ring.acquire() is None
+        ring.release(first)
+        assert ring.acquire() == first
+        assert {first, second} == {0, 1}
+    finally:
+        ring.close()
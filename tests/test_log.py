@@ -0,0 +1,63 @@
+import json
+import sys
+import pytest
+from loguru import logger
+from src.utils import log
+from src.utils.context import current_session, current_turn
+from src.utils.log import SampledLog, configure_logging
+from src.utils.settings import MonitoringSettings
+
+@pytest.fixture
+def restore_logging():
+    yield
+    logger.remove()
+    logger.configure(patcher=lambda record: None)
+    logger.add(sys.stderr)
+    log._min_level = logger.level("DEBUG").no
+    log._sampling.update(rate=5.0, sample=100)
+
+def test_json_records_carry_session_and_turn(tmp_path, restore_logging):
+    path = tmp_path / "agent.log"
+    configure_logging(MonitoringSettings(log_level="INFO", log_json=True, log_file=str(path)))
+    session_token = current_session.set("session-1")
+    turn_token = current_turn.set("turn-1")
+    try:
+        logger.bind(rung="full").info("Reply for {} sent", "session-1")
+        logger.debug("Not written")
+    finally:
+        current_turn.reset(turn_token)
+        current_session.reset(session_token)
+    logger.complete()
+    logger.remove()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["message"] == "Reply for session-1 sent"
+    assert lines[0]["level"] == "INFO"
+    assert lines[0]["session_id"] == "session-1"
+    assert lines[0]["turn_id"] == "turn-1"
+    assert lines[0]["rung"] == "full"
+
+class Explodes:
+    def __format__(self, spec):
+        raise AssertionError("formatted a disabled record")
+
+def test_disabled_level_is_not_formatted(restore_logging):
+    configure_logging(MonitoringSettings(log_level="INFO"))
+    SampledLog("frame")("Frame {}", Explodes())
+    logger.debug("Frame {}", Explodes())
+
+def test_sampled_log_rate_limits(restore_logging):
+    records = []
+    logger.remove()
+    logger.add(lambda message: records.append(message.record), level="DEBUG")
+    log._sampling.update(rate=3.0, sample=10)
+    frames = SampledLog("frame")
+
+    for index in range(23):
+        frames("Frame {}", index)
+
+    # The first three fit the rate; after that one in ten gets through
+    assert [record["message"] for record in records] == ["Frame 0", "Frame 1", "Frame 2", "Frame 12", "Frame 22"]
+    assert [record["extra"]["suppressed"] for record in records] == [0, 0, 0, 9, 9]
+    assert records[0]["extra"]["event"] == "frame"
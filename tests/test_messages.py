@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.messages import Batch, Clear, Error, Response, TextInput, TranscriptionResult, decode, encode
+from src.retell_agent import RetellAgent
+from src.utils import serialization
+from src.utils.exceptions import ConfigurationError, MessageError
+from src.utils.serialization import configure_json, loads
+
+@pytest.fixture(params=["json", "orjson"])
+def encoder(request):
+    try:
+        configure_json(request.param)
+    except ConfigurationError:
+        pytest.skip(f"{request.param} is not installed")
+    yield request.param
+    configure_json("json")
+
+def test_encoders_agree_on_the_wire_format(encoder):
+    assert loads(encode(TranscriptionResult(text="Hi", is_final=False, confidence=0.5, language="en-US"))) == {
+        "type": "transcription",
+        "data": {"text": "Hi", "is_final": False, "confidence": 0.5, "language": "en-US"}
+    }
+    assert loads(encode(Batch((Clear(), Response(text="Hi", rung="full"))))) == {
+        "type": "batch",
+        "data": [{"type": "clear"}, {"type": "response", "data": {"text": "Hi", "rung": "full"}}]
+    }
+    assert serialization.encoder_name() == encoder
+
+def test_decodes_against_schemas(encoder):
+    assert decode('{"type": "text", "data": {"text": "Hello"}}') == TextInput(text="Hello")
+    assert decode(b'{"type": "transcription", "data": {"text": "Hi", "is_final": true, "confidence": 1}}') == (
+        TranscriptionResult(text="Hi", is_final=True, confidence=1)
+    )
+
+@pytest.mark.parametrize("data, error", [
+    ("Hello", "Malformed JSON"),
+    ('["text"]', "must be a JSON object"),
+    ('{"type": "config"}', "Unknown message type"),
+    ('{"type": "text", "data": "Hello"}', "data must be an object"),
+    ('{"type": "text", "data": {}}', "missing text"),
+    ('{"type": "transcription", "data": {"text": "Hi", "is_final": 1}}', "is_final must be bool"),
+    ('{"type": "transcription", "data": {"text": "Hi", "is_final": true, "confidence": true}}', "must be float"),
+])
+def test_rejects_what_matches_no_schema(data, error):
+    with pytest.raises(MessageError, match=error):
+        decode(data)
+
+def test_unknown_encoder_is_a_configuration_error():
+    with pytest.raises(ConfigurationError):
+        configure_json("simdjson")
+
+@pytest.mark.asyncio
+async def test_agent_answers_text_and_rejects_invalid_frames(config, session_manager):
+    agent = RetellAgent(config, session_manager)
+    agent.language_model.generate_response = AsyncMock(return_value="Hi.")
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=b"audio")
+    agent.audio_processor.encode_output = MagicMock(return_value=[])
+    websocket = MagicMock(send_json=AsyncMock())
+    session_id = session_manager.create_session()
+
+    response = await agent.handle_text('{"type": "text", "data": {"text": "Hello"}}', session_id, websocket)
+    assert response["data"]["text"] == "Hi."
+    assert agent.language_model.generate_response.await_args.args[0] == "Hello"
+
+    assert await agent.handle_text("Hello", session_id, websocket) is None
+    sent = websocket.send_json.await_args.args[0]
+    assert isinstance(sent, Error) and sent.error.startswith("Malformed JSON")
+    assert agent.turn_stats()["rejected_messages"] == 1
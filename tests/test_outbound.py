@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from src.messages import Backchannel, Clear, Response, TranscriptionResult
+from src.utils.concurrency import WS_CLOSE_POLICY_VIOLATION
+from src.utils.outbound import OutboundQueue, OutboundStats
+from src.utils.settings import OutboundSettings
+from tests.conftest import RecordingWebSocket
+
+def interim(text):
+    return TranscriptionResult(text=text, is_final=False)
+
+def wire(text):
+    """An interim transcription as the client receives it."""
+    return {"type": "transcription", "data": {"text": text, "is_final": False, "confidence": 0.0,
+                                              "language": ""}}
+
+@pytest.mark.asyncio
+async def test_sends_in_order():
+    websocket = RecordingWebSocket()
+    outbound = OutboundQueue(websocket, OutboundSettings())
+    outbound.start()
+    await outbound.send_json(Response(text="Hi", rung="full"))
+    await outbound.send_bytes(b"audio")
+    await outbound.flush()
+    await outbound.stop()
+    assert websocket.sent == [{"type": "response", "data": {"text": "Hi", "rung": "full"}}, b"audio"]
+
+@pytest.mark.asyncio
+async def test_latest_interim_supersedes_queued_one():
+    websocket = RecordingWebSocket()
+    websocket.gate.clear()
+    stats = OutboundStats()
+    outbound = OutboundQueue(websocket, OutboundSettings(), stats)
+    outbound.start()
+    await outbound.send_bytes(b"audio")
+    await asyncio.sleep(0.01)
+    for text in ("Hel", "Hello", "Hello th"):
+        await outbound.send_json(interim(text))
+    websocket.gate.set()
+    await outbound.flush()
+    await outbound.stop()
+    assert websocket.sent == [b"audio", wire("Hello th")]
+    assert stats.superseded.value == 2
+
+@pytest.mark.asyncio
+async def test_interim_dropped_when_congested():
+    websocket = RecordingWebSocket()
+    stats = OutboundStats()
+    outbound = OutboundQueue(websocket, OutboundSettings(congestion_bytes=100), stats)
+    # Not started, so the audio stays queued
+    await outbound.send_bytes(b"x" * 200)
+    await outbound.send_json(interim("Hello"))
+    await outbound.send_json(TranscriptionResult(text="Hello.", is_final=True))
+    assert len(outbound.items) == 2
+    assert stats.dropped.value == 1
+
+@pytest.mark.asyncio
+async def test_coalesces_adjacent_control_messages():
+    websocket = RecordingWebSocket()
+    websocket.gate.clear()
+    stats = OutboundStats()
+    outbound = OutboundQueue(websocket, OutboundSettings(coalesce_control=True), stats)
+    outbound.start()
+    await outbound.send_bytes(b"first")
+    await asyncio.sleep(0.01)
+    await outbound.send_json(Backchannel(text="Mm-hmm."))
+    await outbound.send_json(Clear())
+    await outbound.send_bytes(b"audio")
+    await outbound.send_json(Response(text="Hi", rung="full"))
+    websocket.gate.set()
+    await outbound.flush()
+    await outbound.stop()
+    assert websocket.sent == [
+        b"first",
+        {"type": "batch", "data": [{"type": "backchannel", "data": {"text": "Mm-hmm."}}, {"type": "clear"}]},
+        b"audio",
+        {"type": "response", "data": {"text": "Hi", "rung": "full"}}
+    ]
+    assert stats.batches.value == 1
+
+@pytest.mark.asyncio
+async def test_slow_consumer_disconnected():
+    websocket = RecordingWebSocket()
+    websocket.gate.clear()
+    stats = OutboundStats()
+    outbound = OutboundQueue(websocket, OutboundSettings(max_queue_bytes=1000), stats)
+    outbound.start()
+    for _ in range(5):
+        await outbound.send_bytes(b"x" * 300)
+    await asyncio.sleep(0.01)
+
+    assert websocket.closed == (WS_CLOSE_POLICY_VIOLATION, "Client too slow")
+    assert stats.slow_disconnects.value == 1
+    assert stats.snapshot()["queued_bytes"] == 0
+    # Anything sent afterwards is discarded
+    await outbound.send_bytes(b"late")
+    assert not outbound.items
+    await outbound.stop()
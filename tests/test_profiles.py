@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.messages import TranscriptionResult
+from src.retell_agent import RetellAgent
+from src.utils.concurrency import WS_CLOSE_POLICY_VIOLATION, WS_CLOSE_TRY_AGAIN_LATER
+from src.utils.exceptions import ConfigurationError
+from src.utils.settings import TuningSettings
+from src.utils.tuning import Tuner
+
+ACME = {
+    "system_prompt": "You are Acme Air's booking assistant.",
+    "max_sessions": 1,
+    "voice": {"providers": {"elevenlabs": {"voice_id": "acme"}}},
+    "turn": {"filler_text": "One moment, please hold."}
+}
+
+@pytest.fixture
+def agent(make_agent):
+    return make_agent({"profiles": {"agents": {"acme": ACME}}})
+
+def test_profile_overrides_layer_over_the_config(agent):
+    assert agent.profiles.acquire("s1", "acme").admitted
+    tuning = agent.session_tuning("s1")
+    assert tuning.profile == "acme"
+    assert tuning.voice.provider.voice_id == "acme"
+    assert tuning.turn.filler_text == "One moment, please hold."
+    assert tuning.cache_namespace == "acme"
+    # Everything else is the top-level config
+    assert tuning.llm.provider == agent.tuning.llm.provider
+    assert tuning.turn.budget_ms == agent.tuning.turn.budget_ms
+    assert agent.session_tuning("unknown") is agent.tuning
+
+def test_default_profile_and_quota(agent):
+    assert agent.profiles.acquire("s1").admitted
+    assert agent.session_tuning("s1").profile == "default"
+
+    assert agent.profiles.acquire("s2", "acme").admitted
+    decision = agent.profiles.acquire("s3", "acme")
+    assert (decision.admitted, decision.code) == (False, WS_CLOSE_TRY_AGAIN_LATER)
+    agent.release_session("s2")
+    assert agent.profiles.acquire("s3", "acme").admitted
+
+    decision = agent.profiles.acquire("s4", "globex")
+    assert (decision.admitted, decision.code) == (False, WS_CLOSE_POLICY_VIOLATION)
+    assert agent.profiles.stats()["sessions"] == {"default": 1, "acme": 1}
+
+@pytest.mark.parametrize("profile, error", [
+    ({"llm": {"default_provider": "other"}}, "can't be overridden"),
+    ({"voice": {"providers": {"elevenlabs": {"stability": "high"}}}}, "profiles.agents.bad"),
+    ({"prompt": "Hi"}, "Unknown parameter"),
+])
+def test_invalid_profile_is_a_configuration_error(config, session_manager, profile, error):
+    config["profiles"] = {"agents": {"bad": profile}}
+    with pytest.raises(ConfigurationError, match=error):
+        RetellAgent(config, session_manager)
+
+def test_tuning_changes_reach_profiles(config, agent):
+    tuner = Tuner(config, agent, TuningSettings())
+    tuner.update({"llm": {"providers": {"openai": {"max_tokens": 80}}},
+                  "voice": {"providers": {"elevenlabs": {"stability": 0.9}}}}, source="test")
+    acme = agent.profiles.tunings["acme"]
+    assert acme.version == agent.tuning.version
+    assert acme.llm.provider.max_tokens == 80
+    assert acme.voice.provider.stability == 0.9
+    # The profile's own override still wins
+    assert acme.voice.provider.voice_id == "acme"
+
+@pytest.mark.asyncio
+async def test_turn_uses_profile_prompt_voice_and_clip_namespace(agent, session_manager):
+    # Clients and connection pools are shared; each turn passes its profile's settings
+    agent.language_model.generate_response = AsyncMock(return_value="Hi.")
+    agent.audio_processor.encode_output = MagicMock(return_value=[])
+    session_id = session_manager.create_session()
+    agent.profiles.acquire(session_id, "acme")
+
+    await agent.handle_message(TranscriptionResult(text="Hello", is_final=True), session_id)
+
+    assert agent.language_model.generate_response.await_args.kwargs["system_prompt"] == ACME["system_prompt"]
+    assert agent.voice_synthesizer.synthesize.await_args.args[1].provider.voice_id == "acme"
+
+    await agent.prepare_fillers(agent.profiles.tunings["acme"])
+    assert agent.fillers.get(agent.profiles.tunings["acme"], "Mm-hmm.") is not None
+    assert agent.fillers.get(agent.tuning, "Mm-hmm.") is None
@@ -0,0 +1,79 @@
+import pytest
+from src.utils.rate_limit import ClientLimits, IPAllowlist, TokenBucketTable
+
+def test_token_bucket_refills_over_time():
+    table = TokenBucketTable(capacity=2, period=60.0)
+    assert table.allow("a", now=0.0)
+    assert table.allow("a", now=0.0)
+    assert not table.allow("a", now=0.0)
+    # One token refills every 30 seconds
+    assert table.allow("a", now=30.0)
+    assert not table.allow("a", now=30.0)
+
+def test_token_bucket_compaction_evicts_only_idle_buckets():
+    table = TokenBucketTable(capacity=10, period=60.0)
+    table.allow("idle", now=0.0)
+    table.allow("active", now=50.0)
+
+    assert table.compact(now=70.0) == 1
+    assert "idle" not in table.buckets
+    assert "active" in table.buckets
+
+def test_disabled_table_allows_everything():
+    table = TokenBucketTable(capacity=0, period=60.0)
+    assert all(table.allow("a") for _ in range(1000))
+    assert len(table) == 0
+
+def test_ip_allowlist():
+    allowlist = IPAllowlist(["10.0.0.0/8", "192.168.1.5", "2001:db8::/32"])
+    assert allowlist.allows("10.1.2.3")
+    assert allowlist.allows("192.168.1.5")
+    assert allowlist.allows("2001:db8::1")
+    assert not allowlist.allows("192.168.1.6")
+    assert not allowlist.allows("not-an-ip")
+    assert IPAllowlist([]).allows("8.8.8.8")
+
+def test_client_limits_connection_checks():
+    limits = ClientLimits({
+        "rate_limit": 1,
+        "ip_whitelist": ["127.0.0.1"],
+        "allowed_origins": ["https://app.example.com"],
+    })
+    assert limits.check_connection("10.0.0.1", "https://app.example.com") == "Client address not allowed"
+    assert limits.check_connection("127.0.0.1", "https://evil.example.com") == "Origin not allowed"
+    assert limits.check_connection("127.0.0.1", "https://app.example.com") is None
+    assert limits.check_connection("127.0.0.1", "https://app.example.com") == "Rate limit exceeded"
+
+def test_client_limits_audio_seconds_per_session():
+    limits = ClientLimits({"session_limits": {"audio_seconds_per_minute": 1.0}})
+    assert limits.allow_audio("127.0.0.1", "s1", 0.5)
+    assert limits.allow_audio("127.0.0.1", "s1", 0.5)
+    assert not limits.allow_audio("127.0.0.1", "s1", 0.5)
+
+    limits.end_session("s1")
+    assert "s1" not in limits.session_audio.buckets
+
+def test_client_limits_sessions_per_ip():
+    limits = ClientLimits({"session_limits": {"max_sessions_per_ip": 2}})
+    for session_id in ("s1", "s2"):
+        assert limits.check_connection("127.0.0.1") is None
+        limits.start_session("127.0.0.1", session_id)
+    assert limits.check_connection("127.0.0.1") == "Too many sessions"
+    assert limits.check_connection("127.0.0.2") is None
+
+    # A resumed session keeps its place; an ended one frees it
+    limits.rename_session("s1", "resumed")
+    assert limits.check_connection("127.0.0.1") == "Too many sessions"
+    limits.end_session("resumed")
+    assert limits.check_connection("127.0.0.1") is None
+    assert limits.stats()["ip_sessions"] == 1
+
+def test_client_limits_compacts_idle_buckets_on_connection(monkeypatch):
+    limits = ClientLimits({"rate_limit": 10})
+    clock = [0.0]
+    monkeypatch.setattr("src.utils.rate_limit.time.monotonic", lambda: clock[0])
+    for i in range(100):
+        limits.check_connection(f"10.0.0.{i}")
+    clock[0] = 61.0
+    limits.check_connection("10.0.1.1")
+    assert len(limits.ip_requests) == 1
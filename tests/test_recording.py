@@ -0,0 +1,183 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+from src.speech import TranscriptionResult
+from src.utils.recording import (
+    AUDIO,
+    CANCELLED,
+    LLM,
+    OPEN,
+    STAGES,
+    STT,
+    TEXT,
+    TTS,
+    Recorder,
+    SessionRecording,
+    install_recorder,
+    install_replay,
+    load_recordings,
+    replay_sessions
+)
+from tests.conftest import StubLLM
+
+def frame() -> bytes:
+    return np.full(320, 0.01, dtype=np.float32).tobytes()
+
+def conversation(session_id: str = "s1", latency_ms: float = 0.0) -> SessionRecording:
+    pcm = np.zeros(800, dtype=np.int16).tobytes()
+    return SessionRecording(session_id, [
+        (OPEN, 0.0, 0.0, {"codec": "float32", "sample_rate": 16000}),
+        (AUDIO, 0.0, 0.0, frame()),
+        (STT, 0.0, latency_ms, TranscriptionResult("", False, 0.0, "en-US")),
+        (AUDIO, 0.02, 0.0, frame()),
+        (STT, 0.02, latency_ms, TranscriptionResult("Hello", True, 0.9, "en-US")),
+        (LLM, 0.03, latency_ms, "Hi there"),
+        (TTS, 0.04, latency_ms, pcm)
+    ])
+
+@pytest.fixture
+def agent(make_agent):
+    return make_agent({"voice": {"providers": {"elevenlabs": {"output_format": "pcm_16000"}}}})
+
+def test_recording_round_trip(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    recorder.open("s1", "pcm16", 8000)
+    recorder.record("s1", AUDIO, b"\x01\x02")
+    recorder.record("s1", TEXT, "hello")
+    recorder.record("s1", STT, TranscriptionResult("hi", True, 0.9, "en-US"), latency_ms=120.0)
+    recorder.record("unknown", AUDIO, b"ignored")
+    recorder.close("s1")
+    recorder.stop()
+
+    [recording] = load_recordings(str(tmp_path))
+    assert recording.session_id == "s1"
+    kinds = [event[0] for event in recording.events]
+    assert kinds == [OPEN, AUDIO, TEXT, STT]
+    assert recording.events[0][3] == {"codec": "pcm16", "sample_rate": 8000}
+    assert recording.events[1][3] == b"\x01\x02"
+    assert recording.events[3][2] == pytest.approx(120.0)
+    assert recording.events[3][3].text == "hi"
+
+def test_resumed_session_appends_to_its_recording(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    recorder.open("s1", "pcm16", 8000)
+    recorder.record("s1", TEXT, "before")
+    recorder.close("s1")
+    # Handed back to this node after a drain
+    recorder.open("s1", "pcm16", 8000)
+    recorder.record("s1", TEXT, "after")
+    recorder.stop()
+
+    [recording] = load_recordings(str(tmp_path))
+    assert [event[3] for event in recording.events if event[0] == TEXT] == ["before", "after"]
+
+def test_full_queue_drops_events_instead_of_blocking(tmp_path):
+    recorder = Recorder(str(tmp_path), queue_size=1)
+    recorder.sessions["s1"] = 0.0
+    recorder.record("s1", TEXT, "queued")
+    recorder.record("s1", TEXT, "dropped")
+    assert recorder.stats()["dropped"] == 1
+    recorder.close("s1")
+    assert list(recorder.closing) == [("s1", 1)]
+
+    # Runs even under sustained load, when the queue is never seen empty
+    recorder.queue.empty = lambda: False
+    recorder.start()
+    for _ in range(100):
+        if not recorder.closing:
+            break
+        time.sleep(0.01)
+    assert not recorder.closing and not recorder.files
+    recorder.stop()
+
+def test_save_matches_load(tmp_path):
+    conversation().save(str(tmp_path))
+    [loaded] = load_recordings(str(tmp_path))
+    assert [event[0] for event in loaded.events] == [event[0] for event in conversation().events]
+
+@pytest.mark.asyncio
+async def test_recorder_captures_turn(agent, session_manager, tmp_path):
+    agent.speech_recognizer.transcribe = AsyncMock(return_value=TranscriptionResult("Hello", True, 0.9, "en-US"))
+    agent.language_model.generate_response = AsyncMock(return_value="Hi there")
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=np.zeros(800, dtype=np.int16).tobytes())
+    install_recorder(agent, Recorder(str(tmp_path)))
+
+    session_id = session_manager.create_session()
+    await agent.open_audio_session(session_id)
+    response = await agent.handle_frame(AsyncMock(), frame(), session_id)
+    assert response["data"]["text"] == "Hi there"
+    session_manager.end_session(session_id)
+    agent.recorder.stop()
+
+    [recording] = load_recordings(str(tmp_path))
+    assert [event[0] for event in recording.events] == [OPEN, AUDIO, STT, LLM, TTS]
+    assert recording.events[3][3] == "Hi there"
+
+@pytest.mark.asyncio
+async def test_replay_runs_offline(agent):
+    recordings = [conversation("s1"), conversation("s2")]
+    install_replay(agent, recordings, latency_scale=0)
+    await agent.initialize()
+
+    result = await replay_sessions(agent, recordings)
+    assert result["errors"] == 0
+    assert result["latency"]["frame"]["count"] == 4
+    assert result["latency"]["turn"]["count"] == 2
+
+@pytest.mark.asyncio
+async def test_replay_scales_latency(agent):
+    recordings = [conversation(latency_ms=20.0)]
+    install_replay(agent, recordings, latency_scale=2.0)
+    await agent.initialize()
+
+    result = await replay_sessions(agent, recordings)
+    # STT, LLM and TTS each wait 40 ms on the turn's frame
+    assert result["latency"]["turn"]["p50_ms"] >= 120
+
+@pytest.mark.asyncio
+async def test_replay_reports_missing_responses(agent):
+    recording = conversation()
+    recording.events = [event for event in recording.events if event[0] != LLM]
+    install_replay(agent, [recording], latency_scale=0)
+    await agent.initialize()
+
+    result = await replay_sessions(agent, [recording])
+    assert result["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_replay_merges_fragments_as_recorded(make_agent, session_manager, tmp_path):
+    overrides = {"turn": {"debounce_ms": 400},
+                 "voice": {"providers": {"elevenlabs": {"output_format": "pcm_16000"}}}}
+    live = make_agent(overrides, audio=np.zeros(800, dtype=np.int16).tobytes())
+    StubLLM(live, 0.2)
+    live.speech_recognizer.transcribe = AsyncMock(side_effect=[
+        TranscriptionResult("Book a flight", True, 0.9, "en-US"), TranscriptionResult("to Boston.", True, 0.9, "en-US")
+    ])
+    install_recorder(live, Recorder(str(tmp_path)))
+    session_id = session_manager.create_session()
+    await live.open_audio_session(session_id)
+    await live.handle_frame(AsyncMock(), frame(), session_id)
+    await asyncio.sleep(0.05)
+    # Merged into the first turn, whose LLM call is cancelled
+    await live.handle_frame(AsyncMock(), frame(), session_id)
+    await asyncio.wait([live.pending_turns[session_id].task])
+    session_manager.end_session(session_id)
+    live.recorder.stop()
+
+    [recording] = load_recordings(str(tmp_path))
+    assert [event[0] for event in recording.events] == [OPEN, AUDIO, STT, AUDIO, STT, CANCELLED, LLM, TTS]
+    assert recording.events[6][3] == "Reply to Book a flight to Boston."
+
+    agent = make_agent(overrides)
+    install_replay(agent, [recording], latency_scale=0)
+    await agent.initialize()
+    result = await replay_sessions(agent, [recording])
+
+    assert result["errors"] == 0
+    assert result["latency"]["turn"]["count"] == 1
+    assert agent.turn_stats()["merged_turns"] == 1
+    assert agent.turn_stats()["rungs"]["full"] == 1
+    # Each recorded response answered the call it was recorded for
+    assert not any(any(getattr(agent, attribute).responses.values()) for attribute, _, _ in STAGES)
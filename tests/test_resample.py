@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from src.resample import StreamingResampler
+
+def sine(rate, seconds=0.5, freq=440):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.sin(2 * np.pi * freq * t).astype(np.float32)
+
+@pytest.mark.parametrize("in_rate,out_rate", [(8000, 16000), (48000, 16000), (16000, 8000), (44100, 16000)])
+def test_streaming_matches_one_shot(in_rate, out_rate):
+    signal = sine(in_rate)
+    expected = StreamingResampler(in_rate, out_rate).process(signal)
+
+    # Uneven frame sizes exercise phase and history carry-over
+    resampler = StreamingResampler(in_rate, out_rate)
+    sizes = [in_rate // 50, 37, in_rate // 100 + 3]
+    chunks, start, i = [], 0, 0
+    while start < len(signal):
+        size = sizes[i % len(sizes)]
+        chunks.append(resampler.process(signal[start:start + size]))
+        start += size
+        i += 1
+
+    streamed = np.concatenate(chunks)
+    assert len(streamed) == len(expected) == len(signal) * out_rate // in_rate
+    np.testing.assert_allclose(streamed, expected, atol=1e-6)
+
+def test_resampled_tone_keeps_frequency():
+    out_rate = 16000
+    resampler = StreamingResampler(8000, out_rate)
+    output = resampler.process(sine(8000, seconds=1.0))
+
+    spectrum = np.abs(np.fft.rfft(output))
+    peak_hz = np.argmax(spectrum) * out_rate / len(output)
+    assert peak_hz == pytest.approx(440, abs=2)
+
+def test_stereo_and_passthrough():
+    stereo = np.stack([sine(48000), sine(48000, freq=880)], axis=1)
+    output = StreamingResampler(48000, 16000).process(stereo)
+    assert output.shape == (len(stereo) // 3, 2)
+
+    frame = sine(16000)
+    assert StreamingResampler(16000, 16000).process(frame) is frame
+
+def test_audio_processor_resamples_client_audio(audio_processor):
+    audio_processor.open_session("telephony", "pcm16", 8000)
+    frame = (sine(8000, seconds=0.02) * 32767).astype(np.int16).tobytes()
+
+    processed = audio_processor.process(frame, "telephony")
+    assert len(processed) == 320
+
+    tts = (sine(16000, seconds=0.02) * 32767).astype(np.int16).tobytes()
+    frames = audio_processor.encode_output(tts, "pcm_16000", "telephony")
+    assert len(frames[0]) == 160 * 2
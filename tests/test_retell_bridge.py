@@ -0,0 +1,135 @@
+import asyncio
+import json
+import pytest
+import websockets
+from unittest.mock import AsyncMock, MagicMock
+from src.messages import TranscriptionResult
+from src.retell_agent import RetellAgent
+from src.retell_bridge import RetellBridge
+from src.utils.settings import RetellSettings
+
+class FakeRetell:
+    """A local websocket server standing in for Retell.
+
+    Each connection's messages are recorded; `drop_first` ends the first
+    connection abnormally once it has received `drop_after` messages.
+    """
+
+    def __init__(self, drop_first: bool = False, drop_after: int = 2):
+        self.connections = []
+        self.drop_first = drop_first
+        self.drop_after = drop_after
+        self.replies = []
+        self.server = None
+
+    async def handler(self, websocket, path=None):
+        received = []
+        self.connections.append(received)
+        for reply in self.replies:
+            await websocket.send(reply)
+        async for message in websocket:
+            received.append(message)
+            if self.drop_first and len(self.connections) == 1 and len(received) >= self.drop_after:
+                await websocket.close(code=1011)
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+def retell_settings(url: str, **overrides) -> RetellSettings:
+    values = dict(enabled=True, voice_id="default", language="en-US", stream_latency=120, upstream=True,
+                  url=url, reconnect_initial=0.01, reconnect_max=0.05)
+    values.update(overrides)
+    return RetellSettings(**values)
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_forwards_audio_both_ways():
+    async with FakeRetell() as retell:
+        retell.replies = [b"reply-audio"]
+        received = []
+        bridge = RetellBridge()
+        connection = bridge.open("s1", retell_settings(retell.url), '{"type": "config"}',
+                                 AsyncMock(side_effect=received.append))
+        frame = b"frame-1"
+        connection.send_audio(frame)
+        await wait_for(lambda: retell.connections and len(retell.connections[0]) == 2)
+        await wait_for(lambda: received)
+
+        assert retell.connections[0] == ['{"type": "config"}', b"frame-1"]
+        assert received == [b"reply-audio"]
+        assert bridge.stats()["connected"] == 1
+        await bridge.close_all()
+
+@pytest.mark.asyncio
+async def test_reconnects_and_resends_config():
+    async with FakeRetell(drop_first=True) as retell:
+        bridge = RetellBridge()
+        connection = bridge.open("s1", retell_settings(retell.url), "config", AsyncMock())
+        connection.send_audio(b"a")
+        await wait_for(lambda: retell.connections and len(retell.connections[0]) == 2)
+        # Queued while the connection is replaced, then sent on the new one
+        connection.send_audio(b"b")
+        await wait_for(lambda: len(retell.connections) == 2 and len(retell.connections[1]) == 2)
+
+        assert retell.connections[1] == ["config", b"b"]
+        stats = bridge.stats()
+        assert stats["connects"] == 2
+        assert stats["reconnects"] == 1
+        await bridge.close_all()
+
+@pytest.mark.asyncio
+async def test_buffer_drops_oldest_frames_while_disconnected():
+    bridge = RetellBridge()
+    # Nothing listens here, so the connection keeps retrying
+    connection = bridge.open("s1", retell_settings("ws://127.0.0.1:9", buffer_frames=2), "config", AsyncMock())
+    for frame in (b"1", b"2", b"3"):
+        connection.send_audio(frame)
+    assert list(connection.frames) == [b"2", b"3"]
+    assert bridge.stats()["frames_dropped"] == 1
+    await wait_for(lambda: bridge.stats()["reconnects"] >= 2)
+    bridge.release("s1")
+    assert bridge.stats()["connections"] == 0
+
+@pytest.mark.asyncio
+async def test_agent_streams_session_upstream(config, session_manager):
+    async with FakeRetell() as retell:
+        transcript = {"type": "transcription", "data": {"text": "Hi", "is_final": False}}
+        retell.replies = [json.dumps(transcript), json.dumps({"type": "metadata", "data": {}})]
+        config["retell"].update(upstream=True, url=retell.url, stream_latency=80, noise_suppression=False)
+        agent = RetellAgent(config, session_manager)
+        agent.is_initialized = True
+        agent.handle_audio = AsyncMock(return_value=None)
+        websocket = MagicMock(send_json=AsyncMock(), send_bytes=AsyncMock())
+        session_id = session_manager.create_session()
+        await agent.open_audio_session(session_id, "pcm16", 8000)
+
+        await agent.start_conversation(session_id, websocket)
+        await agent.handle_frame(websocket, b"frame", session_id)
+        await wait_for(lambda: retell.connections and len(retell.connections[0]) == 2)
+        await wait_for(lambda: websocket.send_json.await_count == 1)
+
+        config_message = json.loads(retell.connections[0][0])["data"]
+        assert config_message["stream_latency_ms"] == 80
+        assert config_message["audio_config"] == {"auto_gain_control": True, "noise_suppression": False}
+        assert (config_message["audio_encoding"], config_message["sample_rate"]) == ("pcm16", 8000)
+        assert retell.connections[0][1] == b"frame"
+        assert websocket.send_json.await_args.args[0] == TranscriptionResult(text="Hi", is_final=False)
+
+        session_manager.end_session(session_id)
+        assert agent.retell_bridge.get(session_id) is None
+        await asyncio.sleep(0.01)
@@ -0,0 +1,106 @@
+import pytest
+from src.utils.session import SessionManager
+from src.utils.timer_wheel import TimerWheel
+
+def test_timer_wheel_fires_only_due_timers():
+    wheel = TimerWheel(tick=1.0, slots=8, now=0.0)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 5.0)
+
+    assert wheel.advance(1.0) == []
+    assert wheel.advance(2.0) == ["a"]
+    assert "b" in wheel
+    assert wheel.advance(5.0) == ["b"]
+    assert len(wheel) == 0
+
+def test_timer_wheel_cancel_and_long_pause():
+    wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+    wheel.schedule("a", 3.0)
+    wheel.schedule("b", 10.0)
+    assert wheel.cancel("a")
+    assert not wheel.cancel("a")
+
+    # Jumping more than one revolution still fires timers that came due
+    assert wheel.advance(20.0) == ["b"]
+
+def test_session_expiry_is_lazy_on_activity():
+    manager = SessionManager()
+    manager.set_timeout(10)
+    session_id = manager.create_session("s1")
+    created = manager.sessions[session_id].last_activity
+
+    # Activity pushes the deadline out; the timer is re-armed when it fires
+    manager.sessions[session_id].last_activity = created + 5
+    assert manager.cleanup_sessions(now=created + 11) == []
+    assert session_id in manager.sessions
+
+    assert manager.cleanup_sessions(now=created + 16) == [session_id]
+    assert session_id not in manager.sessions
+
+def test_end_listeners_run_on_expiry_and_end():
+    manager = SessionManager()
+    manager.set_timeout(1)
+    ended = []
+    manager.add_end_listener(ended.append)
+
+    expiring = manager.create_session()
+    closed = manager.create_session()
+    manager.end_session(closed)
+    manager.cleanup_sessions(now=manager.sessions[expiring].last_activity + 2)
+
+    assert ended == [closed, expiring]
+
+def test_release_session_clears_llm_history_and_audio(retell_agent):
+    session_id = retell_agent.session_manager.create_session()
+    retell_agent.language_model.conversation_history[session_id] = [{"role": "user", "content": "hi"}]
+    retell_agent.audio_processor._session_state(session_id)
+
+    retell_agent.session_manager.end_session(session_id)
+
+    assert session_id not in retell_agent.language_model.conversation_history
+    assert session_id not in retell_agent.audio_processor.sessions
+
+def test_session_uses_slots():
+    manager = SessionManager()
+    session = manager.sessions[manager.create_session()]
+    assert not hasattr(session, "__dict__")
+
+def test_stats_track_stages_incrementally():
+    manager = SessionManager()
+    first = manager.create_session()
+    manager.create_session()
+
+    with manager.stage(first, "llm"):
+        with manager.stage(first, "tts"):
+            stats = manager.stats()
+            assert stats["total"] == 2
+            assert stats["active"] == 2
+            assert stats["busy"] == 1
+            assert stats["idle"] == 1
+            assert stats["in_flight"]["llm"] == 1
+            assert stats["in_flight"]["tts"] == 1
+
+    stats = manager.stats()
+    assert stats["active"] == 2
+    assert stats["busy"] == 0
+    assert stats["in_flight"] == {"turn": 0, "stt": 0, "llm": 0, "tts": 0}
+
+def test_stats_when_session_ends_mid_stage():
+    manager = SessionManager()
+    session_id = manager.create_session()
+    with manager.stage(session_id, "stt"):
+        manager.end_session(session_id)
+        assert manager.stats()["active"] == manager.stats()["busy"] == 0
+    assert manager.stats()["in_flight"]["stt"] == 0
+
+def test_stats_age_histogram():
+    manager = SessionManager()
+    session_id = manager.create_session()
+    created = manager.sessions[session_id].created_at
+
+    histogram = manager.stats(now=created + 600)["age_histogram"]
+    assert histogram["<=900s"] == 1
+    assert sum(histogram.values()) == 1
+
+    manager.end_session(session_id)
+    assert manager.created_per_epoch == {}
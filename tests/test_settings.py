@@ -0,0 +1,99 @@
+import dataclasses
+import pickle
+import pytest
+from src.utils.config import load_config, load_settings
+from src.utils.exceptions import ConfigurationError
+from src.utils.settings import (
+    AudioSettings,
+    Settings,
+    apply_env_overrides,
+    from_dict,
+    provider_settings
+)
+
+@pytest.fixture
+def full_config():
+    return load_config("tests/test_config.yaml")
+
+def test_parses_config_file():
+    settings = load_settings("tests/test_config.yaml")
+    assert settings.audio.sample_rate == 16000
+    assert settings.speech_recognition.provider.model == "nova-2"
+    assert settings.voice.provider.output_format == "pcm_16000"
+    assert settings.concurrency.providers["openai"].max_concurrency == 30
+
+def test_disabled_providers_are_skipped():
+    settings = load_settings("tests/test_config.yaml")
+    assert set(settings.voice.providers) == {"elevenlabs"}
+
+def test_enabled_provider_flag_is_not_a_setting(config):
+    config["llm"]["providers"]["openai"]["enabled"] = True
+    settings = provider_settings("llm", config["llm"])
+    assert settings.provider.max_tokens == 150
+    # The config itself is left as written
+    assert config["llm"]["providers"]["openai"]["enabled"] is True
+
+def test_defaults_fill_optional_keys(config):
+    audio = from_dict(AudioSettings, config["audio"], "audio")
+    assert audio.codec == "float32"
+    assert audio.dsp_workers == 0
+    assert provider_settings("voice", config["voice"]).provider.output_format == "mp3_44100"
+
+def test_settings_are_frozen_and_slotted(config):
+    audio = from_dict(AudioSettings, config["audio"], "audio")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        audio.sample_rate = 8000
+    assert not hasattr(audio, "__dict__")
+    assert dataclasses.replace(audio, sample_rate=8000).sample_rate == 8000
+
+def test_settings_pickle(config):
+    # Audio settings are sent to DSP worker processes
+    audio = from_dict(AudioSettings, config["audio"], "audio")
+    assert pickle.loads(pickle.dumps(audio)) == audio
+
+def test_rejects_wrong_type(config):
+    config["audio"]["sample_rate"] = "fast"
+    with pytest.raises(ConfigurationError, match="audio.sample_rate"):
+        from_dict(AudioSettings, config["audio"], "audio")
+
+def test_rejects_bool_for_int(config):
+    config["audio"]["channels"] = True
+    with pytest.raises(ConfigurationError, match="audio.channels"):
+        from_dict(AudioSettings, config["audio"], "audio")
+
+def test_rejects_unknown_key(config):
+    config["audio"]["sample_rat"] = 16000
+    with pytest.raises(ConfigurationError, match="audio.sample_rat"):
+        from_dict(AudioSettings, config["audio"], "audio")
+
+def test_rejects_value_below_minimum(config):
+    config["audio"]["sample_rate"] = 100
+    with pytest.raises(ConfigurationError, match="at least"):
+        from_dict(AudioSettings, config["audio"], "audio")
+
+def test_rejects_missing_section(full_config):
+    del full_config["retell"]
+    with pytest.raises(ConfigurationError, match="Missing required section: retell"):
+        Settings.from_dict(full_config)
+
+def test_rejects_unconfigured_default_provider(config):
+    config["llm"]["default_provider"] = "anthropic"
+    with pytest.raises(ConfigurationError, match="default_provider"):
+        provider_settings("llm", config["llm"])
+
+def test_env_overrides(full_config):
+    apply_env_overrides(full_config, {
+        "VOICE_AGENT__AUDIO__SAMPLE_RATE": "8000",
+        "VOICE_AGENT__AUDIO__NOISE_SUPPRESSION": "false",
+        "VOICE_AGENT__SECURITY__SESSION_LIMITS__MAX_SESSIONS_PER_IP": "3",
+        "UNRELATED": "1"
+    })
+    settings = Settings.from_dict(full_config)
+    assert settings.audio.sample_rate == 8000
+    assert settings.audio.noise_suppression is False
+    assert settings.security.session_limits.max_sessions_per_ip == 3
+
+def test_env_override_is_validated(full_config):
+    apply_env_overrides(full_config, {"VOICE_AGENT__AUDIO__CHANNELS": "two"})
+    with pytest.raises(ConfigurationError, match="audio.channels"):
+        Settings.from_dict(full_config)
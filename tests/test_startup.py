@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from src.utils.startup import StartupReport
+
+def test_provider_sdks_are_not_imported_at_module_load():
+    # Fresh interpreter, since other tests may already have imported the SDKs
+    code = (
+        "import sys, src.retell_agent; "
+        "print(','.join(m for m in ('sounddevice', 'openai', 'elevenlabs', 'deepgram', 'websockets') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_report_records_first_import_and_phases():
+    report = StartupReport()
+    module = report.import_module("colorsys")
+    assert module.__name__ == "colorsys"
+    assert report.import_module("colorsys") is module
+    assert list(report.imports) in ([], ["colorsys"])
+
+    with report.phase("config"):
+        pass
+    report.mark_ready()
+    snapshot = report.snapshot()
+    assert "config" in snapshot["phases_ms"]
+    assert snapshot["ready_ms"] >= snapshot["phases_ms"]["config"]
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+import yaml
+from unittest.mock import AsyncMock, MagicMock
+from src.messages import TranscriptionResult
+from src.retell_agent import RetellAgent
+from src.utils.concurrency import ProviderLimiter
+from src.utils.exceptions import ConfigurationError
+from src.utils.settings import TuningSettings
+from src.utils.tuning import Tuner
+
+MAX_TOKENS = {"llm": {"providers": {"openai": {"max_tokens": 80}}}}
+
+@pytest.fixture
+def agent(config, session_manager):
+    return RetellAgent(config, session_manager)
+
+@pytest.fixture
+def tuner(config, agent, tmp_path):
+    return Tuner(config, agent, TuningSettings(file=str(tmp_path / "tuning.yaml")))
+
+def test_update_swaps_settings_and_versions(tuner, agent):
+    entry = tuner.update(MAX_TOKENS, source="test")
+    assert entry["version"] == 1
+    assert entry["changes"] == {"llm.providers.openai.max_tokens": [150, 80]}
+    assert agent.language_model.request_options["max_tokens"] == 80
+    assert agent.tuning.llm.provider.max_tokens == 80
+    assert tuner.stats()["history"][-1]["version"] == 1
+
+def test_updates_accumulate(tuner, agent):
+    tuner.update(MAX_TOKENS, source="test")
+    tuner.update({"retell": {"stream_latency": 100}}, source="test")
+    assert agent.tuning.version == 2
+    assert agent.language_model.max_tokens == 80
+    assert '"stream_latency_ms": 100' in agent.conversation_config
+
+def test_concurrency_limits_are_tunable(tuner, agent):
+    tuner.update({"concurrency": {"latency_budget_ms": 900, "providers": {"openai": {"max_concurrency": 3}}}},
+                 source="test")
+    assert agent.limiters["openai"].max_concurrency == 3
+    assert agent.admission.latency_budget_ms == 900
+
+def test_rejects_untunable_changes(tuner, agent):
+    with pytest.raises(ConfigurationError):
+        tuner.update({"audio": {"sample_rate": 8000}}, source="test")
+    with pytest.raises(ConfigurationError):
+        tuner.update({"llm": {"default_provider": "other"}}, source="test")
+    assert agent.tuning.version == 0
+
+def test_invalid_change_leaves_settings_alone(tuner, agent):
+    with pytest.raises(ConfigurationError):
+        tuner.update({"llm": {"providers": {"openai": {"max_tokens": "many"}}}}, source="test")
+    assert agent.tuning.version == 0
+    assert agent.language_model.max_tokens == 150
+
+@pytest.mark.asyncio
+async def test_in_flight_turn_keeps_old_settings(tuner, agent, session_manager):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        started.set()
+        await release.wait()
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="Hi"))])
+
+    agent.language_model.client = MagicMock()
+    agent.language_model.client.chat.completions.create = create
+    agent.language_model.is_initialized = True
+    agent.voice_synthesizer.synthesize = AsyncMock(return_value=b"audio")
+    agent.audio_processor.encode_output = MagicMock(return_value=[])
+    session_id = session_manager.create_session()
+    message = TranscriptionResult(text="Hello", is_final=True)
+
+    turn = asyncio.create_task(agent.handle_message(message, session_id))
+    await started.wait()
+    tuner.update({"llm": {"providers": {"openai": {"max_tokens": 80}}},
+                  "voice": {"providers": {"elevenlabs": {"voice_id": "new"}}}}, source="test")
+    release.set()
+    await turn
+
+    assert calls[0]["max_tokens"] == 150
+    assert agent.voice_synthesizer.synthesize.call_args.args[1].provider.voice_id == "default"
+
+    await agent.handle_message(message, session_id)
+    assert calls[1]["max_tokens"] == 80
+    assert agent.voice_synthesizer.synthesize.call_args.args[1].provider.voice_id == "new"
+
+def test_file_change_reaches_other_workers(config, tuner, session_manager, tmp_path):
+    tuner.update(MAX_TOKENS, source="test")
+
+    # Another worker process watching the same file
+    other = RetellAgent(config, session_manager)
+    other_tuner = Tuner(config, other, TuningSettings(file=str(tmp_path / "tuning.yaml")))
+    assert other_tuner.check_file()
+    assert other.tuning.version == 1
+    assert other.language_model.max_tokens == 80
+    assert not other_tuner.check_file()
+
+def test_hand_edit_is_applied(tuner, agent, tmp_path):
+    path = tmp_path / "tuning.yaml"
+    path.write_text(yaml.safe_dump({"retell": {"stream_latency": 50}}))
+    assert tuner.check_file()
+    assert agent.settings.stream_latency == 50
+    assert agent.tuning.version == 1
+
+def test_removing_file_reverts_overrides(tuner, agent, tmp_path):
+    tuner.update(MAX_TOKENS, source="test")
+    (tmp_path / "tuning.yaml").unlink()
+    assert tuner.check_file()
+    assert agent.language_model.max_tokens == 150
+    assert agent.tuning.version == 2
+
+def test_bad_file_is_ignored(tuner, agent, tmp_path):
+    (tmp_path / "tuning.yaml").write_text("audio:\n  sample_rate: 8000\n")
+    assert not tuner.check_file()
+    assert agent.tuning.version == 0
+
+@pytest.mark.asyncio
+async def test_limiter_reconfigure_lets_holders_finish():
+    limiter = ProviderLimiter("test", max_concurrency=1, max_queue=10, queue_timeout=1.0)
+    holding = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.acquire():
+            holding.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await holding.wait()
+
+    # The new limit admits a second request while the first still holds its old slot
+    limiter.configure(max_concurrency=2, max_queue=10, queue_timeout=1.0)
+    async with limiter.acquire():
+        assert limiter.in_flight == 2
+    release.set()
+    await holder
+    assert limiter.in_flight == 0
+
+def test_tuning_endpoint_requires_admin(client):
+    response = client.post("/tuning", json=MAX_TOKENS)
+    assert response.status_code == 403
+
+def test_tuning_endpoint(client, monkeypatch, tmp_path):
+    import app as app_module
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module.tuner, "path", str(tmp_path / "tuning.yaml"))
+    version = app_module.tuner.version
+
+    response = client.post("/tuning", json={"audio": {"sample_rate": 8000}}, headers={"x-admin-token": "secret"})
+    assert response.status_code == 400
+
+    response = client.post("/tuning", json=MAX_TOKENS, headers={"x-admin-token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["version"] == version + 1
+    assert client.get("/tuning").json()["version"] == version + 1
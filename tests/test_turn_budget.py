@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.messages import TranscriptionResult
+from tests.conftest import StubLLM
+
+MESSAGE = TranscriptionResult(text="Hello", is_final=True)
+
+@pytest.fixture
+def agent(make_agent):
+    agent = make_agent({"turn": {"budget_ms": 300, "llm_timeout_ms": 100, "retry_timeout_ms": 100,
+                                 "short_max_tokens": 20}})
+    agent.audio_processor.encode_output = MagicMock(return_value=[b"frame"])
+    return agent
+
+@pytest.mark.asyncio
+async def test_fast_turn_is_full(agent, session_manager):
+    StubLLM(agent, [0])
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    assert response["data"] == {"text": "Reply to Hello", "audio": [b"frame"], "rung": "full"}
+    assert agent.turn_stats()["rungs"]["full"] == 1
+    assert agent.turn_stats()["latency_ms"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_slow_llm_retries_short(agent, session_manager):
+    llm = StubLLM(agent, [1, 0])
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    assert response["data"]["rung"] == "short_reply"
+    assert response["data"]["text"] == "Reply to Hello"
+    assert llm.calls[0].settings.provider.max_tokens == 150
+    assert llm.calls[1].settings.provider.max_tokens == 20
+    assert 0 < llm.calls[1].timeout <= 0.1
+
+@pytest.mark.asyncio
+async def test_llm_error_retries_short(agent, session_manager):
+    agent.language_model.generate_response = AsyncMock(side_effect=[RuntimeError("upstream"), "Short"])
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    assert response["data"]["rung"] == "short_reply"
+    assert response["data"]["text"] == "Short"
+
+@pytest.mark.asyncio
+async def test_filler_when_both_attempts_overrun(agent, session_manager):
+    StubLLM(agent, [1, 1])
+    await agent.prepare_fillers()
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    # MP3 clips are sent as synthesized
+    assert response["data"] == {"text": "One moment, please.", "audio": [b"audio"], "rung": "filler"}
+    assert agent.turn_stats()["rungs"]["filler"] == 1
+
+@pytest.mark.asyncio
+async def test_text_only_without_cached_filler(agent, session_manager):
+    StubLLM(agent, [1, 1])
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    assert response["data"] == {"text": "One moment, please.", "audio": [], "rung": "text_only"}
+
+    # The filler is synthesized in the background for later turns
+    await asyncio.sleep(0.01)
+    assert agent.fillers.get(agent.tuning, "One moment, please.") == [b"audio"]
+
+@pytest.mark.asyncio
+async def test_slow_tts_is_text_only(agent, session_manager):
+    StubLLM(agent, [0])
+
+    async def synthesize(text, settings=None, timeout=None):
+        await asyncio.sleep(1)
+        return b"audio"
+
+    agent.voice_synthesizer.synthesize = synthesize
+    response = await agent.handle_message(MESSAGE, session_manager.create_session())
+    assert response["data"] == {"text": "Reply to Hello", "audio": [], "rung": "text_only"}
+    assert agent.turn_stats()["rungs"] == {"full": 0, "short_reply": 0, "filler": 0, "text_only": 1}
+    assert agent.turn_stats()["backchannels"] == 0
+
+@pytest.mark.asyncio
+async def test_no_budget_propagates_errors(make_agent, session_manager):
+    agent = make_agent()
+    agent.language_model.generate_response = AsyncMock(side_effect=RuntimeError("upstream"))
+    with pytest.raises(RuntimeError):
+        await agent.handle_message(MESSAGE, session_manager.create_session())